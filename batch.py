@@ -0,0 +1,291 @@
+"""
+Пакетный прогон сценария без интерфейса: парк заданной формы работает заданное время симуляции на полной
+скорости (виртуальное время), затем печатается или сохраняется итоговая статистика.
+
+Запуск из корня проекта:
+
+    python batch.py --duration 24h --streets 4 --houses 4 --per-house 4 --floors 9 --demand office \\
+        --strategy LOOK --seed 1 --json report.json --trips-csv trips.csv
+"""
+import argparse
+import asyncio
+import csv
+import json
+import platform
+import random
+import re
+import sys
+import time
+
+from boarding import BoardingModel
+from checkpoint import Checkpointer
+from dispatch import STRATEGIES
+from engine import Simulation
+from forecast import DemandForecaster, Prepositioner
+from history import HistoryReader
+from kinematics import CAR_TYPES
+from passengers import PassengerModel
+from shutdown import install_signal_handlers
+from stats import TripSink, percentile
+from traffic import PROFILES, DemandProfile
+from trip_export import TripExporter
+
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(text):
+    """
+    Разбирает длительность вида "3600", "90m", "8h", "7d".
+
+    :param text: str
+    :return: float, секунды
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", text)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"invalid duration: {text}")
+    return float(match.group(1)) * _UNITS[match.group(2)]
+
+
+class StreetReport(TripSink):
+    """
+    Времена ожидания по улицам и домам для отчёта.
+    """
+
+    def __init__(self, clock, tracker=None):
+        super().__init__(clock, tracker)
+        self.waits = {}  # (улица, дом) -> список ожиданий
+
+    def on_trip(self, trip):
+        if trip.call_time is not None:
+            self.waits.setdefault((trip.street_id, trip.house_id), []).append(trip.pickup_time - trip.call_time)
+
+    def rows(self):
+        result = []
+        for (street_id, house_id), waits in sorted(self.waits.items()):
+            waits.sort()
+            result.append({"street_id": street_id, "house_id": house_id, "served": len(waits),
+                           "wait_mean": sum(waits) / len(waits), "wait_p95": percentile(waits, 95),
+                           "wait_max": waits[-1]})
+        return result
+
+
+class CsvTripLog(TripSink):
+    """
+    Журнал поездок в CSV, по строке на поездку.
+    """
+
+    def __init__(self, path, clock, tracker=None):
+        super().__init__(clock, tracker)
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["elevator_id", "house_id", "street_id", "floor", "drop_floor", "call_time",
+                              "pickup_time", "drop_time"])
+
+    def on_trip(self, trip):
+        self.writer.writerow([trip.elevator_id, trip.house_id, trip.street_id, trip.floor, trip.drop_floor,
+                              "" if trip.call_time is None else f"{trip.call_time:.3f}", f"{trip.pickup_time:.3f}",
+                              f"{trip.drop_time:.3f}"])
+
+    def close(self):
+        self.file.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=parse_duration, default=3600.0,
+                        help="время симуляции: секунды или с суффиксом s/m/h/d (по умолчанию 1h)")
+    parser.add_argument("--streets", type=int, default=4, help="количество улиц")
+    parser.add_argument("--houses", type=int, default=4, help="домов на улице")
+    parser.add_argument("--per-house", type=int, default=4, help="лифтов в доме")
+    parser.add_argument("--floors", type=int, default=3, help="этажность домов")
+    parser.add_argument("--demand", default="flat",
+                        help=f"профиль спроса: {', '.join(PROFILES)} или JSON файл со списком из 24 множителей")
+    parser.add_argument("--start-hour", type=float, default=0.0, help="час суток начала симуляции")
+    parser.add_argument("--probability", type=int, default=13, help="шанс вызова за тик в процентах")
+    parser.add_argument("--strategy", choices=list(STRATEGIES),
+                        help="стратегия очереди вызовов (по умолчанию FCFS, при --restore - из снимка)")
+    parser.add_argument("--boarding", action="store_true",
+                        help="время стоянки по числу входящих и выходящих пассажиров вместо постоянного door_dwell")
+    parser.add_argument("--passengers", action="store_true",
+                        help="пассажиры с этажами назначения и временами по каждому человеку (включает --boarding)")
+    parser.add_argument("--car-type", choices=list(CAR_TYPES),
+                        help="кинематическая модель лифта (по умолчанию floor_time секунд на этаж, при --restore - "
+                             "из снимка)")
+    parser.add_argument("--preposition", action="store_true",
+                        help="ставить свободные лифты на этажи с наибольшим прогнозом вызовов (прогноз учится на лету)")
+    parser.add_argument("--forecast-history", help="обучить прогноз на истории вызовов (файл history.HistoryStore)")
+    parser.add_argument("--history-utc-offset", type=float,
+                        help="часов к UTC у времени истории (по умолчанию местный пояс, как у истории окна "
+                             "программы; 0 - история безголового прогона во времени суток симуляции)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="сохранить отчёт в JSON файл ('-' - в stdout)")
+    parser.add_argument("--trips-csv", help="записать поездки в CSV файл")
+    parser.add_argument("--trips-dir", help="записать поездки колоночным экспортом (.npy) в каталог")
+    parser.add_argument("--checkpoint", help="периодически сохранять снимок состояния в файл")
+    parser.add_argument("--checkpoint-interval", type=parse_duration, default=600.0,
+                        help="период снимков во времени симуляции (по умолчанию 10m)")
+    parser.add_argument("--restore", help="продолжить прогон со снимка (форма парка берётся из снимка)")
+    parser.add_argument("--shutdown-budget", type=float, default=5.0,
+                        help="секунд на завершение (в том числе по Ctrl+C) с записью последнего снимка")
+    return parser
+
+
+async def scenario(simulation, duration, budget=5.0, snapshot=None):
+    """
+    Прогон на duration секунд симуляции. SIGINT/SIGTERM прерывают его досрочно; в обоих случаях симуляция
+    завершается упорядоченно (Simulation.shutdown) с последним снимком, если он задан.
+
+    :return: (float, bool) - секунд симуляции и был ли прогон прерван
+    """
+    await simulation.start()
+    began = simulation.loop.time()
+    waiting = asyncio.ensure_future(asyncio.sleep(duration))
+    install_signal_handlers(simulation.loop, waiting.cancel)
+    try:
+        await waiting
+    except asyncio.CancelledError:
+        pass
+    elapsed = simulation.loop.time() - began
+    await simulation.shutdown(budget, snapshot)
+    return elapsed, waiting.cancelled()
+
+
+def run(args):
+    """
+    Прогоняет сценарий по разобранным аргументам.
+
+    :param args: argparse.Namespace из build_parser()
+    :return: dict, отчёт
+    """
+    hourly = args.demand
+    if args.demand not in PROFILES:
+        with open(args.demand, encoding="utf-8") as file:
+            hourly = json.load(file)
+    demand = DemandProfile(hourly, args.start_hour)
+    shape = (args.streets, args.houses, args.per_house)
+    num_elevators = args.streets * args.houses * args.per_house
+    simulation = Simulation(num_elevators=num_elevators, floors_amount=args.floors, strategy=args.strategy,
+                            seed=args.seed, call_probability=args.probability, shape=shape, demand=demand,
+                            restore=args.restore, car_type=args.car_type)
+    floors = args.floors
+    if args.restore:  # форма парка - из снимка
+        num_elevators = len(simulation.elevators)
+        floors = simulation.houses[0].floors_amount
+        streets = len({elevator.street_id for elevator in simulation.elevators})
+        houses = len({(elevator.street_id, elevator.house_id) for elevator in simulation.elevators})
+        shape = (streets, houses // streets, num_elevators // houses)
+    report = simulation.add_sink(StreetReport(simulation.loop.time, simulation.tracker))
+    if args.trips_csv:
+        simulation.add_sink(CsvTripLog(args.trips_csv, simulation.loop.time, simulation.tracker))
+    if args.trips_dir:
+        simulation.add_sink(TripExporter(args.trips_dir, simulation.loop.time, simulation.tracker))
+    boarding = None
+    if args.passengers:
+        boarding = simulation.add_sink(PassengerModel(simulation.loop.time, random.Random(f"{args.seed}:boarding")))
+    elif args.boarding:
+        boarding = simulation.add_sink(BoardingModel(random.Random(f"{args.seed}:boarding")))
+    positioner = None
+    if args.preposition:
+        forecaster = DemandForecaster(simulation.loop.time, time_offset=args.start_hour * 3600)
+        if args.forecast_history:
+            reader = HistoryReader(args.forecast_history)
+            try:
+                if args.history_utc_offset is None:
+                    offset = time.localtime().tm_gmtoff  # окно программы пишет историю в UTC (time.time())
+                else:
+                    offset = args.history_utc_offset * 3600
+                forecaster.learn(reader, time_offset=offset)
+            finally:
+                reader.close()
+        simulation.add_sink(forecaster)
+        positioner = simulation.add_sink(Prepositioner(forecaster))
+    if args.checkpoint:
+        simulation.add_sink(Checkpointer(args.checkpoint, simulation.houses, simulation.now, args.checkpoint_interval,
+                                         simulation.tracker, simulation.rng))
+    started = time.perf_counter()
+    try:
+        elapsed, interrupted = simulation.loop.run_until_complete(
+            scenario(simulation, args.duration, args.shutdown_budget, args.checkpoint))
+        summary = simulation.stats.summary(simulation.tracker, elapsed)
+    finally:
+        simulation.close()
+    return {
+        "scenario": {
+            "duration": args.duration,
+            "shape": shape,
+            "elevators": num_elevators,
+            "floors": floors,
+            "demand": args.demand,
+            "start_hour": args.start_hour,
+            "probability": args.probability,
+            "strategy": simulation.strategy,
+            "seed": args.seed,
+        },
+        "python": platform.python_version(),
+        "wall_time": time.perf_counter() - started,
+        "simulated": elapsed,
+        "interrupted": interrupted,
+        "summary": summary,
+        "houses": report.rows(),
+        "boarding": None if boarding is None else boarding.summary(),
+        "prepositioned": None if positioner is None else positioner.moves,
+    }
+
+
+def format_report(result):
+    """
+    Отчёт в виде текста для терминала.
+
+    :param result: dict из run()
+    :return: str
+    """
+    scenario, summary = result["scenario"], result["summary"]
+    lines = [
+        f"Сценарий: {scenario['elevators']} лифтов ({'x'.join(map(str, scenario['shape']))}), "
+        f"{scenario['floors']} этажей, спрос {scenario['demand']}, {scenario['strategy']}, зерно {scenario['seed']}",
+        f"Симуляция {result['simulated']:.0f} с за {result['wall_time']:.1f} с"
+        + (f" (прервана, из {scenario['duration']:.0f} с)" if result["interrupted"] else ""),
+        f"Вызовов {summary['calls_generated']}, обслужено {summary['calls_served']} "
+        f"({summary['served_per_hour']:.0f}/ч), рейсов {summary['trips']}, пустых {summary['empty_trips']}",
+    ]
+    for name, title in (("wait", "Ожидание"), ("journey", "Поездка")):
+        if summary[f"{name}_mean"] is not None:
+            lines.append(f"{title}: ср. {summary[f'{name}_mean']:.1f} с, p95 {summary[f'{name}_p95']:.1f} с, "
+                         f"макс. {summary[f'{name}_max']:.1f} с")
+    boarding = result["boarding"]
+    if boarding is not None and boarding["stops"]:
+        lines.append(f"Посадка: вошло {boarding['boarded']}, вышло {boarding['alighted']}, не поместилось "
+                     f"{boarding['refused']}, повторных открытий {boarding['reopens']}, стоянка ср. "
+                     f"{boarding['dwell_mean']:.1f} с")
+    if boarding is not None and boarding.get("wait_mean") is not None:
+        lines.append(f"Пассажиров {boarding['passengers']}, доставлено {boarding['delivered']}, ожидание: ср. "
+                     f"{boarding['wait_mean']:.1f} с, p95 {boarding['wait_p95']:.1f} с; поездка: ср. "
+                     f"{boarding['journey_mean']:.1f} с, p95 {boarding['journey_p95']:.1f} с")
+    if result["prepositioned"] is not None:
+        lines.append(f"Упреждающая расстановка: {result['prepositioned']} перестановок по прогнозу")
+    lines.append(f"{'улица':>5} {'дом':>4} {'обсл.':>7} {'ожид. ср':>9} {'p95':>7} {'макс.':>7}")
+    for row in result["houses"]:
+        lines.append(f"{row['street_id']:>5} {row['house_id']:>4} {row['served']:>7} {row['wait_mean']:>9.1f} "
+                     f"{row['wait_p95']:>7.1f} {row['wait_max']:>7.1f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.restore and (args.boarding or args.passengers):
+        parser.error("--restore cannot be combined with --boarding or --passengers: the snapshot does not hold "
+                     "their state")
+    result = run(args)
+    if args.json == "-":
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return
+    print(format_report(result))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Бенчмарк группового управления: назначение по этажу назначения против обычных вызовов вверх/вниз в утренний пик.
+
+Оба режима прогоняются на одном зерне: одинаковые дома, лифты и поток пассажиров (traffic.UpPeakArrivals -
+пассажиры приходят на первый этаж и едут на случайный этаж). Пассажиров ведёт passengers.PassengerModel, свободные
+лифты возвращаются на первый этаж. Сравниваются ожидание, поездка и полное время до этажа назначения по каждому
+пассажиру и число остановок на рейс.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.bench_destination [--floors 12] [--per-house 4] [--rate 200 400 600] [--json results.json]
+"""
+import argparse
+import json
+import platform
+import random
+import time
+
+from destination import MODES, GroupDispatcher
+from engine import Simulation
+from kinematics import CAR_TYPES
+from passengers import PassengerModel
+from traffic import UpPeakArrivals
+
+
+def run_case(mode, rate, floors_amount, houses, per_house, duration, seed, car_type):
+    simulation = Simulation(num_elevators=houses * per_house, floors_amount=floors_amount, seed=seed,
+                            call_probability=0, shape=(1, houses, per_house), car_type=car_type, parking="lobby")
+    passengers = simulation.add_sink(PassengerModel(simulation.loop.time, random.Random(f"{seed}:boarding"),
+                                                    spawn=False))
+    simulation.add_sink(GroupDispatcher(passengers, mode))
+    arrivals = simulation.add_sink(UpPeakArrivals(random.Random(f"{seed}:arrivals"), rate))
+    started = time.perf_counter()
+    try:
+        simulation.run(duration)
+    finally:
+        simulation.close()
+    summary = passengers.summary()
+    result = {
+        "mode": mode,
+        "rate": rate,
+        "floors": floors_amount,
+        "houses": houses,
+        "per_house": per_house,
+        "car_type": car_type,
+        "duration": duration,
+        "seed": seed,
+        "wall_time": time.perf_counter() - started,
+        "arrivals": arrivals.arrivals,
+        "delivered_per_hour": summary["delivered"] * 3600 / duration,
+        **{key: summary[key] for key in ("wait_mean", "wait_p95", "journey_mean", "journey_p95", "total_mean",
+                                         "total_p95", "stops_per_departure")},
+    }
+    return {key: round(value, 3) if isinstance(value, float) else value for key, value in result.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--rate", nargs="+", type=float, default=[200.0, 400.0, 600.0],
+                        help="пассажиров в час на дом")
+    parser.add_argument("--floors", type=int, default=12, help="этажность домов")
+    parser.add_argument("--houses", type=int, default=4, help="количество домов")
+    parser.add_argument("--per-house", type=int, default=4, help="лифтов в доме")
+    parser.add_argument("--car-type", default="midrise", choices=list(CAR_TYPES))
+    parser.add_argument("--duration", type=float, default=3600.0, help="секунд симуляции на прогон")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="сохранить результаты в JSON файл")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'режим':<13} {'пасс./ч':>7} {'дост./ч':>8} {'ожид. ср':>9} {'p95':>7} {'поездка ср':>10} {'p95':>7} "
+          f"{'всего ср':>9} {'p95':>7} {'ост./рейс':>9}")
+    for rate in args.rate:
+        for mode in args.modes:
+            result = run_case(mode, rate, args.floors, args.houses, args.per_house, args.duration, args.seed,
+                              args.car_type)
+            results.append(result)
+            print(f"{mode:<13} {rate:>7.0f} {result['delivered_per_hour']:>8.0f} {result['wait_mean'] or 0:>9.1f} "
+                  f"{result['wait_p95'] or 0:>7.1f} {result['journey_mean'] or 0:>10.1f} "
+                  f"{result['journey_p95'] or 0:>7.1f} {result['total_mean'] or 0:>9.1f} "
+                  f"{result['total_p95'] or 0:>7.1f} {result['stops_per_departure'] or 0:>9.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"python": platform.python_version(), "results": results}, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Бенчмарк стратегий обработки вызовов (FCFS, SCAN, LOOK, C-SCAN) на безголовой симуляции.
+
+Каждая комбинация стратегии и этажности прогоняется на одном и том же зерне, то есть на одинаковом парке и
+одинаковой последовательности случайных чисел. Время - виртуальное, час работы парка считается за секунды.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.bench_dispatch [--floors 3 5 9] [--duration 3600] [--json results.json]
+"""
+import argparse
+import json
+import platform
+import time
+
+from dispatch import STRATEGIES
+from engine import Simulation
+
+
+def run_case(strategy, floors_amount, num_elevators, duration, seed):
+    simulation = Simulation(num_elevators=num_elevators, floors_amount=floors_amount, strategy=strategy, seed=seed)
+    started = time.perf_counter()
+    try:
+        summary = simulation.run(duration)
+    finally:
+        simulation.close()
+    summary = {key: round(value, 3) if isinstance(value, float) else value for key, value in summary.items()}
+    return {
+        "strategy": strategy,
+        "floors": floors_amount,
+        "elevators": num_elevators,
+        "duration": duration,
+        "seed": seed,
+        "wall_time": round(time.perf_counter() - started, 3),
+        **summary,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument("--floors", nargs="+", type=int, default=[3, 5, 9], help="этажность домов")
+    parser.add_argument("--elevators", type=int, default=64, help="количество лифтов")
+    parser.add_argument("--duration", type=float, default=3600.0, help="секунд симуляции на прогон")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="сохранить результаты в JSON файл")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'стратегия':<8} {'этажей':>6} {'обсл./ч':>8} {'ожид. ср':>9} {'p95':>8} {'max':>8} "
+          f"{'поездка ср':>10} {'p95':>7} {'рейсов/выз.':>11}")
+    for floors_amount in args.floors:
+        for strategy in args.strategies:
+            result = run_case(strategy, floors_amount, args.elevators, args.duration, args.seed)
+            results.append(result)
+            print(f"{strategy:<8} {floors_amount:>6} {result['served_per_hour']:>8.0f} "
+                  f"{result['wait_mean'] or 0:>9.1f} {result['wait_p95'] or 0:>8.1f} {result['wait_max'] or 0:>8.1f} "
+                  f"{result['journey_mean'] or 0:>10.1f} {result['journey_p95'] or 0:>7.1f} "
+                  f"{result['trips_per_call'] or 0:>11.3f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"python": platform.python_version(), "results": results}, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Замер памяти на один лифт (вместе с его домом) для разных вариантов модели.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.bench_memory [--count 100000] [--json results.json]
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from model import Elevator, ElevatorFleet, House, SlottedElevator, SlottedHouse
+
+
+def build_objects(count, elevator_cls, house_cls, pending_calls):
+    elevators = []
+    houses = []
+    for id in range(1, count + 1):
+        elevator = elevator_cls(id // 8 + 1, id % 4 + 1, id, 500, 3)
+        for floor in range(pending_calls):
+            elevator.floors_queue.put(floor % 3 + 1)
+        elevators.append(elevator)
+        houses.append(house_cls(id // 8 + 1, id % 4 + 1, 3, 500))
+    return elevators, houses
+
+
+def build_fleet(count, pending_calls):
+    fleet = ElevatorFleet()
+    for id in range(1, count + 1):
+        index = fleet.append(id // 8 + 1, id % 4 + 1, 500, 3, live=500)
+        for floor in range(pending_calls):
+            fleet.put(index, floor % 3 + 1)
+    return fleet
+
+
+def measure(builder, count):
+    """
+    Считает прирост памяти (tracemalloc) при построении парка из count лифтов.
+
+    :return: float, байт на лифт
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = builder()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    gc.collect()
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000, help="количество лифтов")
+    parser.add_argument("--json", help="сохранить результаты в JSON файл")
+    args = parser.parse_args()
+
+    results = []
+    for pending in (0, 1):
+        variants = {
+            "Elevator + House": lambda: build_objects(args.count, Elevator, House, pending),
+            "SlottedElevator + SlottedHouse": lambda: build_objects(args.count, SlottedElevator, SlottedHouse,
+                                                                    pending),
+            "ElevatorFleet": lambda: build_fleet(args.count, pending),
+        }
+        for name, builder in variants.items():
+            per_elevator = measure(builder, args.count)
+            results.append({"variant": name, "pending_calls": pending, "bytes_per_elevator": round(per_elevator, 1)})
+            print(f"{name:<32} вызовов в очереди: {pending}  {per_elevator:8.1f} байт/лифт  "
+                  f"(миллион лифтов ~ {per_elevator * 1e6 / 2 ** 20:.0f} МБ)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"count": args.count, "results": results}, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
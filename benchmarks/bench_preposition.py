@@ -0,0 +1,128 @@
+"""
+Бенчмарк упреждающей расстановки лифтов по прогнозу спроса (forecast.py) в рабочий день офисного здания.
+
+Первые сутки записываются в историю (history.HistoryStore), прогноз учится на ней, и вторые сутки прогоняются на
+одном зерне с постоянной стоянкой (по умолчанию на первом этаже и там, где лифт высадил пассажиров) и с расстановкой
+по прогнозу (в остальное время лифты стоят на первом этаже). Пассажиров ведёт групповой диспетчер с обычными
+вызовами, поток - по профилю office:
+
+- утренний приход на первый этаж (traffic.UpPeakArrivals);
+- поездки с верхних этажей вниз и между этажами (traffic.InterfloorArrivals), rate * interfloor;
+- обед: с этажа столовой разъезжаются по этажам с 12 до 14 часов, rate * canteen_rate.
+
+Сравнивается время ответа на вызов (от вызова до открытия дверей) в утренний пик, в обед и за весь прогон.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.bench_preposition [--floors 12] [--rate 40] [--start-hour 6] [--hours 8]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+
+from destination import GroupDispatcher
+from engine import Simulation
+from forecast import DAY, DemandForecaster, Prepositioner
+from history import HistoryReader, HistoryStore
+from passengers import PassengerModel
+from stats import percentile
+from traffic import DemandProfile, InterfloorArrivals, UpPeakArrivals
+
+LUNCH = [0.0] * 11 + [0.3, 2.0, 2.0] + [0.0] * 10  # множители потока из столовой по часам
+
+
+def run_day(args, parking, history=None, forecaster=None):
+    simulation = Simulation(num_elevators=args.houses * args.per_house, floors_amount=args.floors, seed=args.seed,
+                            call_probability=0, shape=(1, args.houses, args.per_house), car_type=args.car_type,
+                            parking=parking)
+    passengers = simulation.add_sink(PassengerModel(simulation.loop.time, random.Random(f"{args.seed}:boarding"),
+                                                    spawn=False))
+    simulation.add_sink(GroupDispatcher(passengers, "conventional"))
+    office = DemandProfile("office", args.start_hour)
+    simulation.add_sink(UpPeakArrivals(random.Random(f"{args.seed}:arrivals"), args.rate, office, simulation.now))
+    simulation.add_sink(InterfloorArrivals(random.Random(f"{args.seed}:interfloor"), args.rate * args.interfloor,
+                                           office, simulation.now))
+    simulation.add_sink(InterfloorArrivals(random.Random(f"{args.seed}:canteen"), args.rate * args.canteen_rate,
+                                           DemandProfile(LUNCH, args.start_hour), simulation.now,
+                                           floor_weights={args.canteen: 1.0}, lobby_share=0.2))
+    if history is not None:
+        simulation.add_sink(HistoryStore(history, simulation.loop.time, simulation.tracker,
+                                         time_offset=args.start_hour * 3600))
+    positioner = None
+    if forecaster is not None:
+        forecaster.clock = simulation.loop.time
+        simulation.add_sink(forecaster)  # продолжает учиться на лету
+        positioner = simulation.add_sink(Prepositioner(forecaster))
+    calls = []  # (время вызова от полуночи, ожидание)
+    simulation.tracker.register_trip_observer(
+        lambda trip: trip.call_time is not None and calls.append((args.start_hour * 3600 + trip.call_time,
+                                                                  trip.pickup_time - trip.call_time)))
+    started = time.perf_counter()
+    try:
+        simulation.run(args.hours * 3600)
+    finally:
+        simulation.close()
+    return calls, passengers.summary(), positioner, time.perf_counter() - started
+
+
+def response(calls, start=0.0, end=DAY):
+    waits = sorted(wait for at, wait in calls if start <= at < end)
+    return {"calls": len(waits), "wait_mean": sum(waits) / len(waits) if waits else None,
+            "wait_p95": percentile(waits, 95)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--floors", type=int, default=12, help="этажность домов")
+    parser.add_argument("--houses", type=int, default=4, help="количество домов")
+    parser.add_argument("--per-house", type=int, default=4, help="лифтов в доме")
+    parser.add_argument("--car-type", default="midrise")
+    parser.add_argument("--rate", type=float, default=40.0, help="приходящих в час на дом при множителе 1")
+    parser.add_argument("--interfloor", type=float, default=0.5, help="поток с верхних этажей, доля от rate")
+    parser.add_argument("--canteen", type=int, default=9, help="этаж столовой")
+    parser.add_argument("--canteen-rate", type=float, default=0.5, help="поток из столовой, доля от rate")
+    parser.add_argument("--start-hour", type=float, default=6.0, help="час начала прогона")
+    parser.add_argument("--hours", type=float, default=8.0, help="часов симуляции в сутки")
+    parser.add_argument("--parking", nargs="+", default=["lobby", "stay"], help="постоянные политики стоянки")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="сохранить результаты в JSON файл")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.db")
+        run_day(args, "lobby", history=path)
+        forecaster = DemandForecaster(time_offset=DAY + args.start_hour * 3600)  # вторые сутки
+        reader = HistoryReader(path)
+        try:
+            learned = forecaster.learn(reader)
+        finally:
+            reader.close()
+
+    windows = {"morning": (7 * 3600, 9 * 3600), "lunch": (12 * 3600, 14 * 3600), "day": (0.0, DAY)}
+    results = {"python": platform.python_version(), "learned_calls": learned, "runs": []}
+    print(f"прогноз обучен на {learned} вызовах первых суток; ответ на вызов, ср. / p95, с")
+    print(f"{'стоянка':<10} {'утро 7-9':>13} {'обед 12-14':>13} {'весь день':>13} {'пасс. ожид.':>11} "
+          f"{'перестановок':>12} {'время, с':>9}")
+    cases = [(parking, None) for parking in args.parking] + [("forecast", forecaster)]
+    for name, model in cases:
+        calls, summary, positioner, wall_time = run_day(args, "lobby" if model is not None else name,
+                                                        forecaster=model)
+        row = {"parking": name, **{window: response(calls, *bounds) for window, bounds in windows.items()},
+               "passenger_wait_mean": summary["wait_mean"],
+               "moves": positioner.moves if positioner is not None else 0, "wall_time": wall_time}
+        results["runs"].append(row)
+        cells = " ".join(f"{row[window]['wait_mean'] or 0:>6.1f}/{row[window]['wait_p95'] or 0:<6.1f}"
+                         for window in windows)
+        print(f"{name:<10} {cells} {row['passenger_wait_mean'] or 0:>11.1f} {row['moves']:>12} {wall_time:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Бенчмарк отрисовки интерфейса без экрана (QT_QPA_PLATFORM=offscreen).
+
+Для парков из 64, 1000 и 10000 лифтов замеряет:
+* построение ElevatorView и MainWindow (с initiate_ui_values, панелью KPI и учётом поездок, как в программе);
+* стоимость одного события: update_checkboxes, update_elevator_scrollbar, update_door_status;
+* частоту полной перерисовки всего парка (сдвиг всех лифтов и repaint каждого окна).
+
+Запуск из корня проекта:
+
+    python -m benchmarks.bench_ui [--cars 64 1000 10000] [--json ui.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from engine import create_city  # noqa: E402
+from main import ElevatorView, MainWindow  # noqa: E402
+from model import ElevatorController  # noqa: E402
+
+
+def per_call(func, repeat):
+    """
+    Среднее время одного вызова func в микросекундах.
+    """
+    started = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def run_case(app, loop, cars, repeat, frames):
+    rng = random.Random(cars)
+    elevators, houses = create_city(cars, 3, rng)
+    controller = ElevatorController(elevators)
+    stopped = []
+    run_again = []
+
+    started = time.perf_counter()
+    views = [ElevatorView(houses, controller, elevator.elevator_id, floors=3, stopped=stopped, run_again=run_again)
+             for elevator in elevators]
+    views_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    window = MainWindow(loop, elevators, controller, views, houses, stopped, run_again)
+    window_time = time.perf_counter() - started
+    window.kpi_timer.stop()  # иначе панель KPI обновляется раз в секунду посреди замеров
+    init_values = per_call(lambda i: window.initiate_ui_values(), max(1, repeat // 100))
+
+    view = views[0]
+    house = houses[0]
+
+    def toggle_call(i):
+        house.left_calls[i % 3] = not house.left_calls[i % 3]
+        view.update_checkboxes()
+
+    checkboxes = per_call(toggle_call, repeat)
+    scrollbar = per_call(lambda i: view.update_elevator_scrollbar(i % 100 + 1), repeat)
+    doors = per_call(lambda i: view.update_door_status(i % 2 == 0), repeat)
+
+    # Полная перерисовка: все окна показаны, каждый кадр сдвигаем все лифты и перерисовываем окна
+    for item in views:
+        item.show()
+    app.processEvents()
+    started = time.perf_counter()
+    for frame in range(frames):
+        for item in views:
+            item.update_elevator_scrollbar(frame % 100 + 1)
+            item.repaint()
+        app.processEvents()
+    repaint_time = (time.perf_counter() - started) / frames
+
+    # закрытие окна идёт через MainWindow.shutdown, как в программе: оно же закрывает окна лифтов
+    loop.run_until_complete(window.shutdown())
+    for item in views:
+        item.deleteLater()
+    window.deleteLater()
+    app.processEvents()
+
+    return {
+        "cars": cars,
+        "construct_views_s": round(views_time, 4),
+        "construct_view_us": round(views_time / cars * 1e6, 1),
+        "construct_main_window_s": round(window_time, 4),
+        "initiate_ui_values_us": round(init_values, 1),
+        "update_checkboxes_us": round(checkboxes, 2),
+        "update_elevator_scrollbar_us": round(scrollbar, 2),
+        "update_door_status_us": round(doors, 2),
+        "fleet_repaint_s": round(repaint_time, 4),
+        "fleet_repaint_fps": round(1.0 / repaint_time, 2) if repaint_time else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cars", nargs="+", type=int, default=[64, 1000, 10000], help="размеры парка")
+    parser.add_argument("--repeat", type=int, default=2000, help="повторов для замера одного события")
+    parser.add_argument("--frames", type=int, default=5, help="кадров полной перерисовки")
+    parser.add_argument("--json", help="сохранить результаты в JSON файл")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv[:1])
+    loop = asyncio.new_event_loop()
+    results = []
+    for cars in args.cars:
+        if cars < 64:
+            parser.error("MainWindow показывает 64 лифта, парк должен быть не меньше")
+        result = run_case(app, loop, cars, args.repeat, args.frames)
+        results.append(result)
+        print(f"{cars:>6} лифтов: окна {result['construct_view_us']:.0f} мкс/шт, "
+              f"checkboxes {result['update_checkboxes_us']:.1f} мкс, "
+              f"scrollbar {result['update_elevator_scrollbar_us']:.1f} мкс, "
+              f"двери {result['update_door_status_us']:.1f} мкс, "
+              f"перерисовка парка {result['fleet_repaint_fps']} кадр/с")
+
+    loop.close()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"platform": os.environ["QT_QPA_PLATFORM"], "results": results}, file,
+                      ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
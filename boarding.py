@@ -0,0 +1,191 @@
+"""
+Модель посадки и высадки пассажиров: время стоянки с открытыми дверями зависит от того, сколько человек входит и
+выходит.
+
+Каждый вызов - группа людей на этаже (размер группы случайный, GROUP_SIZES). На остановке сначала выходят
+пассажиры, затем входят ожидающие, пока хватает места: вместимость кабины в людях - грузоподъёмность, делённая на
+person_weight. Двери держатся открытыми max(minimum_dwell, выход + вход) и ещё hold_time после последнего
+пассажира (фотодатчик), а закрывающиеся двери может остановить опоздавший - тогда они открываются снова
+(reopen_time и его посадка). Кто не поместился, остаётся ждать: этаж снова ставится в очередь лифта, а время
+вызова сохраняется (событие EVENT_REFUSED), так что их ожидание считается от исходного вызова.
+
+Модель подключается как приёмник симуляции (attach/detach/close) и сама считает ожидающих по событиям EVENT_CALL;
+посадка происходит по EVENT_PICKUP, пока поездка ещё открыта в TripTracker.
+"""
+import asyncio
+import random
+from array import array
+
+from model import EVENT_CALL, EVENT_PICKUP, EVENT_REFUSED
+
+# Размер группы на вызов и его вес (доля вызовов)
+GROUP_SIZES = (1, 2, 3, 4, 6, 8)
+GROUP_WEIGHTS = (45, 25, 12, 9, 6, 3)
+
+
+class BoardingModel:
+    """
+    Время стоянки по числу входящих и выходящих, повторное открытие дверей и отказ в посадке полной кабине.
+    """
+
+    journeys = False  # все пассажиры едут на первый этаж (True - у каждого свой этаж назначения)
+
+    def __init__(self, rng=None, boarding_time=1.2, alighting_time=1.0, minimum_dwell=2.0, hold_time=1.0,
+                 reopen_probability=0.1, reopen_time=2.5, max_reopens=2, person_weight=75,
+                 group_sizes=GROUP_SIZES, group_weights=GROUP_WEIGHTS):
+        """
+        :param rng: random.Random, свой источник случайных чисел (генератор вызовов симуляции не затрагивается)
+        :param boarding_time: float, секунд на вход одного пассажира
+        :param alighting_time: float, секунд на выход одного пассажира
+        :param minimum_dwell: float, наименьшее время с открытыми дверями, секунды
+        :param hold_time: float, задержка закрытия после последнего пассажира, секунды
+        :param reopen_probability: float, вероятность того, что закрывающиеся двери остановит опоздавший
+        :param reopen_time: float, секунд на повторное открытие и закрытие дверей
+        :param max_reopens: int, сколько раз подряд двери открываются снова (потом закрываются принудительно)
+        :param person_weight: int, расчётный вес пассажира, кг
+        :param group_sizes: размеры групп на вызов
+        :param group_weights: веса размеров групп
+        """
+        self.rng = rng or random.Random(0)
+        self.boarding_time = boarding_time
+        self.alighting_time = alighting_time
+        self.minimum_dwell = minimum_dwell
+        self.hold_time = hold_time
+        self.reopen_probability = reopen_probability
+        self.reopen_time = reopen_time
+        self.max_reopens = max_reopens
+        self.person_weight = person_weight
+        self.group_sizes = group_sizes
+        self.group_weights = group_weights
+        self.waiting = []  # по лифтам: array ожидающих по этажам
+        self.entering = array("I")  # по лифтам: сколько вошло на текущей остановке
+        self.elevators = []
+        self.stops = 0
+        self.boarded = 0
+        self.alighted = 0
+        self.refused = 0
+        self.reopens = 0
+        self.dwell = 0.0
+
+    def attach(self, elevators, controller):
+        self.elevators = elevators
+        self.waiting = [array("I", bytes(4 * elevator.floors_amount)) for elevator in elevators]
+        self.entering = array("I", bytes(4 * len(elevators)))
+        for elevator in elevators:
+            elevator.boarding = self
+            elevator.register_event_observer(self.on_event)
+
+    def detach(self, elevators, controller):
+        for elevator in elevators:
+            elevator.boarding = None
+            elevator.event_callbacks.remove(self.on_event)
+
+    def close(self):
+        pass
+
+    def on_event(self, elevator, kind, floor, value):
+        if kind == EVENT_CALL:
+            self.waiting[elevator.elevator_id - 1][floor - 1] += self.rng.choices(self.group_sizes,
+                                                                                  self.group_weights)[0]
+        elif kind == EVENT_PICKUP:
+            self.board(elevator, floor)
+
+    def board(self, elevator, floor):
+        """
+        Посадка ожидающих на этаже, пока хватает места; оставшиеся снова вызывают лифт.
+
+        :param elevator: Elevator
+        :param floor: int, этаж
+        :return: None
+        """
+        waiting = self.waiting[elevator.elevator_id - 1]
+        boarding = min(waiting[floor - 1], self.room(elevator))
+        waiting[floor - 1] -= boarding
+        elevator.passengers += boarding
+        self.entering[elevator.elevator_id - 1] = boarding
+        if waiting[floor - 1]:
+            self.refused += waiting[floor - 1]
+            elevator.floors_queue.put(floor)
+            elevator.notify_event(EVENT_REFUSED, floor, waiting[floor - 1])
+
+    def room(self, elevator):
+        """
+        :param elevator: Elevator
+        :return: int, сколько ещё человек помещается в кабину
+        """
+        return max(0, elevator.capacity // self.person_weight - elevator.passengers)
+
+    async def hold(self, elevator, board, alight):
+        """
+        Стоянка с открытыми дверями (Elevator.hold_doors).
+
+        :param elevator: Elevator
+        :param board: bool, садятся ожидающие на этаже
+        :param alight: bool, выходят все пассажиры (поездка заканчивается на первом этаже)
+        :return: None
+        """
+        boarding = self.entering[elevator.elevator_id - 1] if board else 0
+        self.entering[elevator.elevator_id - 1] = 0
+        alighting = self.alight(elevator, boarding) if alight else 0
+        dwell = max(self.minimum_dwell, alighting * self.alighting_time + boarding * self.boarding_time)
+        dwell += self.hold_time + elevator.door_time
+        reopens = 0
+        while board and reopens < self.max_reopens and self.room(elevator) and \
+                self.rng.random() < self.reopen_probability:
+            reopens += 1
+            self.late_arrival(elevator)
+            boarding += 1
+            dwell += self.reopen_time + self.boarding_time
+        self.stops += 1
+        self.boarded += boarding
+        self.alighted += alighting
+        self.reopens += reopens
+        self.dwell += dwell
+        await asyncio.sleep(dwell)
+        if board and alight:  # вызов на первом этаже: поездка там же и заканчивается
+            self.alighted += elevator.passengers
+            elevator.passengers = 0
+
+    def alight(self, elevator, boarding):
+        """
+        Выходят все, кроме вошедших на этой остановке.
+
+        :param elevator: Elevator
+        :param boarding: int, сколько вошло на этой остановке
+        :return: int, сколько вышло
+        """
+        alighting = elevator.passengers - boarding
+        elevator.passengers = boarding
+        return alighting
+
+    def late_arrival(self, elevator):
+        """
+        Опоздавший останавливает закрывающиеся двери и входит.
+
+        :param elevator: Elevator
+        :return: None
+        """
+        elevator.passengers += 1
+
+    def destinations(self, elevator):
+        """
+        Этажи высадки пассажиров кабины в порядке движения.
+
+        :param elevator: Elevator
+        :return: list of int
+        """
+        return [1] if elevator.passengers else []
+
+    def summary(self):
+        """
+        :return: dict, итоги посадки для отчётов
+        """
+        return {
+            "stops": self.stops,
+            "boarded": self.boarded,
+            "alighted": self.alighted,
+            "refused": self.refused,
+            "reopens": self.reopens,
+            "dwell_mean": self.dwell / self.stops if self.stops else None,
+            "waiting": sum(sum(floors) for floors in self.waiting),
+        }
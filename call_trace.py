@@ -0,0 +1,100 @@
+"""
+Запись и воспроизведение трасс симуляции.
+
+Трасса - бинарный файл, в который по мере работы дописываются записи фиксированного размера: каждый сгенерированный
+вызов (время, лифт, этаж, сторона) и каждое действие оператора. В заголовке хранится зерно генератора и форма
+парка, поэтому по трассе можно заново построить тот же город и прогнать его с любой стратегией.
+"""
+import struct
+from collections import namedtuple
+
+from model import ACTION_DOOR_STATUS, ACTION_FORCE_TARGET, ACTION_LIFT_STATUS, EVENT_CALL
+
+MAGIC = b"LIFTTRC1"
+HEADER = struct.Struct("<8sqIH")  # сигнатура, зерно, количество лифтов, этажей
+RECORD = struct.Struct("<dBIHB")  # время, вид записи, лифт, этаж, значение
+
+# Виды записей
+TRACE_CALL = 1  # вызов, value - 1 если слева
+TRACE_LIFT_STATUS = 2  # оператор остановил/запустил лифт, value - новое состояние
+TRACE_DOOR_STATUS = 3  # оператор открыл/закрыл двери, value - новое состояние
+TRACE_FORCE_TARGET = 4  # оператор направил лифт на этаж floor вне очереди
+
+_ACTION_KINDS = {ACTION_LIFT_STATUS: TRACE_LIFT_STATUS, ACTION_DOOR_STATUS: TRACE_DOOR_STATUS}
+
+TraceHeader = namedtuple("TraceHeader", ["seed", "num_elevators", "floors_amount"])
+TraceRecord = namedtuple("TraceRecord", ["time", "kind", "elevator_id", "floor", "value"])
+
+
+class TraceRecorder:
+    """
+    Записывает трассу прогона. Подключается наблюдателем к лифтам и контроллеру через attach().
+    """
+
+    def __init__(self, path, seed, num_elevators, floors_amount, clock):
+        """
+        :param path: str или Path, файл трассы (перезаписывается)
+        :param seed: int, зерно генератора прогона
+        :param num_elevators: int, количество лифтов
+        :param floors_amount: int, количество этажей
+        :param clock: функция без аргументов, текущее время цикла
+        """
+        self.clock = clock
+        self.start = clock()
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, seed, num_elevators, floors_amount))
+        self.records = 0
+
+    def attach(self, elevators, controller):
+        for elevator in elevators:
+            elevator.register_event_observer(self.on_event)
+        controller.register_action_observer(self.on_action)
+
+    def detach(self, elevators, controller):
+        for elevator in elevators:
+            elevator.event_callbacks.remove(self.on_event)
+        controller.action_callbacks.remove(self.on_action)
+
+    def write(self, kind, elevator_id, floor, value):
+        self.file.write(RECORD.pack(self.clock() - self.start, kind, elevator_id, floor, value))
+        self.records += 1
+
+    def on_event(self, elevator, kind, floor, value):
+        if kind == EVENT_CALL:
+            self.write(TRACE_CALL, elevator.elevator_id, floor, value)
+
+    def on_action(self, elevator_id, action, value):
+        if action == ACTION_FORCE_TARGET:
+            self.write(TRACE_FORCE_TARGET, elevator_id, value, 0)
+            return
+        kind = _ACTION_KINDS.get(action)
+        if kind is not None:
+            self.write(kind, elevator_id, 0, int(value))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+def read_trace(path):
+    """
+    Читает трассу целиком.
+
+    :param path: str или Path, файл трассы
+    :return: (TraceHeader, list of TraceRecord)
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path}: file is too short to be a trace")
+    magic, seed, num_elevators, floors_amount = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a trace file")
+    body = memoryview(data)[HEADER.size:]
+    # недописанная последняя запись (например, после аварийного завершения) отбрасывается
+    body = body[:len(body) - len(body) % RECORD.size]
+    records = [TraceRecord(*fields) for fields in RECORD.iter_unpack(body)]
+    return TraceHeader(seed, num_elevators, floors_amount), records
@@ -0,0 +1,440 @@
+"""
+Снимки состояния парка лифтов и быстрое восстановление из них.
+
+Снимок - компактный бинарный файл: заголовок (с ним стратегия очереди и тип лифтов парка), затем состояние
+лифтов и домов по колонкам (array по полю на весь парк), вызовы домов битовыми масками, содержимое очередей
+вызовов одним плоским массивом этажей, незавершённые вызовы с их возрастом (чтобы после восстановления ожидание
+считалось от настоящего момента вызова) и состояние генератора случайных чисел. Колонки пишутся и читаются
+целиком (array.tobytes/frombytes), без разбора по лифтам.
+
+Снимок снимается в цикле событий за один проход по лифтам и не переключает задачи, поэтому он согласован. Запись
+файла - в фоновом потоке (Checkpointer), с заменой файла целиком (os.replace), так что на диске всегда лежит
+последний полный снимок. Поездка, которая шла в момент снимка, после восстановления выполняется заново с этажа,
+на котором стоял лифт.
+
+Состояние моделей посадки и пассажиров (boarding.py, passengers.py) и группового диспетчера (destination.py) в
+снимок не входит, поэтому восстановление с ними не поддерживается (Simulation.start отказывает).
+"""
+import asyncio
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+from dispatch import STRATEGIES, SweepQueue, strategy_name
+from kinematics import CAR_TYPES
+
+MAGIC = b"LIFTCKP1"
+# сигнатура, лифтов, этажей, секунды симуляции, сохранён ли генератор, стратегия (номер в STRATEGIES),
+# тип лифта (0 - floor_time секунд на этаж, номер в CAR_TYPES с 1, CUSTOM_CODE - свой KinematicProfile)
+HEADER = struct.Struct("<8sIHdBBBx")
+RNG_STATE = struct.Struct("<625Id")  # состояние Mersenne Twister и gauss_next (NaN - нет)
+
+# Колонки снимка: имя -> код array
+COLUMNS = {
+    "street_id": "H",
+    "house_id": "H",
+    "capacity": "H",
+    "live": "H",
+    "passengers": "H",
+    "current_floor": "H",
+    "target_floor": "H",  # 0 - лифт свободен
+    "flags": "B",  # LIFT_ON, DOOR_OPEN
+    "floor_time": "f",
+    "door_dwell": "f",
+    "parking_floor": "H",  # 0 - без стоянки
+    "sweep_position": "H",  # состояние развёртки SCAN/LOOK/C-SCAN
+    "sweep_direction": "b",
+    "sweep_forced": "H",
+    "queue_length": "I",
+    "pending_calls": "I",
+}
+LIFT_ON = 1
+DOOR_OPEN = 2
+
+CUSTOM_CAR = "custom"  # car_type снимка парка со своим KinematicProfile: его характеристики в снимок не входят
+CUSTOM_CODE = 255
+STRATEGY_NAMES = list(STRATEGIES)
+CAR_NAMES = [None, *CAR_TYPES]
+
+Snapshot = namedtuple("Snapshot", ["time", "num_elevators", "floors_amount", "columns", "left_calls", "right_calls",
+                                   "queue", "pending_floors", "pending_ages", "rng_state", "strategy", "car_type"])
+
+
+def _little(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _mask_size(floors_amount):
+    return (floors_amount + 7) // 8
+
+
+def _mask(calls):
+    mask = 0
+    for floor, call in enumerate(calls):
+        if call:
+            mask |= 1 << floor
+    return mask
+
+
+def car_type(elevator):
+    """
+    :param elevator: Elevator
+    :return: str или None, имя из CAR_TYPES, CUSTOM_CAR или None (floor_time секунд на этаж)
+    """
+    table = elevator.travel_table
+    if table is None:
+        return None
+    for name, profile in CAR_TYPES.items():
+        if table.profile == profile:
+            return name
+    return CUSTOM_CAR
+
+
+def fleet_kind(elevators):
+    """
+    Стратегия очереди и тип лифта парка - в снимке они общие на весь парк.
+
+    :param elevators: list of Elevator
+    :return: tuple (str, str или None)
+    """
+    kinds = {(strategy_name(elevator.floors_queue), car_type(elevator)) for elevator in elevators}
+    if len(kinds) != 1:
+        raise ValueError("elevators differ in strategy or car type, a snapshot holds one for the whole fleet")
+    return kinds.pop()
+
+
+def take(elevators, houses, now, tracker=None, rng=None):
+    """
+    Снимает состояние парка.
+
+    :param elevators: list of Elevator
+    :param houses: list of House, в том же порядке
+    :param now: float, секунды симуляции
+    :param tracker: stats.TripTracker или None - незавершённые вызовы для учёта ожидания
+    :param rng: random.Random или None - генератор вызовов
+    :return: Snapshot
+    """
+    floors_amount = max(elevator.floors_amount for elevator in elevators)
+    strategy, car = fleet_kind(elevators)
+    columns = {name: array(code) for name, code in COLUMNS.items()}
+    size = _mask_size(floors_amount)
+    left = bytearray()
+    right = bytearray()
+    floors = array("H")
+    pending_floors = array("H")
+    pending_ages = array("f")
+    clock = tracker.clock() if tracker is not None else 0.0
+    for index, (elevator, house) in enumerate(zip(elevators, houses)):
+        values = elevator.floors_queue
+        if isinstance(values, SweepQueue):
+            sweep = (values.position, values.direction, values._forced)
+        else:
+            sweep = (0, 0, 0)
+        if hasattr(values, "queue"):  # queue.Queue
+            values = values.queue
+        queued = list(values)
+        pending = []
+        target = elevator.target_floor or 0
+        if tracker is not None:
+            # target_floor остаётся заданным и после высадки, пока не опустеет очередь: прервана только поездка,
+            # открытая в tracker
+            trip = tracker.current[index]
+            target = trip[0] if trip is not None else 0
+            if trip is not None and trip[1] is not None:  # прерванная поездка повторится - её вызов тоже ждёт
+                pending.append((trip[0], clock - trip[1]))
+            for floor, times in tracker.call_times[index].items():
+                pending.extend((floor, clock - call_time) for call_time in times)
+        for name, value in (("street_id", elevator.street_id), ("house_id", elevator.house_id),
+                            ("capacity", elevator.capacity), ("live", house.live),
+                            ("passengers", elevator.passengers), ("current_floor", elevator.current_floor),
+                            ("target_floor", target),
+                            ("flags", (LIFT_ON if elevator.lift_status else 0) |
+                             (DOOR_OPEN if elevator.door_status else 0)),
+                            ("floor_time", elevator.floor_time), ("door_dwell", elevator.door_dwell),
+                            ("parking_floor", elevator.parking_floor or 0), ("sweep_position", sweep[0]),
+                            ("sweep_direction", sweep[1]), ("sweep_forced", sweep[2]),
+                            ("queue_length", len(queued)), ("pending_calls", len(pending))):
+            columns[name].append(value)
+        left += _mask(house.left_calls).to_bytes(size, "little")
+        right += _mask(house.right_calls).to_bytes(size, "little")
+        floors.extend(queued)
+        for floor, age in pending:
+            pending_floors.append(floor)
+            pending_ages.append(age)
+    rng_state = rng.getstate() if rng is not None else None
+    return Snapshot(now, len(elevators), floors_amount, columns, bytes(left), bytes(right), floors, pending_floors,
+                    pending_ages, rng_state, strategy, car)
+
+
+def encode(snapshot):
+    """
+    :param snapshot: Snapshot
+    :return: bytes
+    """
+    car = CUSTOM_CODE if snapshot.car_type == CUSTOM_CAR else CAR_NAMES.index(snapshot.car_type)
+    parts = [HEADER.pack(MAGIC, snapshot.num_elevators, snapshot.floors_amount, snapshot.time,
+                         snapshot.rng_state is not None, STRATEGY_NAMES.index(snapshot.strategy), car)]
+    parts.extend(_little(snapshot.columns[name]).tobytes() for name in COLUMNS)
+    parts += [snapshot.left_calls, snapshot.right_calls, _little(snapshot.queue).tobytes(),
+              _little(snapshot.pending_floors).tobytes(), _little(snapshot.pending_ages).tobytes()]
+    if snapshot.rng_state is not None:
+        version, state, gauss = snapshot.rng_state
+        parts.append(RNG_STATE.pack(*state, float("nan") if gauss is None else gauss))
+    return b"".join(parts)
+
+
+def decode(data):
+    """
+    :param data: bytes, содержимое файла снимка
+    :return: Snapshot
+    """
+    magic, num_elevators, floors_amount, now, has_rng, strategy, car = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("not a fleet snapshot")
+    if strategy >= len(STRATEGY_NAMES) or car >= len(CAR_NAMES) and car != CUSTOM_CODE:
+        raise ValueError(f"snapshot has unknown strategy {strategy} or car type {car}")
+    offset = HEADER.size
+
+    def column(code, count):
+        nonlocal offset
+        values = array(code)
+        values.frombytes(data[offset:offset + values.itemsize * count])
+        offset += values.itemsize * count
+        return _little(values)
+
+    columns = {name: column(code, num_elevators) for name, code in COLUMNS.items()}
+    size = _mask_size(floors_amount) * num_elevators
+    left = data[offset:offset + size]
+    right = data[offset + size:offset + 2 * size]
+    offset += 2 * size
+    floors = column("H", sum(columns["queue_length"]))
+    pending = sum(columns["pending_calls"])
+    pending_floors = column("H", pending)
+    pending_ages = column("f", pending)
+    rng_state = None
+    if has_rng:
+        *state, gauss = RNG_STATE.unpack_from(data, offset)
+        rng_state = (3, tuple(state), None if gauss != gauss else gauss)
+    return Snapshot(now, num_elevators, floors_amount, columns, left, right, floors, pending_floors, pending_ages,
+                    rng_state, STRATEGY_NAMES[strategy], CUSTOM_CAR if car == CUSTOM_CODE else CAR_NAMES[car])
+
+
+def write(path, snapshot):
+    """
+    Записывает снимок, заменяя файл целиком: при сбое на диске остаётся предыдущий снимок.
+
+    :return: int, размер файла в байтах
+    """
+    data = encode(snapshot)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+    return len(data)
+
+
+def read(path):
+    """
+    :return: Snapshot
+    """
+    with open(path, "rb") as file:
+        return decode(file.read())
+
+
+def apply(snapshot, elevators, houses, tracker=None, rng=None):
+    """
+    Переносит снимок на только что созданный парк той же формы, стратегии и типа лифтов: лифты, очереди, вызовы
+    домов, незавершённые вызовы и генератор. Задачи лифтов запускает обычный старт симуляции.
+
+    :param snapshot: Snapshot
+    :param elevators: list of Elevator
+    :param houses: list of House
+    :param tracker: stats.TripTracker или None
+    :param rng: random.Random или None
+    :return: None
+    """
+    if len(elevators) != snapshot.num_elevators:
+        raise ValueError(f"snapshot has {snapshot.num_elevators} elevators, fleet has {len(elevators)}")
+    strategy, car = fleet_kind(elevators)
+    if strategy != snapshot.strategy:
+        raise ValueError(f"snapshot has strategy {snapshot.strategy}, fleet has {strategy}")
+    if car != snapshot.car_type:
+        raise ValueError(f"snapshot has car type {snapshot.car_type}, fleet has {car}")
+    columns = snapshot.columns
+    size = _mask_size(snapshot.floors_amount)
+    queued = iter(snapshot.queue)
+    for index, (elevator, house) in enumerate(zip(elevators, houses)):
+        if elevator.floors_amount != house.floors_amount or elevator.floors_amount > snapshot.floors_amount:
+            raise ValueError(f"elevator {elevator.elevator_id}: floors do not match the snapshot")
+        elevator.street_id = house.street_id = columns["street_id"][index]
+        elevator.house_id = house.house_id = columns["house_id"][index]
+        elevator.capacity = columns["capacity"][index]
+        house.live = columns["live"][index]
+        elevator.passengers = columns["passengers"][index]
+        elevator.current_floor = columns["current_floor"][index]
+        elevator.lift_status = bool(columns["flags"][index] & LIFT_ON)
+        elevator.door_status = bool(columns["flags"][index] & DOOR_OPEN)
+        elevator.floor_time = columns["floor_time"][index]
+        elevator.door_dwell = columns["door_dwell"][index]
+        elevator.parking_floor = columns["parking_floor"][index] or None
+        elevator.target_floor = None
+
+        floors_queue = elevator.floors_queue
+        for _ in range(columns["queue_length"][index]):
+            floors_queue.put(next(queued))
+        if isinstance(floors_queue, SweepQueue):
+            floors_queue.position = columns["sweep_position"][index]
+            floors_queue.direction = columns["sweep_direction"][index]
+            floors_queue._forced = columns["sweep_forced"][index]
+        if columns["target_floor"][index]:  # прерванная поездка - первой в очереди
+            elevator.force_target(columns["target_floor"][index])
+
+        mask_offset = index * size
+        left = int.from_bytes(snapshot.left_calls[mask_offset:mask_offset + size], "little")
+        right = int.from_bytes(snapshot.right_calls[mask_offset:mask_offset + size], "little")
+        house.left_calls = [bool(left >> floor & 1) for floor in range(house.floors_amount)]
+        house.right_calls = [bool(right >> floor & 1) for floor in range(house.floors_amount)]
+    if tracker is not None:
+        apply_calls(snapshot, tracker)
+    if rng is not None and snapshot.rng_state is not None:
+        rng.setstate(snapshot.rng_state)
+
+
+def apply_calls(snapshot, tracker):
+    """
+    Переносит незавершённые вызовы снимка в tracker: ожидание считается от настоящего момента вызова. Отдельно от
+    apply - для парка, tracker которого создаётся позже лифтов (окно программы).
+
+    :param snapshot: Snapshot
+    :param tracker: stats.TripTracker
+    :return: None
+    """
+    clock = tracker.clock()
+    pending = iter(zip(snapshot.pending_floors, snapshot.pending_ages))
+    for index, count in enumerate(snapshot.columns["pending_calls"]):
+        for _ in range(count):
+            floor, age = next(pending)
+            tracker.call_times[index].setdefault(floor, []).append(clock - age)
+    for calls in tracker.call_times:  # вызовы одного этажа - в порядке поступления
+        for times in calls.values():
+            times.sort()
+
+
+_STOP = object()  # признак конца очереди для фонового потока
+
+
+class Checkpointer:
+    """
+    Приёмник (attach/detach/close), который раз в interval секунд снимает состояние парка в цикле событий и
+    отдаёт запись файла фоновому потоку. Если поток не успевает, промежуточные снимки пропускаются - пишется
+    последний.
+    """
+
+    def __init__(self, path, houses, clock, interval=60.0, tracker=None, rng=None):
+        """
+        :param path: str или Path, файл снимка (заменяется при каждой записи)
+        :param houses: list of House, дома лифтов в том же порядке
+        :param clock: функция без аргументов, секунды симуляции (Simulation.now)
+        :param interval: float, период снимков в секундах времени цикла
+        :param tracker: stats.TripTracker или None
+        :param rng: random.Random или None
+        """
+        self.path = path
+        self.houses = houses
+        self.clock = clock
+        self.interval = interval
+        self.tracker = tracker
+        self.rng = rng
+        self.elevators = []
+        self.task = None
+        self.snapshots = 0
+        self.last_size = 0
+        self.capture_time = 0.0  # сколько занял последний снимок в цикле событий, секунды
+        self.error = None
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._writer, name="checkpoint-writer", daemon=True)
+        self.thread.start()
+
+    def attach(self, elevators, controller):
+        self.elevators = elevators
+        self.task = asyncio.ensure_future(self._periodic())
+
+    def detach(self, elevators, controller):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _periodic(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.checkpoint()
+
+    def snapshot(self):
+        started = time.perf_counter()
+        snapshot = take(self.elevators, self.houses, self.clock(), self.tracker, self.rng)
+        self.capture_time = time.perf_counter() - started
+        return snapshot
+
+    def checkpoint(self):
+        """
+        Снимает состояние и ставит его в очередь записи.
+
+        :return: None
+        """
+        self.queue.put(self.snapshot())
+
+    def save(self):
+        """
+        Снимает и записывает состояние сразу, в текущем потоке (например, последний снимок при выходе).
+
+        :return: int, размер файла в байтах
+        """
+        self.last_size = write(self.path, self.snapshot())
+        self.snapshots += 1
+        return self.last_size
+
+    def _writer(self):
+        stopping = False
+        while not stopping:
+            snapshot = self.queue.get()
+            while True:  # берём последний из накопившихся
+                if snapshot is _STOP:
+                    stopping = True
+                    snapshot = None
+                    break
+                try:
+                    newer = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if newer is _STOP:
+                    stopping = True
+                    break
+                snapshot = newer
+            if snapshot is None:
+                continue
+            try:
+                self.last_size = write(self.path, snapshot)
+                self.snapshots += 1
+            except OSError as error:  # не роняем поток: запоминаем ошибку, следующий снимок попробует снова
+                self.error = error
+
+    def close(self, timeout=None):
+        """
+        Дожидается записи поставленного в очередь снимка и останавливает фоновый поток.
+
+        :param timeout: float, сколько ждать в секундах (None - без ограничения)
+        :return: None
+        """
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join(timeout)
@@ -0,0 +1,148 @@
+"""
+Групповое управление лифтами одного дома: назначение по этажу назначения (destination dispatch) и обычное
+управление вызовами вверх/вниз для сравнения.
+
+Лифты с одинаковыми street_id и house_id образуют группу. Пассажир набирает этаж назначения на панели
+(ElevatorController.register_passenger), а дальше всё зависит от режима:
+
+- "destination": панель сразу называет лифт. Назначение инкрементное - уже назначенные пассажиры не
+  переназначаются, новый получает лифт с наименьшей добавочной стоимостью: когда лифт сможет подойти к этажу плюс
+  задержка от новой остановки для всех, кто уже назначен в этот лифт (если этаж назначения уже есть среди его
+  остановок, задержки почти нет). Стоимость для лифта считается по счётчикам назначенных этажей и остановкам его
+  пассажиров, без перебора ожидающих, поэтому назначение - O(лифтов группы) на пассажира при любой интенсивности
+  потока. Так люди с одинаковыми этажами назначения собираются в один лифт, и у каждого лифта меньше остановок за
+  рейс.
+- "conventional": на этаже одна общая очередь; вызов получает лифт, который раньше всех подойдёт к этажу, ещё один -
+  если ожидающих больше, чем мест в уже вызванных лифтах. Подошедший лифт забирает людей по порядку, а этажи
+  назначения становятся известны только в кабине.
+
+Пассажиров, их посадку и высадку ведёт passengers.PassengerModel (с spawn=False); диспетчер добавляется в приёмники
+симуляции после неё.
+"""
+from collections import Counter
+
+from model import EVENT_PICKUP
+
+MODES = ("conventional", "destination")
+
+
+def ride_time(elevator, start, end):
+    """
+    Время проезда лифта между этажами без остановок.
+
+    :return: float, секунды
+    """
+    if elevator.travel_table is not None:
+        return elevator.travel_table.time(start, end)
+    return abs(end - start) * elevator.floor_time
+
+
+class GroupDispatcher:
+    """
+    Групповой диспетчер домов; подключается как приёмник и включает ElevatorController.register_passenger.
+    """
+
+    def __init__(self, passengers, mode="destination", stop_time=10.0):
+        """
+        :param passengers: passengers.PassengerModel, подключённая к тем же лифтам
+        :param mode: str, "destination" или "conventional"
+        :param stop_time: float, сколько секунд добавляет остановка (торможение, разгон и двери), для оценок
+        """
+        if mode not in MODES:
+            raise ValueError(f"unknown dispatch mode: {mode}, available: {', '.join(MODES)}")
+        self.passengers = passengers
+        self.mode = mode
+        self.stop_time = stop_time
+        self.groups = {}  # (улица, дом) -> лифты группы
+        self.assigned = []  # по лифтам: Counter этажей назначения пассажиров, ждущих этот лифт
+        self.called = []  # по лифтам: этажи, на которые лифт вызван диспетчером и ещё не подошёл
+        self.controller = None
+        self.assignments = 0
+
+    def attach(self, elevators, controller):
+        self.controller = controller
+        self.groups = {}
+        for elevator in elevators:
+            self.groups.setdefault((elevator.street_id, elevator.house_id), []).append(elevator)
+            elevator.register_event_observer(self.on_event)
+        self.assigned = [Counter() for _ in elevators]
+        self.called = [set() for _ in elevators]
+        if self.mode == "conventional":  # общая очередь на этаже для всех лифтов дома
+            for group in self.groups.values():
+                self.passengers.line(group[0], 1)  # создаёт очереди первого лифта группы
+                lines = self.passengers.queues[group[0].elevator_id - 1]
+                for elevator in group[1:]:
+                    self.passengers.queues[elevator.elevator_id - 1] = lines
+        controller.dispatcher = self
+
+    def detach(self, elevators, controller):
+        for elevator in elevators:
+            elevator.event_callbacks.remove(self.on_event)
+        controller.dispatcher = None
+
+    def close(self):
+        pass
+
+    def on_event(self, elevator, kind, floor, value):
+        index = elevator.elevator_id - 1
+        if kind == EVENT_PICKUP:
+            if not self.passengers.waiting[index][floor - 1]:  # иначе модель посадки снова поставила этаж в очередь
+                self.called[index].discard(floor)
+            if self.mode == "destination":  # назначенные остались ждать только те, кто не поместился
+                pool, lines = self.passengers.pool, self.passengers.queues[index] or ()
+                self.assigned[index] = Counter(pool.destination[handle] for line in lines for handle in line)
+
+    def availability(self, elevator, floor):
+        """
+        Через сколько секунд лифт сможет открыть двери на этаже floor: довезти своих пассажиров и доехать.
+
+        :return: float
+        """
+        position, time = elevator.current_floor, 0.0
+        for stop in self.passengers.destinations(elevator):
+            time += ride_time(elevator, position, stop) + self.stop_time
+            position = stop
+        return time + ride_time(elevator, position, floor)
+
+    def call(self, elevator, floor):
+        self.called[elevator.elevator_id - 1].add(floor)
+        elevator.put_call(floor)
+
+    def assign(self, street_id, house_id, origin, destination):
+        """
+        Пассажир на этаже origin набрал этаж destination.
+
+        :return: int или None, id лифта, названного панелью (в обычном режиме лифт не называется)
+        """
+        group = [elevator for elevator in self.groups.get((street_id, house_id), ()) if elevator.lift_status]
+        if not group:
+            raise ValueError(f"no running elevators in house {street_id}/{house_id}")
+        if not 1 <= origin <= group[0].floors_amount or not 1 <= destination <= group[0].floors_amount:
+            raise ValueError(f"no floor {origin if destination == origin else destination}")
+        self.assignments += 1
+        if self.mode == "conventional":
+            self.passengers.arrive(group[0], origin, destination)
+            waiting = len(self.passengers.line(group[0], origin))
+            called = [elevator for elevator in group if origin in self.called[elevator.elevator_id - 1]]
+            if not called or waiting > sum(self.passengers.room(elevator) for elevator in called):
+                free = [elevator for elevator in group if origin not in self.called[elevator.elevator_id - 1]]
+                if free:
+                    self.call(min(free, key=lambda elevator: self.availability(elevator, origin)), origin)
+            return None
+        best, best_cost = None, None
+        for elevator in group:
+            assigned = self.assigned[elevator.elevator_id - 1]
+            count = sum(assigned.values())
+            cost = self.availability(elevator, origin)
+            if destination not in assigned:  # новая остановка задерживает всех назначенных в этот лифт
+                cost += self.stop_time * (count + 1)
+            if count >= elevator.capacity // self.passengers.person_weight:  # не поместится: ждать следующего рейса
+                cost += 2 * self.availability(elevator, origin) + self.stop_time * len(assigned)
+            if best_cost is None or cost < best_cost:
+                best, best_cost = elevator, cost
+        index = best.elevator_id - 1
+        self.assigned[index][destination] += 1
+        self.passengers.arrive(best, origin, destination)
+        if origin not in self.called[index]:
+            self.call(best, origin)
+        return best.elevator_id
@@ -0,0 +1,276 @@
+"""
+Стратегии обработки очереди вызовов лифта.
+
+Каждая стратегия - это очередь с интерфейсом queue.Queue (put/get/empty), которая отличается только тем, какой
+вызов отдаёт следующим. Elevator.simulate_queue ничего не знает о стратегии и просто берёт вызовы через get().
+"""
+from queue import Queue
+
+
+class CallQueue(Queue):
+    """
+    queue.Queue очереди FCFS лифта (Elevator) с вызовом вне очереди put_first, как у FloorsQueue и SweepQueue.
+    Переопределяет только _put - ту часть Queue, что предназначена для наследников.
+    """
+
+    def _put(self, item):
+        if type(item) is _First:
+            self.queue.appendleft(item.floor)
+        else:
+            self.queue.append(item)
+
+    def put_first(self, floor):
+        """
+        Добавляет вызов в начало очереди (вне очереди).
+
+        :param floor: int, этаж
+        :return: None
+        """
+        self.put(_First(floor))
+
+
+class _First:
+    __slots__ = ("floor",)
+
+    def __init__(self, floor):
+        self.floor = floor
+
+
+class FloorsQueue:
+    """
+    Лёгкая FIFO очередь вызовов с тем же интерфейсом put/get/empty, что и у queue.Queue, но без блокировок.
+    Список создаётся только при первом вызове, поэтому простаивающий лифт почти не занимает памяти.
+    """
+
+    __slots__ = ("_items", "_head")
+
+    def __init__(self):
+        self._items = None
+        self._head = 0
+
+    def put(self, floor):
+        """
+        Добавляет вызов в конец очереди.
+
+        :param floor: int, этаж
+        :return: None
+        """
+        if self._items is None:
+            self._items = [floor]
+        else:
+            self._items.append(floor)
+
+    def put_first(self, floor):
+        """
+        Добавляет вызов в начало очереди (вне очереди).
+
+        :param floor: int, этаж
+        :return: None
+        """
+        if self._items is None:
+            self._items = [floor]
+        elif self._head:
+            self._head -= 1
+            self._items[self._head] = floor
+        else:
+            self._items.insert(0, floor)
+
+    def get(self):
+        """
+        Достает первый вызов из очереди.
+
+        :return: int, этаж
+        """
+        if self._items is None:
+            raise IndexError("get from an empty FloorsQueue")
+        floor = self._items[self._head]
+        self._head += 1
+        if self._head == len(self._items):  # очередь опустела - освобождаем список
+            self._items = None
+            self._head = 0
+        elif self._head > 32 and self._head * 2 > len(self._items):  # сжимаем прочитанное начало
+            del self._items[:self._head]
+            self._head = 0
+        return floor
+
+    def empty(self):
+        return self._items is None
+
+    def qsize(self):
+        return 0 if self._items is None else len(self._items) - self._head
+
+    def __len__(self):
+        return self.qsize()
+
+    def __iter__(self):
+        # в отличие от queue.Queue очередь можно посмотреть списком
+        if self._items is not None:
+            yield from self._items[self._head:]
+
+
+class SweepQueue:
+    """
+    Базовый класс стратегий "развёртки" (SCAN, LOOK, C-SCAN). Очередь помнит положение развёртки (последний
+    обслуженный этаж) и её направление и отдаёт ближайший вызов впереди по направлению.
+    """
+
+    __slots__ = ("floors_amount", "position", "direction", "_pending", "_forced")
+
+    def __init__(self, floors_amount):
+        self.floors_amount = floors_amount
+        self.position = 1
+        self.direction = 1  # 1 - вверх, -1 - вниз
+        self._pending = []  # вызовы в порядке поступления
+        self._forced = 0  # сколько вызовов в начале _pending поставлено вне очереди
+
+    def put(self, floor):
+        self._pending.append(floor)
+
+    def put_first(self, floor):
+        """
+        Вызов вне очереди: отдаётся следующим, без учёта развёртки.
+
+        :param floor: int, этаж
+        :return: None
+        """
+        self._pending.insert(0, floor)
+        self._forced += 1
+
+    def get(self):
+        """
+        Достает следующий по стратегии вызов.
+
+        :return: int, этаж
+        """
+        if not self._pending:
+            raise IndexError(f"get from an empty {type(self).__name__}")
+        if self._forced:
+            self._forced -= 1
+            floor = self._pending.pop(0)
+            self.direction = 1 if floor >= self.position else -1
+            self.position = floor
+            return floor
+        floor = self._next_floor()
+        if floor in self._pending:
+            self._pending.remove(floor)
+        self.position = floor
+        return floor
+
+    def empty(self):
+        return not self._pending
+
+    def qsize(self):
+        return len(self._pending)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __iter__(self):
+        yield from self._pending
+
+    def _ahead(self):
+        """
+        Ближайший вызов впереди по направлению развёртки (включая текущий этаж).
+
+        :return: int, этаж или None
+        """
+        best = None
+        best_distance = None
+        for floor in self._pending:
+            distance = (floor - self.position) * self.direction
+            if distance >= 0 and (best_distance is None or distance < best_distance):
+                best = floor
+                best_distance = distance
+        return best
+
+    def _next_floor(self):
+        raise NotImplementedError
+
+
+class ScanQueue(SweepQueue):
+    """
+    SCAN: развёртка идёт до конца шахты, даже если впереди нет вызовов, и только там разворачивается.
+    Поездка к концу шахты отдаётся как обычный вызов (пустой рейс).
+    """
+
+    __slots__ = ()
+
+    def _next_floor(self):
+        floor = self._ahead()
+        if floor is not None:
+            return floor
+        end = self.floors_amount if self.direction > 0 else 1
+        self.direction = -self.direction
+        if self.position != end:
+            return end  # пустой рейс до конца шахты
+        return self._ahead()
+
+
+class LookQueue(SweepQueue):
+    """
+    LOOK: развёртка разворачивается сразу после последнего вызова по направлению.
+    """
+
+    __slots__ = ()
+
+    def _next_floor(self):
+        floor = self._ahead()
+        if floor is None:
+            self.direction = -self.direction
+            floor = self._ahead()
+        return floor
+
+
+class CScanQueue(SweepQueue):
+    """
+    C-SCAN: вызовы обслуживаются только по ходу вверх, после верхнего вызова развёртка возвращается на первый этаж.
+    """
+
+    __slots__ = ()
+
+    def _next_floor(self):
+        floor = self._ahead()
+        if floor is None:
+            self.position = 1
+            floor = self._ahead()
+        return floor
+
+
+STRATEGIES = {
+    "FCFS": FloorsQueue,
+    "SCAN": ScanQueue,
+    "LOOK": LookQueue,
+    "C-SCAN": CScanQueue,
+}
+
+
+def strategy_name(floors_queue):
+    """
+    Стратегия, по которой работает очередь вызовов лифта.
+
+    :param floors_queue: очередь вызовов лифта (queue.Queue - FCFS)
+    :return: str, ключ STRATEGIES
+    """
+    for name, queue_cls in STRATEGIES.items():
+        if type(floors_queue) is queue_cls:
+            return name
+    if isinstance(floors_queue, Queue):
+        return "FCFS"
+    raise ValueError(f"Unknown call queue {type(floors_queue).__name__}")
+
+
+def make_queue(strategy, floors_amount):
+    """
+    Создаёт очередь вызовов для выбранной стратегии.
+
+    :param strategy: str, одна из STRATEGIES
+    :param floors_amount: int, количество этажей
+    :return: очередь с интерфейсом put/get/empty
+    """
+    try:
+        queue_cls = STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"Unknown dispatch strategy {strategy!r}, expected one of {', '.join(STRATEGIES)}") from None
+    if queue_cls is FloorsQueue:
+        return FloorsQueue()
+    return queue_cls(floors_amount)
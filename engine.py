@@ -0,0 +1,441 @@
+"""
+Безголовая (без PyQt) симуляция парка лифтов. Используется бенчмарками и пакетными прогонами.
+
+Модели и генератор вызовов те же, что и в окне программы, а вместо ElevatorView наблюдателями выступает
+HeadlessView. По умолчанию симуляция идёт в виртуальном времени: asyncio.sleep не ждёт по-настоящему, а сдвигает
+часы цикла, поэтому час работы парка считается за секунды.
+"""
+import asyncio
+import random
+import selectors
+from collections import deque
+
+import checkpoint
+import kinematics
+import shutdown
+from call_trace import TRACE_CALL, TRACE_DOOR_STATUS, TRACE_FORCE_TARGET, TRACE_LIFT_STATUS, TraceRecorder, read_trace
+from loop_monitor import LoopMonitor
+from model import (ACTION_LIFT_STATUS, Elevator, ElevatorController, House, SlottedElevator, SlottedHouse,
+                   parking_floor)
+from stats import TripStats, TripTracker
+from traffic import CallGenerator
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """
+    Селектор, который вместо ожидания таймаута сдвигает виртуальные часы. Настоящие дескрипторы (self-pipe цикла,
+    сокеты) при этом опрашиваются без ожидания.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.time = 0.0
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if events or timeout == 0:
+            return events
+        if timeout is None:  # таймеров нет - ждём внешнее событие
+            return super().select(None)
+        self.time += timeout
+        return []
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """
+    Цикл событий с виртуальным временем. Время начинается с нуля.
+    """
+
+    def __init__(self):
+        super().__init__(selector=_VirtualSelector())
+
+    def time(self):
+        return self._selector.time
+
+
+def new_event_loop(realtime=False):
+    """
+    :param realtime: bool, True - обычный цикл asyncio, False - цикл с виртуальным временем
+    :return: asyncio.AbstractEventLoop
+    """
+    return asyncio.new_event_loop() if realtime else VirtualTimeLoop()
+
+
+def create_city(num_elevators, floors_amount, rng, strategy="FCFS", compact=False, shape=None):
+    """
+    Создаёт лифты и дома так же, как это делает main(): по одному дому на лифт.
+
+    :param num_elevators: int, количество лифтов
+    :param floors_amount: int, количество этажей в домах
+    :param rng: random.Random, источник случайных жильцов и грузоподъёмности
+    :param strategy: str, стратегия обработки очереди (см. dispatch.STRATEGIES)
+    :param compact: bool, использовать SlottedElevator/SlottedHouse
+    :param shape: (улиц, домов на улице, лифтов в доме) или None - нумерация как в main(); num_elevators при
+        этом должен быть равен произведению
+    :return: (list, list) - лифты и дома
+    """
+    if shape is not None:
+        streets, houses_per_street, per_house = shape
+        if streets * houses_per_street * per_house != num_elevators:
+            raise ValueError(f"fleet shape {shape} does not match {num_elevators} elevators")
+    elevator_cls, house_cls = (SlottedElevator, SlottedHouse) if compact else (Elevator, House)
+    elevators = []
+    houses = []
+    for id in range(1, num_elevators + 1):
+        if shape is None:
+            street_id = (id + 4 - 1) // 2 + 1
+            house_id = id % 4 + 1
+        else:
+            street_id = (id - 1) // (houses_per_street * per_house) + 1
+            house_id = (id - 1) // per_house % houses_per_street + 1
+        live = rng.randint(100, 999)
+        capacity = rng.randint(6, 14) * 50
+
+        elevators.append(elevator_cls(street_id, house_id, id, capacity, floors_amount, strategy))
+        houses.append(house_cls(street_id, house_id, floors_amount, live))
+    return elevators, houses
+
+
+class HeadlessView:
+    """
+    Представление лифта без интерфейса. Повторяет ту часть ElevatorView, которая влияет на модель: снимает вызовы
+    дома, когда лифт приезжает на этаж.
+    """
+
+    def __init__(self, houses, controller, elevator_id):
+        self.status = 1
+        self.houses = houses
+        self.controller = controller
+        self.elevator_id = elevator_id
+
+        elevator = self.controller.elevators[self.elevator_id - 1]
+        elevator.register_sc_observer(self.update_elevator_scrollbar)
+        elevator.register_ck_observer(self.update_elevator_status)
+        elevator.register_ds_observer(self.update_door_status)
+
+    def update_checkboxes(self):
+        pass
+
+    def update_elevator_scrollbar(self, status=False):
+        if status:
+            self.status = int(status)
+        else:
+            return 1
+
+    def update_elevator_status(self, floor):
+        house = self.houses[self.elevator_id - 1]
+        house.left_calls[floor - 1] = False
+        house.right_calls[floor - 1] = False
+
+    def update_door_status(self, status):
+        pass
+
+
+class Simulation:
+    """
+    Безголовая симуляция парка лифтов с фиксированным зерном генератора случайных чисел.
+
+    Вызовы либо генерируются случайно (CallGenerator на генераторе с зерном seed), либо берутся из записанной трассы
+    (replay) - тогда город строится по зерну и форме парка из заголовка трассы. Симуляцию можно продолжить со
+    снимка checkpoint (restore): размер парка, состояние лифтов и домов, время и генератор берутся из снимка, а
+    стратегия и тип лифта - если не заданы (заданные должны совпадать со снимком).
+    car_type (имя из kinematics.CAR_TYPES или KinematicProfile) включает кинематическую модель движения кабины.
+    """
+
+    def __init__(self, num_elevators=64, floors_amount=3, strategy=None, seed=0, call_probability=13,
+                 realtime=False, monitor=False, replay=None, record=None, shape=None, demand=None, door_dwell=3.0,
+                 parking="lobby", restore=None, car_type=None):
+        self.loop = new_event_loop(realtime)
+        self.monitor = LoopMonitor(self.loop)  # включается на ходу через self.monitor.enable()
+        self.monitor_on_start = monitor
+
+        self.replay = None
+        self.replay_start = 0.0
+        if replay is not None:
+            header, self.replay = read_trace(replay)
+            seed, num_elevators, floors_amount = header
+            self.replay_calls_by_elevator = {id: deque() for id in range(1, num_elevators + 1)}
+            self.replay_actions_list = []
+            for item in self.replay:
+                if item.kind == TRACE_CALL:
+                    self.replay_calls_by_elevator[item.elevator_id].append(item)
+                else:
+                    self.replay_actions_list.append(item)
+        self.record = record
+        self.recorder = None
+
+        snapshot = None
+        self.resume_time = 0.0  # секунды симуляции, с которых продолжается прогон
+        self.restored = restore is not None
+        if restore is not None:
+            if replay is not None:
+                raise ValueError("restore and replay cannot be combined")
+            snapshot = checkpoint.read(restore)
+            num_elevators, floors_amount, self.resume_time = (snapshot.num_elevators, snapshot.floors_amount,
+                                                              snapshot.time)
+            shape = None  # улицы и дома лифтов берутся из снимка
+            if strategy is None:
+                strategy = snapshot.strategy
+            if car_type is None:
+                if snapshot.car_type == checkpoint.CUSTOM_CAR:
+                    raise ValueError("snapshot was taken with a custom car profile, pass it as car_type")
+                car_type = snapshot.car_type
+        self.strategy = strategy or "FCFS"
+
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.elevators, self.houses = create_city(num_elevators, floors_amount, self.rng, self.strategy,
+                                                  shape=shape)
+        for elevator in self.elevators:
+            elevator.door_dwell = door_dwell
+            elevator.parking_floor = parking_floor(parking, floors_amount)
+        if car_type is not None:
+            kinematics.configure(self.elevators, car_type)
+        self.controller = ElevatorController(self.elevators)
+        self.views = [HeadlessView(self.houses, self.controller, elevator.elevator_id) for elevator in self.elevators]
+        self.calls = CallGenerator(self.rng, call_probability, demand)
+        self.controller.register_action_observer(self.on_action)
+
+        self.tracker = TripTracker(self.loop.time, num_elevators)
+        self.stats = TripStats()
+        self.tracker.register_trip_observer(self.stats)
+        for elevator in self.elevators:
+            elevator.register_event_observer(self.tracker)
+        if snapshot is not None:
+            checkpoint.apply(snapshot, self.elevators, self.houses, self.tracker, self.rng)
+
+        self.lift_tasks = {}
+        self.queue_tasks = {}
+        self.replay_task = None
+        self.is_running = False
+        self.sinks = []  # журналы и экспорт: объекты с attach/detach(elevators, controller) и close()
+
+    def add_sink(self, sink):
+        """
+        Подключает приёмник событий (журнал, экспорт и т.п.) на время прогонов. Закрывается в close().
+
+        :param sink: объект с методами attach(elevators, controller), detach(elevators, controller), close()
+        :return: sink
+        """
+        self.sinks.append(sink)
+        return sink
+
+    def now(self):
+        """
+        :return: float, секунды симуляции от начала прогона (после восстановления - от начала исходного прогона)
+        """
+        return self.loop.time() - self.replay_start
+
+    def save_snapshot(self, path):
+        """
+        Записывает снимок состояния парка (см. checkpoint.py), из которого прогон продолжается с restore=path.
+
+        :param path: str или Path, файл снимка
+        :return: int, размер файла в байтах
+        """
+        return checkpoint.write(path, checkpoint.take(self.elevators, self.houses, self.now(), self.tracker,
+                                                      self.rng))
+
+    async def lift_simulation(self, elevator_id):
+        """
+        Генерация случайных вызовов для одного лифта, как в MainWindow.lift_simulation.
+
+        :param elevator_id: int, id лифта
+        :return: None
+        """
+        elevator = self.controller.elevators[elevator_id - 1]
+        house = self.houses[elevator_id - 1]
+        while True:
+            call = self.calls.generate(house, self.now())
+            if call is not None:
+                elevator.put_call(*call)
+            await asyncio.sleep(1.0)
+
+    async def replay_calls(self, elevator_id):
+        """
+        Вместо генерации подаёт в лифт вызовы из трассы. Цикл устроен так же, как lift_simulation (тик раз в
+        секунду), поэтому в виртуальном времени прогон повторяется в точности.
+
+        :param elevator_id: int, id лифта
+        :return: None
+        """
+        elevator = self.controller.elevators[elevator_id - 1]
+        house = self.houses[elevator_id - 1]
+        records = self.replay_calls_by_elevator[elevator_id]
+        while True:
+            now = self.loop.time() - self.replay_start
+            while records and records[0].time <= now + 0.5:  # вызов относится к ближайшему тику
+                record = records.popleft()
+                if record.value:
+                    house.left_calls[record.floor - 1] = True
+                else:
+                    house.right_calls[record.floor - 1] = True
+                elevator.put_call(record.floor, bool(record.value))
+            await asyncio.sleep(1.0)
+
+    async def replay_actions(self):
+        """
+        Повторяет действия оператора из трассы в те же моменты времени, что и при записи.
+
+        :return: None
+        """
+        for record in self.replay_actions_list:
+            delay = record.time - (self.loop.time() - self.replay_start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elevator = self.elevators[record.elevator_id - 1]
+            if record.kind == TRACE_LIFT_STATUS:
+                if elevator.lift_status != bool(record.value):
+                    self.controller.change_elevator_status(record.elevator_id)
+            elif record.kind == TRACE_DOOR_STATUS:
+                if elevator.door_status != bool(record.value):
+                    self.controller.change_door_status(record.elevator_id)
+            elif record.kind == TRACE_FORCE_TARGET:
+                self.controller.force_target(record.elevator_id, record.floor)
+
+    def start_elevator(self, elevator_id):
+        """
+        Запускает задачи лифта: обработку очереди и генерацию (или воспроизведение) вызовов.
+
+        :param elevator_id: int, id лифта
+        :return: None
+        """
+        elevator = self.elevators[elevator_id - 1]
+        calls = self.lift_simulation(elevator_id) if self.replay is None else self.replay_calls(elevator_id)
+        self.lift_tasks[elevator_id] = asyncio.create_task(calls, name=f"lift_simulation-{elevator_id}")
+        self.queue_tasks[elevator_id] = asyncio.create_task(elevator.simulate_queue(),
+                                                            name=f"simulate_queue-{elevator_id}")
+
+    def stop_elevator(self, elevator_id):
+        """
+        Останавливает задачи лифта и снимает вызовы в его доме, как MainWindow.elevators_simulation.
+
+        :param elevator_id: int, id лифта
+        :return: list, отменённые задачи
+        """
+        tasks = [task for task in (self.lift_tasks.pop(elevator_id, None), self.queue_tasks.pop(elevator_id, None))
+                 if task is not None]
+        for task in tasks:
+            task.cancel()
+        house = self.houses[elevator_id - 1]
+        house.left_calls = [False] * house.floors_amount
+        house.right_calls = [False] * house.floors_amount
+        return tasks
+
+    def on_action(self, elevator_id, action, value):
+        """
+        Наблюдатель за действиями оператора: остановка и запуск лифта через контроллер останавливают и
+        перезапускают его задачи.
+        """
+        if action != ACTION_LIFT_STATUS or not self.is_running:
+            return
+        if value:
+            if elevator_id not in self.queue_tasks:
+                self.start_elevator(elevator_id)
+        else:
+            self.stop_elevator(elevator_id)
+
+    async def start(self):
+        """
+        Подключает приёмники и запускает задачи всех лифтов. Используется, когда симуляцию нужно вести
+        по частям (например, шардами в sharding.py); обычный прогон - elevators_simulation.
+
+        :return: None
+        """
+        if self.monitor_on_start:
+            self.monitor.enable()
+        if self.record is not None:
+            self.recorder = TraceRecorder(self.record, self.seed, len(self.elevators),
+                                          self.elevators[0].floors_amount, self.loop.time)
+            self.recorder.attach(self.elevators, self.controller)
+        for sink in self.sinks:
+            sink.attach(self.elevators, self.controller)
+        if self.restored and (self.controller.dispatcher is not None or
+                              any(elevator.boarding is not None for elevator in self.elevators)):
+            for sink in reversed(self.sinks):
+                sink.detach(self.elevators, self.controller)
+            raise ValueError("snapshot does not hold boarding, passenger or dispatcher state, restore cannot be "
+                             "combined with them")
+        self.is_running = True
+        self.replay_start = self.loop.time() - self.resume_time
+        for elevator in self.elevators:
+            if elevator.lift_status:
+                self.start_elevator(elevator.elevator_id)
+        self.replay_task = None
+        if self.replay is not None:
+            self.replay_task = asyncio.create_task(self.replay_actions(), name="replay_actions")
+
+    async def stop(self):
+        """
+        Останавливает задачи всех лифтов и отключает приёмники.
+
+        :return: None
+        """
+        self.is_running = False
+        tasks = []
+        if self.replay_task is not None:
+            self.replay_task.cancel()
+            tasks.append(self.replay_task)
+            self.replay_task = None
+        for elevator in self.elevators:
+            tasks.extend(self.stop_elevator(elevator.elevator_id))
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.monitor.disable()
+        for sink in self.sinks:
+            sink.detach(self.elevators, self.controller)
+        if self.recorder is not None:
+            self.recorder.detach(self.elevators, self.controller)
+            self.recorder.close()
+            self.recorder = None
+
+    async def shutdown(self, budget=5.0, snapshot=None):
+        """
+        Упорядоченно завершает идущую симуляцию не дольше budget секунд (см. shutdown.py): последний снимок,
+        отмена задач лифтов, отключение и закрытие приёмников. После этого остаётся вызвать close().
+
+        :param budget: float, бюджет времени в секундах
+        :param snapshot: str или Path, файл последнего снимка, или None
+        :return: shutdown.ShutdownReport
+        """
+        attached = self.is_running  # приёмники подключены только на время прогона
+        self.is_running = False
+        tasks = [self.replay_task, *self.lift_tasks.values(), *self.queue_tasks.values()]
+        self.replay_task = None
+        self.lift_tasks.clear()
+        self.queue_tasks.clear()
+        sinks = self.sinks if self.recorder is None else [*self.sinks, self.recorder]  # трасса - как приёмник
+        self.recorder = None
+        save = (lambda: self.save_snapshot(snapshot)) if snapshot is not None else None
+        report = await shutdown.shutdown(tasks, sinks, self.elevators, self.controller if attached else None, budget,
+                                         save)
+        self.monitor.disable()
+        self.sinks = []
+        return report
+
+    async def elevators_simulation(self, duration):
+        """
+        Запускает задачи всех лифтов на duration секунд симуляции, затем останавливает их.
+
+        :param duration: float, длительность в секундах
+        :return: None
+        """
+        await self.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            await self.stop()
+
+    def run(self, duration):
+        """
+        Прогоняет симуляцию и возвращает итоговую статистику.
+
+        :param duration: float, длительность в секундах симуляции
+        :return: dict, см. TripStats.summary
+        """
+        self.loop.run_until_complete(self.elevators_simulation(duration))
+        return self.stats.summary(self.tracker, duration)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+        self.loop.close()
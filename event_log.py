@@ -0,0 +1,214 @@
+"""
+Бинарный журнал событий парка лифтов.
+
+События модели (вызовы, уведомления notify_observer_sc/ck/ds, подбор и высадка пассажиров) и действия оператора
+пишутся записями фиксированного размера в сегментные файлы, отображённые в память (mmap). Запись события - это
+один struct.pack_into в уже отображённую память, без системных вызовов и форматирования текста. Когда сегмент
+заполняется, он обрезается до записанного размера и открывается следующий.
+
+Сегменты можно читать, пока журнал пишется: количество записей хранится в заголовке сегмента.
+"""
+import mmap
+import struct
+import time
+from pathlib import Path
+
+from model import ACTION_DOOR_STATUS, ACTION_LIFT_STATUS
+
+try:
+    import numpy
+except ImportError:  # numpy нужен только для быстрого чтения журнала
+    numpy = None
+
+MAGIC = b"LIFTEVT1"
+HEADER = struct.Struct("<8sII")  # сигнатура, размер записи, количество записей
+COUNT_OFFSET = 12
+RECORD = struct.Struct("<dIHHB3xi")  # время, лифт, улица, этаж, вид события, значение
+
+# Действия оператора пишутся как события с видом ACTION_OFFSET + действие
+ACTION_OFFSET = 100
+KIND_LIFT_STATUS = ACTION_OFFSET + ACTION_LIFT_STATUS
+KIND_DOOR_STATUS = ACTION_OFFSET + ACTION_DOOR_STATUS
+
+if numpy is not None:
+    RECORD_DTYPE = numpy.dtype([("time", "<f8"), ("elevator_id", "<u4"), ("street_id", "<u2"), ("floor", "<u2"),
+                                ("kind", "u1"), ("pad", "V3"), ("value", "<i4")])
+
+
+class EventLog:
+    """
+    Журнал событий в каталоге сегментов events-NNNNNN.seg.
+    """
+
+    def __init__(self, directory, segment_size=64 * 2 ** 20, max_segments=None, clock=time.time):
+        """
+        :param directory: str или Path, каталог журнала (создаётся при необходимости)
+        :param segment_size: int, размер сегмента в байтах
+        :param max_segments: int, сколько последних сегментов хранить (None - все)
+        :param clock: функция без аргументов, время события (по умолчанию time.time)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.capacity = (segment_size - HEADER.size) // RECORD.size
+        if self.capacity < 1:
+            raise ValueError("segment_size is too small for a single record")
+        self.max_segments = max_segments
+        self.clock = clock
+        self.file = None
+        self.mm = None
+        self.count = 0
+        existing = segment_paths(self.directory)
+        self.segment_number = int(existing[-1].stem.split("-")[1]) if existing else 0
+        self._street_ids = {}
+        self.open_segment()
+
+    def open_segment(self):
+        """
+        Открывает следующий сегмент. Журнал только дописывается, старые сегменты не изменяются.
+
+        :return: None
+        """
+        self.segment_number += 1
+        path = self.directory / f"events-{self.segment_number:06d}.seg"
+        size = HEADER.size + self.capacity * RECORD.size
+        self.file = open(path, "w+b")
+        self.file.truncate(size)
+        self.mm = mmap.mmap(self.file.fileno(), size)
+        HEADER.pack_into(self.mm, 0, MAGIC, RECORD.size, 0)
+        self.count = 0
+        if self.max_segments is not None:
+            for old in segment_paths(self.directory)[:-self.max_segments]:
+                old.unlink()
+
+    def close_segment(self):
+        """
+        Сбрасывает сегмент на диск и обрезает файл до записанных данных.
+
+        :return: None
+        """
+        if self.mm is None:
+            return
+        self.mm.flush()
+        self.mm.close()
+        self.file.truncate(HEADER.size + self.count * RECORD.size)
+        self.file.close()
+        self.mm = None
+        self.file = None
+
+    def write(self, elevator_id, street_id, floor, kind, value):
+        """
+        Дописывает одно событие.
+
+        :return: None
+        """
+        if self.count == self.capacity:
+            self.close_segment()
+            self.open_segment()
+        RECORD.pack_into(self.mm, HEADER.size + self.count * RECORD.size,
+                         self.clock(), elevator_id, street_id, floor, kind, value)
+        self.count += 1
+        struct.pack_into("<I", self.mm, COUNT_OFFSET, self.count)
+
+    def attach(self, elevators, controller):
+        for elevator in elevators:
+            elevator.register_event_observer(self.on_event)
+            self._street_ids[elevator.elevator_id] = elevator.street_id
+        controller.register_action_observer(self.on_action)
+
+    def detach(self, elevators, controller):
+        for elevator in elevators:
+            elevator.event_callbacks.remove(self.on_event)
+        controller.action_callbacks.remove(self.on_action)
+
+    def on_event(self, elevator, kind, floor, value):
+        self.write(elevator.elevator_id, elevator.street_id, floor, kind, value)
+
+    def on_action(self, elevator_id, action, value):
+        self.write(elevator_id, self._street_ids.get(elevator_id, 0), 0, ACTION_OFFSET + action, int(value))
+
+    def flush(self):
+        if self.mm is not None:
+            self.mm.flush()
+
+    def close(self):
+        self.close_segment()
+
+
+def segment_paths(directory):
+    """
+    :param directory: str или Path, каталог журнала
+    :return: list of Path, сегменты в порядке записи
+    """
+    return sorted(Path(directory).glob("events-*.seg"))
+
+
+def _segment_count(header, size, path):
+    """
+    Количество записей сегмента: из заголовка, но не больше, чем помещается в файл.
+    """
+    magic, record_size, count = HEADER.unpack(header)
+    if magic != MAGIC or record_size != RECORD.size:
+        raise ValueError(f"{path}: not an event log segment")
+    return min(count, (size - HEADER.size) // RECORD.size)
+
+
+def read_segment(path):
+    """
+    Читает записи одного сегмента.
+
+    :param path: str или Path, файл сегмента
+    :return: iterator of tuple (время, лифт, улица, этаж, вид, значение)
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        return
+    count = _segment_count(data[:HEADER.size], len(data), path)
+    yield from RECORD.iter_unpack(memoryview(data)[HEADER.size:HEADER.size + count * RECORD.size])
+
+
+def scan(directory, kinds=None, elevator_id=None, street_id=None, since=None, until=None):
+    """
+    Последовательно просматривает все сегменты журнала с фильтрами.
+
+    :param directory: str или Path, каталог журнала
+    :param kinds: множество видов событий или None
+    :param elevator_id: int или None
+    :param street_id: int или None
+    :param since: float, время начала или None
+    :param until: float, время конца (не включая) или None
+    :return: iterator of tuple (время, лифт, улица, этаж, вид, значение)
+    """
+    for path in segment_paths(directory):
+        for record in read_segment(path):
+            at, elevator, street, floor, kind, value = record
+            if kinds is not None and kind not in kinds:
+                continue
+            if elevator_id is not None and elevator != elevator_id:
+                continue
+            if street_id is not None and street != street_id:
+                continue
+            if since is not None and at < since or until is not None and at >= until:
+                continue
+            yield record
+
+
+def load_numpy(directory):
+    """
+    Загружает журнал в структурированный массив numpy без разбора записей в Python.
+
+    :param directory: str или Path, каталог журнала
+    :return: numpy.ndarray с полями time, elevator_id, street_id, floor, kind, value
+    """
+    if numpy is None:
+        raise RuntimeError("numpy is required for load_numpy(), install it with `pip install numpy`")
+    parts = []
+    for path in segment_paths(directory):
+        data = numpy.memmap(path, dtype="u1", mode="r")
+        if len(data) < HEADER.size:
+            continue
+        count = _segment_count(bytes(data[:HEADER.size]), len(data), path)
+        parts.append(data[HEADER.size:HEADER.size + count * RECORD.size].view(RECORD_DTYPE))
+    if not parts:
+        return numpy.empty(0, dtype=RECORD_DTYPE)
+    return numpy.concatenate(parts)
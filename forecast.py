@@ -0,0 +1,237 @@
+"""
+Прогноз вызовов по домам, этажам и времени суток и упреждающая расстановка свободных лифтов.
+
+DemandForecaster хранит для каждой тройки (дом, этаж, интервал суток) счётчик вызовов с экспоненциальным
+забыванием: значение и время его последнего обновления. Новый вызов умножает счётчик на exp(-dt / tau) и
+прибавляет единицу - O(1) на вызов без хранения самих вызовов, а старые недели постепенно перестают влиять на
+прогноз (half_life). Учится на лету по событиям EVENT_CALL и на записанной истории (history.HistoryReader).
+
+Prepositioner раз в interval секунд смотрит прогноз на lead секунд вперёд и расставляет лифты дома по этажам
+пропорционально ожидаемым вызовам (через Elevator.parking_floor), пока спрос не пришёл: лифт i из n встаёт на
+этаж, где накопленная доля прогноза дома достигает (i + 1/2) / n. В утренний пик почти все кабины ждут на первом
+этаже, в обед часть из них переходит к этажу столовой, вечером - к верхним этажам. Занятые лифты считаются уже
+стоящими у ближайшего к месту их высадки этажа расстановки, свободные занимают остальные. Где прогноз дома ниже
+min_rate, лифты возвращаются к обычной политике стоянки.
+"""
+import asyncio
+import math
+from array import array
+
+from model import EVENT_CALL
+
+DAY = 86400.0
+
+
+class DemandForecaster:
+    """
+    Счётчики вызовов с забыванием по (улица, дом, этаж, интервал суток).
+    """
+
+    def __init__(self, clock=None, time_offset=0.0, bucket=900.0, half_life=7 * DAY):
+        """
+        :param clock: функция без аргументов, время цикла событий (нужна только для обучения на лету)
+        :param time_offset: float, прибавляется ко времени цикла, чтобы получить время от полуночи (плюс целые сутки)
+        :param bucket: float, длина интервала суток, секунды
+        :param half_life: float, через сколько секунд вклад вызова в прогноз уменьшается вдвое
+        """
+        self.clock = clock
+        self.time_offset = time_offset
+        self.bucket = bucket
+        self.buckets = math.ceil(DAY / bucket)
+        self.tau = half_life / math.log(2)
+        self.cells = {}  # (улица, дом, этаж) -> смещение строки интервалов в values/updated
+        self.floors = {}  # (улица, дом) -> известные этажи
+        self.values = array("d")
+        self.updated = array("d")
+        self.calls = 0
+
+    def now(self):
+        """
+        :return: float, текущее время прогноза (время суток - по модулю DAY)
+        """
+        return self.clock() + self.time_offset
+
+    def _offset(self, street_id, house_id, floor):
+        key = (street_id, house_id, floor)
+        offset = self.cells.get(key)
+        if offset is None:
+            offset = self.cells[key] = len(self.values)
+            self.values.extend(array("d", bytes(8 * self.buckets)))
+            self.updated.extend(array("d", bytes(8 * self.buckets)))
+            self.floors.setdefault((street_id, house_id), []).append(floor)
+        return offset
+
+    def observe(self, street_id, house_id, floor, at):
+        """
+        Учитывает вызов.
+
+        :param at: float, время вызова (время суток - по модулю DAY)
+        :return: None
+        """
+        index = self._offset(street_id, house_id, floor) + int(at % DAY // self.bucket)
+        self.values[index] = self.values[index] * math.exp(-max(0.0, at - self.updated[index]) / self.tau) + 1.0
+        self.updated[index] = at
+        self.calls += 1
+
+    def rate(self, street_id, house_id, floor, at):
+        """
+        Ожидаемое число вызовов в час на этаже в интервале суток, в который попадает at. Оценка точна для спроса,
+        который повторяется изо дня в день; за первые сутки истории она занижена.
+
+        :return: float
+        """
+        offset = self.cells.get((street_id, house_id, floor))
+        if offset is None:
+            return 0.0
+        index = offset + int(at % DAY // self.bucket)
+        value = self.values[index] * math.exp(-max(0.0, at - self.updated[index]) / self.tau)
+        return value * math.expm1(DAY / self.tau) * 3600 / self.bucket
+
+    def forecast(self, street_id, house_id, at):
+        """
+        :return: dict этаж -> ожидаемое число вызовов в час
+        """
+        floors = self.floors.get((street_id, house_id), ())
+        return {floor: self.rate(street_id, house_id, floor, at) for floor in floors}
+
+    def learn(self, reader, since=None, until=None, time_offset=0.0):
+        """
+        Обучение на записанной истории вызовов.
+
+        :param reader: history.HistoryReader
+        :param time_offset: float, прибавляется ко времени записей, чтобы получить время от полуночи
+        :return: int, учтено вызовов
+        """
+        count = 0
+        for at, street_id, house_id, floor in reader.iter_calls(since, until):
+            self.observe(street_id, house_id, floor, at + time_offset)
+            count += 1
+        return count
+
+    def attach(self, elevators, controller):
+        for elevator in elevators:
+            elevator.register_event_observer(self.on_event)
+
+    def detach(self, elevators, controller):
+        for elevator in elevators:
+            elevator.event_callbacks.remove(self.on_event)
+
+    def close(self):
+        pass
+
+    def on_event(self, elevator, kind, floor, value):
+        if kind == EVENT_CALL:
+            self.observe(elevator.street_id, elevator.house_id, floor, self.now())
+
+
+class Prepositioner:
+    """
+    Упреждающая расстановка свободных лифтов по прогнозу DemandForecaster.
+    """
+
+    def __init__(self, forecaster, interval=60.0, lead=300.0, min_rate=6.0):
+        """
+        :param forecaster: DemandForecaster с часами симуляции
+        :param interval: float, как часто пересматривать расстановку, секунды
+        :param lead: float, на сколько секунд вперёд смотреть прогноз (примерно время подъезда лифта)
+        :param min_rate: float, вызовов в час на дом, ниже которых прогноз не используется
+        """
+        self.forecaster = forecaster
+        self.interval = interval
+        self.lead = lead
+        self.min_rate = min_rate
+        self.groups = {}  # (улица, дом) -> лифты
+        self.default = {}  # id лифта -> этаж стоянки по обычной политике
+        self.moves = 0
+        self.task = None
+
+    def attach(self, elevators, controller):
+        self.groups = {}
+        for elevator in elevators:
+            self.groups.setdefault((elevator.street_id, elevator.house_id), []).append(elevator)
+            self.default[elevator.elevator_id] = elevator.parking_floor
+        self.task = asyncio.ensure_future(self._periodic())
+
+    def detach(self, elevators, controller):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        for elevator in elevators:
+            elevator.parking_floor = self.default.get(elevator.elevator_id, elevator.parking_floor)
+
+    def close(self):
+        pass
+
+    async def _periodic(self):
+        while True:
+            self.position()
+            await asyncio.sleep(self.interval)
+
+    @staticmethod
+    def targets(rates, count):
+        """
+        Этажи расстановки count лифтов пропорционально прогнозу.
+
+        :param rates: dict этаж -> ожидаемое число вызовов в час
+        :param count: int, количество лифтов
+        :return: list of int, по возрастанию; пустой, если вызовов не ожидается
+        """
+        floors = sorted(rates)
+        total = sum(rates.values())
+        if not floors or total <= 0:
+            return []
+        targets = []
+        cumulative, position = rates[floors[0]], 0
+        for i in range(count):
+            quantile = (i + 0.5) / count * total
+            while cumulative < quantile and position < len(floors) - 1:
+                position += 1
+                cumulative += rates[floors[position]]
+            targets.append(floors[position])
+        return targets
+
+    @staticmethod
+    def destination(elevator):
+        """
+        Этаж, на котором занятый лифт освободится: последняя остановка его пассажиров, иначе этаж вызова или текущий.
+
+        :param elevator: Elevator
+        :return: int
+        """
+        if elevator.boarding is not None:
+            stops = elevator.boarding.destinations(elevator)
+            if stops:
+                return stops[-1]
+        return elevator.target_floor or elevator.current_floor
+
+    def position(self):
+        """
+        Пересматривает этажи стоянки свободных лифтов.
+
+        :return: int, сколько лифтов получили новый этаж стоянки
+        """
+        at = self.forecaster.now() + self.lead
+        moved = 0
+        for (street_id, house_id), group in self.groups.items():
+            running = [elevator for elevator in group if elevator.lift_status]
+            idle = [elevator for elevator in running if elevator.target_floor is None and elevator.floors_queue.empty()]
+            if not idle:
+                continue
+            rates = self.forecaster.forecast(street_id, house_id, at)
+            targets = self.targets(rates, len(running)) if sum(rates.values()) >= self.min_rate else []
+            if not targets:  # прогноз слишком мал - обычная стоянка
+                for elevator in idle:
+                    elevator.parking_floor = self.default[elevator.elevator_id]
+                continue
+            for elevator in running:  # занятый лифт закрывает ближайший к месту своей высадки этаж расстановки
+                if elevator not in idle:
+                    floor = self.destination(elevator)
+                    targets.remove(min(targets, key=lambda target: abs(target - floor)))
+            # на прямой оптимально сопоставить по порядку: нижний свободный лифт - нижнему этажу
+            idle.sort(key=lambda elevator: elevator.current_floor)
+            for elevator, floor in zip(idle, targets):
+                if elevator.parking_floor != floor:
+                    elevator.parking_floor = floor
+                    moved += 1
+        self.moves += moved
+        return moved
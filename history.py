@@ -0,0 +1,281 @@
+"""
+История работы парка лифтов в SQLite: вызовы, поездки, открытия и закрытия дверей, действия оператора.
+
+Наблюдатели в цикле событий только кладут кортеж в очередь в памяти. Пишет в базу фоновый поток со своим
+соединением: забирает из очереди всё накопленное (но не больше batch_size строк) и записывает одной транзакцией.
+База работает в режиме WAL, поэтому читать её (HistoryReader, окно, командная строка) можно во время записи.
+
+Время в базе - время цикла событий плюс time_offset; для окна программы это абсолютное время (time.time()), и
+запросы вида "за последнюю неделю" работают по обычным временным меткам Unix.
+"""
+import queue
+import sqlite3
+import threading
+import time
+
+from model import ACTION_DOOR_STATUS, ACTION_FORCE_TARGET, ACTION_LIFT_STATUS, EVENT_CALL, EVENT_DOOR
+from stats import TripSink
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    time REAL NOT NULL, elevator_id INTEGER NOT NULL, house_id INTEGER NOT NULL, street_id INTEGER NOT NULL,
+    floor INTEGER NOT NULL, left_side INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trips (
+    time REAL NOT NULL, elevator_id INTEGER NOT NULL, house_id INTEGER NOT NULL, street_id INTEGER NOT NULL,
+    floor INTEGER NOT NULL, drop_floor INTEGER NOT NULL, call_time REAL, pickup_time REAL NOT NULL,
+    wait REAL, journey REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS doors (
+    time REAL NOT NULL, elevator_id INTEGER NOT NULL, house_id INTEGER NOT NULL, street_id INTEGER NOT NULL,
+    floor INTEGER NOT NULL, open INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS actions (
+    time REAL NOT NULL, elevator_id INTEGER NOT NULL, house_id INTEGER NOT NULL, street_id INTEGER NOT NULL,
+    action TEXT NOT NULL, value INTEGER NOT NULL
+);
+"""
+TABLES = ("calls", "trips", "doors", "actions")
+# Вставки по таблицам; время поездки (time) - время высадки
+INSERTS = {
+    "calls": "INSERT INTO calls VALUES (?, ?, ?, ?, ?, ?)",
+    "trips": "INSERT INTO trips VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    "doors": "INSERT INTO doors VALUES (?, ?, ?, ?, ?, ?)",
+    "actions": "INSERT INTO actions VALUES (?, ?, ?, ?, ?, ?)",
+}
+ACTION_NAMES = {ACTION_LIFT_STATUS: "lift_status", ACTION_DOOR_STATUS: "door_status",
+                ACTION_FORCE_TARGET: "force_target"}
+
+_STOP = object()  # признак конца очереди для фонового потока
+
+
+def _create_schema(connection):
+    connection.executescript(SCHEMA)
+    for table in TABLES:
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_time ON {table} (time)")
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_elevator ON {table} (elevator_id, time)")
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_house ON {table} (street_id, house_id, time)")
+    connection.commit()
+
+
+class HistoryStore(TripSink):
+    """
+    Приёмник событий, поездок и действий оператора, сохраняющий их в базу SQLite.
+    """
+
+    def __init__(self, path, clock, tracker=None, time_offset=0.0, batch_size=1000, flush_interval=0.5):
+        """
+        :param path: str или Path, файл базы (создаётся при необходимости)
+        :param clock: функция без аргументов, время цикла событий
+        :param tracker: TripTracker, если он уже есть; иначе создаётся свой
+        :param time_offset: float, прибавляется ко времени цикла (time.time() - loop.time() для абсолютного времени)
+        :param batch_size: int, наибольшее количество строк в одной транзакции
+        :param flush_interval: float, сколько секунд после первой строки пачки ждать следующие
+        """
+        super().__init__(clock, tracker)
+        self.path = str(path)
+        self.time_offset = time_offset
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.SimpleQueue()
+        self.written = 0
+        self.transactions = 0
+        self.houses = {}  # лифт -> (дом, улица)
+        self.error = None
+
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            _create_schema(connection)
+        finally:
+            connection.close()
+        self.thread = threading.Thread(target=self._writer, name="history-writer", daemon=True)
+        self.thread.start()
+
+    def attach(self, elevators, controller):
+        super().attach(elevators, controller)
+        for elevator in elevators:
+            elevator.register_event_observer(self.on_event)
+            self.houses[elevator.elevator_id] = (elevator.house_id, elevator.street_id)
+        controller.register_action_observer(self.on_action)
+
+    def detach(self, elevators, controller):
+        for elevator in elevators:
+            elevator.event_callbacks.remove(self.on_event)
+        controller.action_callbacks.remove(self.on_action)
+        super().detach(elevators, controller)
+
+    def on_event(self, elevator, kind, floor, value):
+        if kind == EVENT_CALL:
+            self.queue.put(("calls", (self.clock() + self.time_offset, elevator.elevator_id, elevator.house_id,
+                                      elevator.street_id, floor, value)))
+        elif kind == EVENT_DOOR:
+            self.queue.put(("doors", (self.clock() + self.time_offset, elevator.elevator_id, elevator.house_id,
+                                      elevator.street_id, floor, value)))
+
+    def on_trip(self, trip):
+        offset = self.time_offset
+        call_time = None if trip.call_time is None else trip.call_time + offset
+        wait = None if trip.call_time is None else trip.pickup_time - trip.call_time
+        self.queue.put(("trips", (trip.drop_time + offset, trip.elevator_id, trip.house_id, trip.street_id, trip.floor,
+                                  trip.drop_floor, call_time, trip.pickup_time + offset, wait,
+                                  trip.drop_time - trip.pickup_time)))
+
+    def on_action(self, elevator_id, action, value):
+        house_id, street_id = self.houses.get(elevator_id, (0, 0))
+        self.queue.put(("actions", (self.clock() + self.time_offset, elevator_id, house_id, street_id,
+                                    ACTION_NAMES.get(action, str(action)), int(value))))
+
+    def _writer(self):
+        """
+        Фоновый поток записи: ждёт первую строку, добирает строки ещё flush_interval секунд (или до batch_size) и
+        пишет пачку одной транзакцией.
+        """
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA synchronous=NORMAL")  # в режиме WAL это безопасно и без fsync на транзакцию
+        stopping = False
+        try:
+            while not stopping:
+                rows = {table: [] for table in TABLES}
+                item = self.queue.get()
+                deadline = time.monotonic() + self.flush_interval
+                count = 0
+                while True:
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    rows[item[0]].append(item[1])
+                    count += 1
+                    if count >= self.batch_size:
+                        break
+                    try:
+                        item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if not count:
+                    continue
+                try:
+                    with connection:
+                        for table, values in rows.items():
+                            if values:
+                                connection.executemany(INSERTS[table], values)
+                except sqlite3.Error as error:  # не роняем поток: запоминаем ошибку и пропускаем пачку
+                    self.error = error
+                    continue
+                self.written += count
+                self.transactions += 1
+        finally:
+            connection.close()
+
+    def close(self, timeout=None):
+        """
+        Дожидается записи всех строк из очереди и останавливает фоновый поток.
+
+        :param timeout: float, сколько ждать в секундах (None - без ограничения)
+        :return: None
+        """
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join(timeout)
+
+
+class HistoryReader:
+    """
+    Запросы к истории. Открывает базу только для чтения и не мешает записи.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: str или Path, файл базы HistoryStore
+        """
+        self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        self.connection.row_factory = sqlite3.Row
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def _where(street_id=None, house_id=None, elevator_id=None, since=None, until=None):
+        conditions, parameters = [], []
+        for column, value in (("street_id", street_id), ("house_id", house_id), ("elevator_id", elevator_id)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        if since is not None:
+            conditions.append("time >= ?")
+            parameters.append(since)
+        if until is not None:
+            conditions.append("time < ?")
+            parameters.append(until)
+        return (" WHERE " + " AND ".join(conditions)) if conditions else "", parameters
+
+    def longest_waits(self, street_id=None, house_id=None, since=None, until=None, limit=10, by="wait_max"):
+        """
+        Лифты с самым долгим ожиданием, например longest_waits(street_id=3, since=time.time() - 7 * 86400).
+
+        :param by: str, порядок: "wait_max", "wait_mean" или "trips"
+        :return: list of dict (elevator_id, house_id, street_id, trips, wait_mean, wait_max)
+        """
+        if by not in ("wait_max", "wait_mean", "trips"):
+            raise ValueError(f"unknown order: {by}")
+        where, parameters = self._where(street_id, house_id, None, since, until)
+        where += " AND wait IS NOT NULL" if where else " WHERE wait IS NOT NULL"
+        rows = self.connection.execute(
+            "SELECT elevator_id, house_id, street_id, COUNT(*) AS trips, AVG(wait) AS wait_mean, "
+            f"MAX(wait) AS wait_max FROM trips{where} GROUP BY elevator_id ORDER BY {by} DESC LIMIT ?",
+            parameters + [limit])
+        return [dict(row) for row in rows]
+
+    def calls_per_hour(self, street_id=None, house_id=None, elevator_id=None, since=None, until=None):
+        """
+        Количество вызовов по часам.
+
+        :return: list of (начало часа, количество)
+        """
+        where, parameters = self._where(street_id, house_id, elevator_id, since, until)
+        rows = self.connection.execute(
+            f"SELECT CAST(time / 3600 AS INTEGER) * 3600 AS hour, COUNT(*) FROM calls{where} GROUP BY hour "
+            "ORDER BY hour", parameters)
+        return [tuple(row) for row in rows]
+
+    def events(self, table, street_id=None, house_id=None, elevator_id=None, since=None, until=None, limit=1000):
+        """
+        Строки одной таблицы ("calls", "trips", "doors", "actions") в порядке времени.
+
+        :return: list of dict
+        """
+        if table not in TABLES:
+            raise ValueError(f"unknown table: {table}")
+        where, parameters = self._where(street_id, house_id, elevator_id, since, until)
+        rows = self.connection.execute(f"SELECT * FROM {table}{where} ORDER BY time LIMIT ?", parameters + [limit])
+        return [dict(row) for row in rows]
+
+    def iter_calls(self, since=None, until=None, batch=10000):
+        """
+        Все вызовы за период в порядке времени, без загрузки в память целиком (для обучения прогноза).
+
+        :param batch: int, строк за одну выборку
+        :return: генератор (время, улица, дом, этаж)
+        """
+        where, parameters = self._where(since=since, until=until)
+        cursor = self.connection.execute(f"SELECT time, street_id, house_id, floor FROM calls{where} ORDER BY time",
+                                         parameters)
+        while True:
+            rows = cursor.fetchmany(batch)
+            if not rows:
+                return
+            yield from rows
+
+    def stopped_elevators(self, at=None):
+        """
+        Лифты, остановленные оператором на момент at (по последнему действию lift_status).
+
+        :param at: float, время или None - по последним записанным действиям
+        :return: list of int
+        """
+        at = float("inf") if at is None else at
+        rows = self.connection.execute(
+            "SELECT elevator_id, value FROM actions AS a WHERE action = 'lift_status' AND time <= ? AND time = "
+            "(SELECT MAX(time) FROM actions WHERE action = 'lift_status' AND elevator_id = a.elevator_id "
+            "AND time <= ?) ORDER BY elevator_id", (at, at))
+        return [row["elevator_id"] for row in rows if not row["value"]]
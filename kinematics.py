@@ -0,0 +1,139 @@
+"""
+Кинематическая модель движения лифта и таблица времени проезда между этажами.
+
+Кабина разгоняется и тормозит с ограничением скорости, ускорения и рывка (S-образный профиль скорости), поэтому
+короткий перегон на соседний этаж занимает заметно больше трети проезда через три этажа, а на длинных перегонах
+кабина идёт на полной скорости. Время перегона на расстояние d считает travel_time(); для дома с N этажами все
+N×N значений считаются один раз и хранятся в TravelTable (плоский array), так что ETA в горячем цикле диспетчера -
+одно обращение по индексу. Таблицы кэшируются по (характеристики лифта, этажность, высота этажа): все лифты одного
+типа в домах одного типа делят одну таблицу.
+
+Elevator.travel_table задаёт таблицу лифта (None - прежняя модель: floor_time секунд на этаж), Elevator.door_time -
+время работы привода дверей (открытие и закрытие) в дополнение к door_dwell.
+"""
+import math
+from array import array
+from collections import namedtuple
+
+# Характеристики лифта: скорость, м/с; ускорение, м/с²; рывок, м/с³; задержка старта (тормоз, привод), с;
+# открытие и закрытие дверей, с
+KinematicProfile = namedtuple("KinematicProfile", ["max_speed", "acceleration", "jerk", "start_delay", "door_open",
+                                                   "door_close"])
+
+CAR_TYPES = {
+    "lowrise": KinematicProfile(1.0, 0.6, 1.0, 0.5, 2.0, 2.5),
+    "midrise": KinematicProfile(1.75, 0.9, 1.2, 0.5, 1.8, 2.2),
+    "highrise": KinematicProfile(4.0, 1.0, 1.5, 0.7, 1.6, 2.0),
+}
+
+
+def travel_time(distance, profile):
+    """
+    Время перегона от остановки до остановки на расстояние distance с ограничением скорости, ускорения и рывка.
+
+    :param distance: float, метры
+    :param profile: KinematicProfile
+    :return: float, секунды (без задержки старта)
+    """
+    if distance <= 0:
+        return 0.0
+    speed, jerk = profile.max_speed, profile.jerk
+    acceleration = min(profile.acceleration, math.sqrt(speed * jerk))  # до наибольшего ускорения можно не дойти
+    if distance >= speed * (speed / acceleration + acceleration / jerk):  # есть участок полной скорости
+        return distance / speed + speed / acceleration + acceleration / jerk
+    # до полной скорости не доходит: ищем пиковую скорость
+    ramp = acceleration * acceleration / jerk
+    peak = (-ramp + math.sqrt(ramp * ramp + 4 * acceleration * distance)) / 2
+    if peak >= ramp:  # наибольшее ускорение достигается
+        return 2 * (peak / acceleration + acceleration / jerk)
+    return (32 * distance / jerk) ** (1 / 3)  # разгон и торможение только рывком
+
+
+class TravelTable:
+    """
+    Время проезда между любыми двумя этажами дома, включая задержку старта.
+    """
+
+    __slots__ = ("profile", "floors_amount", "times", "door_time")
+
+    def __init__(self, profile, floors_amount, floor_height=3.0):
+        """
+        :param profile: KinematicProfile
+        :param floors_amount: int, количество этажей
+        :param floor_height: float или последовательность float - высота этажа (одна на все или по этажам), метры
+        """
+        if isinstance(floor_height, (int, float)):
+            floor_height = [floor_height] * floors_amount
+        levels = [0.0]
+        for height in floor_height[:floors_amount - 1]:
+            levels.append(levels[-1] + height)
+        by_distance = {}
+        self.profile = profile
+        self.floors_amount = floors_amount
+        self.times = array("d", bytes(8 * floors_amount * floors_amount))
+        for start in range(floors_amount):
+            for end in range(floors_amount):
+                if start == end:
+                    continue
+                distance = round(abs(levels[end] - levels[start]), 6)
+                if distance not in by_distance:
+                    by_distance[distance] = profile.start_delay + travel_time(distance, profile)
+                self.times[start * floors_amount + end] = by_distance[distance]
+        self.door_time = profile.door_open + profile.door_close
+
+    def time(self, start, end):
+        """
+        :param start: int, этаж отправления (с 1)
+        :param end: int, этаж назначения (с 1)
+        :return: float, секунды
+        """
+        return self.times[(start - 1) * self.floors_amount + end - 1]
+
+    def rows(self):
+        """
+        Таблица списком строк (для вывода и проверки).
+
+        :return: list of list of float
+        """
+        n = self.floors_amount
+        return [list(self.times[row * n:(row + 1) * n]) for row in range(n)]
+
+
+_TABLES = {}
+
+
+def travel_table(profile, floors_amount, floor_height=3.0):
+    """
+    Таблица для типа лифта и типа дома, общая для всех таких лифтов.
+
+    :param profile: KinematicProfile или имя из CAR_TYPES
+    :param floors_amount: int
+    :param floor_height: float или кортеж высот этажей, метры
+    :return: TravelTable
+    """
+    if isinstance(profile, str):
+        if profile not in CAR_TYPES:
+            raise ValueError(f"unknown car type: {profile}, available: {', '.join(CAR_TYPES)}")
+        profile = CAR_TYPES[profile]
+    if not isinstance(floor_height, (int, float)):
+        floor_height = tuple(floor_height)
+    key = (profile, floors_amount, floor_height)
+    table = _TABLES.get(key)
+    if table is None:
+        table = _TABLES[key] = TravelTable(profile, floors_amount, floor_height)
+    return table
+
+
+def configure(elevators, profile, floor_height=3.0):
+    """
+    Переводит лифты на кинематическую модель.
+
+    :param elevators: list of Elevator
+    :param profile: KinematicProfile или имя из CAR_TYPES
+    :param floor_height: float или кортеж высот этажей, метры
+    :return: None
+    """
+    for elevator in elevators:
+        table = travel_table(profile, elevator.floors_amount, floor_height)
+        elevator.travel_table = table
+        elevator.door_time = table.door_time
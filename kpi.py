@@ -0,0 +1,221 @@
+"""
+Оперативные показатели (KPI) парка лифтов, считающиеся на лету.
+
+На каждое событие тратится O(1): счётчик вызовов в кольце посекундных слотов, сумма и эскиз распределения времени
+ожидания. Эскиз QuantileSketch хранит логарифмические корзины с относительной точностью 1%, а не все значения, и
+складывается, поэтому показатели по всему парку получаются слиянием показателей домов. Глубина очереди и загрузка
+лифтов снимаются с модели при обновлении панели (раз в секунду), а не на каждое событие.
+"""
+import math
+
+from model import EVENT_CALL
+from stats import TripSink
+
+
+class QuantileSketch:
+    """
+    Эскиз распределения с относительной точностью (в духе DDSketch): значение попадает в корзину
+    ceil(log(x) / log(gamma)), квантиль восстанавливается с относительной ошибкой не больше accuracy.
+    """
+
+    __slots__ = ("gamma", "log_gamma", "buckets", "zeros", "count")
+
+    def __init__(self, accuracy=0.01):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}  # номер корзины -> количество
+        self.zeros = 0  # значения <= 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        """
+        Добавляет в эскиз значения другого эскиза с той же точностью.
+
+        :param other: QuantileSketch
+        :return: self
+        """
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        return self
+
+    def quantile(self, q):
+        """
+        :param q: float, от 0 до 1
+        :return: float или None, если значений нет
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zeros:
+            return 0.0
+        seen = self.zeros
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class WindowRate:
+    """
+    Количество событий за последние window секунд: кольцо посекундных слотов.
+    """
+
+    __slots__ = ("window", "counts", "seconds")
+
+    def __init__(self, window=60):
+        self.window = window
+        self.counts = [0] * window
+        self.seconds = [-1] * window  # какой секунде принадлежит слот
+
+    def add(self, now):
+        second = int(now)
+        slot = second % self.window
+        if self.seconds[slot] != second:
+            self.seconds[slot] = second
+            self.counts[slot] = 0
+        self.counts[slot] += 1
+
+    def total(self, now):
+        oldest = int(now) - self.window
+        return sum(count for count, second in zip(self.counts, self.seconds) if second > oldest)
+
+
+class HouseKpi:
+    """
+    Накопленные показатели одного дома (или всего парка).
+    """
+
+    __slots__ = ("calls", "rate", "served", "wait_total", "waits", "busy", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.rate = WindowRate(60)
+        self.served = 0
+        self.wait_total = 0.0
+        self.waits = QuantileSketch()
+        self.busy = 0.0  # сглаженная доля занятых лифтов
+        self.samples = 0
+
+
+class KpiCollector(TripSink):
+    """
+    Сборщик KPI по домам (улица, дом) и по всему парку. Подключается как приёмник (attach/detach/close).
+    """
+
+    def __init__(self, clock, tracker=None, smoothing=0.1):
+        """
+        :param clock: функция без аргументов, время цикла событий
+        :param tracker: TripTracker, если он уже есть (например, в Simulation); иначе создаётся свой
+        :param smoothing: float, коэффициент сглаживания загрузки за одно обновление
+        """
+        super().__init__(clock, tracker)
+        self.smoothing = smoothing
+        self.houses = {}  # (улица, дом) -> HouseKpi
+
+    def attach(self, elevators, controller):
+        super().attach(elevators, controller)
+        for elevator in elevators:
+            elevator.register_event_observer(self.on_event)
+            self.houses.setdefault((elevator.street_id, elevator.house_id), HouseKpi())
+
+    def detach(self, elevators, controller):
+        for elevator in elevators:
+            elevator.event_callbacks.remove(self.on_event)
+        super().detach(elevators, controller)
+
+    def on_event(self, elevator, kind, floor, value):
+        if kind == EVENT_CALL:
+            house = self.houses[(elevator.street_id, elevator.house_id)]
+            house.calls += 1
+            house.rate.add(self.clock())
+
+    def on_trip(self, trip):
+        if trip.call_time is None:
+            return
+        house = self.houses[(trip.street_id, trip.house_id)]
+        house.served += 1
+        wait = trip.pickup_time - trip.call_time
+        house.wait_total += wait
+        house.waits.add(wait)
+
+    def sample(self):
+        """
+        Снимает с модели загрузку лифтов. Вызывается с низкой фиксированной частотой.
+
+        :return: None
+        """
+        busy = {}
+        total = {}
+        for elevator in self.elevators:
+            key = (elevator.street_id, elevator.house_id)
+            total[key] = total.get(key, 0) + 1
+            busy[key] = busy.get(key, 0) + (elevator.target_floor is not None)
+        for key, count in total.items():
+            house = self.houses[key]
+            share = busy[key] / count
+            house.busy = share if not house.samples else house.busy + self.smoothing * (share - house.busy)
+            house.samples += 1
+
+    def snapshot(self):
+        """
+        Показатели по домам и по парку.
+
+        :return: dict с ключами "houses" ({(улица, дом): показатели}) и "fleet"
+        """
+        now = self.clock()
+        depth = {}
+        for elevator in self.elevators:
+            key = (elevator.street_id, elevator.house_id)
+            depth[key] = depth.get(key, 0) + elevator.floors_queue.qsize()
+
+        fleet = HouseKpi()
+        fleet_rate = 0
+        fleet_busy = 0.0
+        houses = {}
+        for key, house in self.houses.items():
+            rate = house.rate.total(now)
+            houses[key] = self._row(house, rate, depth.get(key, 0), house.busy)
+            fleet.calls += house.calls
+            fleet.served += house.served
+            fleet.wait_total += house.wait_total
+            fleet.waits.merge(house.waits)
+            fleet_rate += rate
+            fleet_busy += house.busy
+        busy = fleet_busy / len(self.houses) if self.houses else 0.0
+        return {"houses": houses, "fleet": self._row(fleet, fleet_rate, sum(depth.values()), busy)}
+
+    @staticmethod
+    def _row(house, rate, depth, busy):
+        return {
+            "calls": house.calls,
+            "calls_per_minute": rate,
+            "served": house.served,
+            "wait_mean": house.wait_total / house.served if house.served else None,
+            "wait_p95": house.waits.quantile(0.95),
+            "queue_depth": depth,
+            "utilisation": busy,
+        }
+
+
+def format_kpi(row):
+    """
+    Строка KPI для панели окна.
+
+    :param row: dict, строка из KpiCollector.snapshot()
+    :return: str
+    """
+    wait_mean = "-" if row["wait_mean"] is None else f"{row['wait_mean']:.0f} с"
+    wait_p95 = "-" if row["wait_p95"] is None else f"{row['wait_p95']:.0f} с"
+    return (f"вызовов/мин {row['calls_per_minute']}, ожидание ср. {wait_mean}, p95 {wait_p95}, "
+            f"в очереди {row['queue_depth']}, загрузка {row['utilisation'] * 100:.0f}%")
@@ -0,0 +1,216 @@
+"""
+Инструменты наблюдения за циклом событий asyncio (в том числе qasync QEventLoop).
+
+LoopMonitor умеет:
+* измерять задержку цикла - насколько позже запланированного просыпается периодическая задача;
+* считать время, которое каждая корутина (simulate_queue, lift_simulation, ...) проводит в цикле за один шаг;
+* запоминать медленные обратные вызовы, которые держат цикл дольше порога.
+
+Включается и выключается на ходу (enable/disable). Учёт шагов стоит два вызова perf_counter и одно обновление
+словаря на каждый обратный вызов, поэтому его можно оставлять включённым.
+
+Публичного перехватчика шагов у asyncio нет, поэтому на время работы мониторов подменяется asyncio.Handle._run:
+подмена ставится первым enable() и снимается последним disable(), а обратные вызовы циклов без включённого монитора
+(в том числе других потоков) выполняются как есть. Если в этой версии Python у Handle нет _run, enable() бросает
+RuntimeError, а не молча работает без учёта.
+"""
+import asyncio
+import logging
+import time
+from asyncio import events
+from collections import deque
+
+_original_run = None  # Handle._run до подмены, None - не подменён
+_monitors = {}  # цикл -> LoopMonitor
+_logger = logging.getLogger("lift.loop")
+
+
+def _monitored_run(self):
+    monitor = _monitors.get(events._get_running_loop())
+    if monitor is None:
+        return _original_run(self)
+    started = time.perf_counter()
+    try:
+        return _original_run(self)
+    finally:
+        monitor.account(self._callback, time.perf_counter() - started)
+
+
+def _patch():
+    global _original_run
+    if _original_run is not None:
+        return
+    run = getattr(events.Handle, "_run", None)
+    if run is None:
+        raise RuntimeError("asyncio.Handle._run is missing in this Python version, LoopMonitor cannot account "
+                           "callbacks")
+    _original_run = run
+    events.Handle._run = _monitored_run
+
+
+def _unpatch():
+    global _original_run
+    if events.Handle._run is _monitored_run:  # поверх подмены никто не поставил свою
+        events.Handle._run = _original_run
+        _original_run = None
+
+
+def callback_name(callback, per_task=False):
+    """
+    Имя для учёта обратного вызова. Шаг задачи учитывается по имени её корутины (или по имени задачи).
+
+    :param callback: обратный вызов из asyncio.Handle
+    :param per_task: bool, различать задачи по имени, а не по корутине
+    :return: str
+    """
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        if per_task:
+            return owner.get_name()
+        coro = owner.get_coro()
+        return getattr(coro, "__qualname__", None) or repr(coro)
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+class LoopMonitor:
+    """
+    Монитор одного цикла событий.
+    """
+
+    def __init__(self, loop=None, lag_interval=0.25, slow_callback=0.05, slow_log_size=200, per_task=False):
+        """
+        :param loop: цикл событий, по умолчанию текущий
+        :param lag_interval: float, период замера задержки цикла в секундах
+        :param slow_callback: float, порог медленного обратного вызова в секундах
+        :param slow_log_size: int, сколько последних медленных вызовов хранить
+        :param per_task: bool, вести учёт по отдельным задачам, а не по корутинам
+        """
+        self.loop = loop or asyncio.get_event_loop()
+        self.lag_interval = lag_interval
+        self.slow_callback = slow_callback
+        self.per_task = per_task
+        self.slow_log = deque(maxlen=slow_log_size)  # (время цикла, имя, длительность)
+        self.slices = {}  # имя -> [количество шагов, суммарное время, максимальное время]
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self.lag_total = 0.0
+        self.lag_samples = 0
+        self._lag_task = None
+
+    @property
+    def enabled(self):
+        return _monitors.get(self.loop) is self
+
+    def enable(self):
+        """
+        Включает учёт шагов и замер задержки цикла.
+
+        :return: None
+        """
+        if self.enabled:
+            return
+        _patch()
+        _monitors[self.loop] = self
+        self._lag_task = self.loop.create_task(self.sample_lag(), name="loop_monitor.sample_lag")
+
+    def disable(self):
+        """
+        Выключает монитор. Накопленная статистика сохраняется до reset().
+
+        :return: None
+        """
+        if not self.enabled:
+            return
+        del _monitors[self.loop]
+        if not _monitors:
+            _unpatch()
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+
+    def reset(self):
+        self.slow_log.clear()
+        self.slices.clear()
+        self.lag_last = self.lag_max = self.lag_total = 0.0
+        self.lag_samples = 0
+
+    def account(self, callback, duration):
+        """
+        Учитывает один выполненный обратный вызов.
+
+        :param callback: обратный вызов
+        :param duration: float, длительность в секундах (по perf_counter)
+        :return: None
+        """
+        name = callback_name(callback, self.per_task)
+        entry = self.slices.get(name)
+        if entry is None:
+            self.slices[name] = [1, duration, duration]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+            if duration > entry[2]:
+                entry[2] = duration
+        if duration >= self.slow_callback:
+            self.slow_log.append((self.loop.time(), name, duration))
+            if _logger.hasHandlers():
+                _logger.warning("slow callback %s %.3f s", name, duration,
+                                extra={"callback": name, "duration": duration})
+
+    async def sample_lag(self):
+        """
+        Периодическая задача замера задержки: разница между запланированным и фактическим временем пробуждения.
+
+        :return: None
+        """
+        while True:
+            expected = self.loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            lag = max(0.0, self.loop.time() - expected)
+            self.lag_last = lag
+            self.lag_total += lag
+            self.lag_samples += 1
+            if lag > self.lag_max:
+                self.lag_max = lag
+
+    def stats(self, top=None):
+        """
+        Снимок статистики.
+
+        :param top: int, оставить только top самых затратных корутин
+        :return: dict
+        """
+        slices = sorted(self.slices.items(), key=lambda item: item[1][1], reverse=True)
+        if top is not None:
+            slices = slices[:top]
+        return {
+            "enabled": self.enabled,
+            "lag": {
+                "last": self.lag_last,
+                "max": self.lag_max,
+                "mean": self.lag_total / self.lag_samples if self.lag_samples else 0.0,
+                "samples": self.lag_samples,
+            },
+            "slices": [{"name": name, "calls": calls, "total": total, "max": longest}
+                       for name, (calls, total, longest) in slices],
+            "slow": [{"time": at, "name": name, "duration": duration} for at, name, duration in self.slow_log],
+        }
+
+    def summary_line(self):
+        """
+        Короткая строка для строки состояния окна.
+
+        :return: str
+        """
+        text = f"Задержка цикла: {self.lag_last * 1000:.1f} мс (макс. {self.lag_max * 1000:.1f} мс)"
+        if self.slices:
+            name, (calls, total, longest) = max(self.slices.items(), key=lambda item: item[1][1])
+            text += f", больше всего времени: {name} ({total:.2f} с за {calls} шагов)"
+        return text
@@ -1,16 +1,37 @@
 import asyncio
+import os
 import sys
+import time
 from pathlib import Path
-from queue import Queue
-from random import randint
+from random import Random, randrange
 
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QIcon
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget
+from PyQt5.QtWidgets import (QAction, QApplication, QDockWidget, QLabel, QMainWindow, QTableWidget, QTableWidgetItem,
+                             QVBoxLayout, QWidget)
 from faker import Faker
 from qasync import QEventLoop, asyncSlot
 
+import checkpoint
+from call_trace import TraceRecorder
+from event_log import EventLog
+from forecast import DemandForecaster, Prepositioner
 from generated_3floor_lift import Ui_Form as Ui_Form_3floors
 from generated_ui import Ui_MainWindow
+from history import HistoryReader, HistoryStore
+from kpi import KpiCollector, format_kpi
+from loop_monitor import LoopMonitor
+from metrics import MetricsSink
+from model import Elevator, ElevatorController, House
+from operator_api import OperatorApi
+from remote import RemoteFleet
+from shared_state import FleetStateWriter
+from shutdown import ShutdownReport, log_report, shutdown
+from sim_logging import LoggingSink, LogService, parse_levels
+from stats import TripTracker
+from traffic import CallGenerator
+from trip_export import TripExporter
+from ws_stream import StateStream
 
 
 class MainWindow(QMainWindow):
@@ -20,7 +41,8 @@ class MainWindow(QMainWindow):
     события asyncio.
     """
 
-    def __init__(self, loop, elevators, controller, elevator_views, houses, stopped, run_again):
+    def __init__(self, loop, elevators, controller, elevator_views, houses, stopped, run_again, rng=None, seed=None,
+                 sinks=(), remote=None, snapshot=None):
         super().__init__()
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
@@ -35,12 +57,23 @@ class MainWindow(QMainWindow):
         self.houses = houses
         self.stopped = stopped
         self.run_again = run_again
+        self.seed = seed
+        self.calls = CallGenerator(rng)  # генератор случайных вызовов
+        self.recorder = None  # запись трассы вызовов, если задан LIFT_TRACE
+        self.sinks = list(sinks)  # журналы событий, подключаются на время симуляции
+        self.monitor = LoopMonitor(self.loop)  # мониторинг цикла событий, включается из меню
+        self.remote = remote  # клиент сервера симуляции (remote.RemoteFleet), если симуляция в отдельном процессе
 
         # Обновим информацию в интерфейсе
         self.initiate_ui_values()
 
         self.lift_window = None
         self.is_running = False
+        self.lift_tasks = []
+        self.queue_tasks = []
+        self.attached = False  # приёмники подключены к модели (идёт симуляция)
+        self.closing = None  # задача завершения при закрытии окна
+        self.shut_down = False  # shutdown() закончился, окно можно закрыть
 
         # Прикрепим к кнопкам соответствующие функции
         self.ui.simultation_btn.clicked.connect(self.simulation_status)  # кнопка статуса симуляции
@@ -48,6 +81,169 @@ class MainWindow(QMainWindow):
             lift_button = getattr(self.ui, f"lift_{i}")
             lift_button.clicked.connect(lambda _, id=i: self.open_lift_window(id))
 
+        self.monitor_action = QAction("Мониторинг цикла событий", self, checkable=True)
+        self.monitor_action.toggled.connect(self.toggle_monitor)
+        self.ui.menubar.addAction(self.monitor_action)
+        if os.environ.get("LIFT_LOOP_MONITOR"):
+            self.monitor_action.setChecked(True)
+        if self.seed is not None:
+            self.ui.statusbar.showMessage(f"Зерно симуляции: {self.seed}")
+
+        self.state_reader = None
+        self.state_version = -1
+        self.state_timer = None
+        self.kpi = None
+        self.metrics = None
+        self.stream = None
+        self.api = None
+        if self.remote is not None:
+            # симуляция в другом процессе: окна лифтов рисуются по пачкам изменений сервера
+            self.attach_state_reader(self.remote)
+        else:
+            # Поездки (вызов - подбор - высадка) для панели показателей и метрик
+            self.tracker = TripTracker(self.loop.time, len(self.elevators))
+            for elevator in self.elevators:
+                elevator.register_event_observer(self.tracker)
+            if snapshot is not None:  # парк восстановлен из снимка (checkpoint.apply) - его незавершённые вызовы
+                checkpoint.apply_calls(snapshot, self.tracker)
+
+            # Панель оперативных показателей, обновляется раз в секунду
+            self.kpi = KpiCollector(self.loop.time, self.tracker)
+            self.sinks.append(self.kpi)
+            self.init_kpi_panel()
+
+            # Метрики для Prometheus (LIFT_METRICS_PORT=порт)
+            self.metrics_port = int(os.environ.get("LIFT_METRICS_PORT", 0))
+            if self.metrics_port:
+                self.metrics = MetricsSink(self.loop.time, self.tracker, self.monitor)
+                self.sinks.append(self.metrics)
+
+            # Колоночный экспорт поездок (LIFT_TRIP_EXPORT=каталог), время - абсолютное
+            if os.environ.get("LIFT_TRIP_EXPORT"):
+                self.sinks.append(TripExporter(os.environ["LIFT_TRIP_EXPORT"], self.loop.time, self.tracker,
+                                               time_offset=time.time() - self.loop.time()))
+            # История в SQLite (LIFT_HISTORY=файл базы)
+            if os.environ.get("LIFT_HISTORY"):
+                self.sinks.append(HistoryStore(os.environ["LIFT_HISTORY"], self.loop.time, self.tracker,
+                                               time_offset=time.time() - self.loop.time()))
+            # Упреждающая расстановка свободных лифтов по прогнозу вызовов (LIFT_PREPOSITION=1); прогноз учится на
+            # лету и на истории LIFT_HISTORY, время суток - местное
+            if os.environ.get("LIFT_PREPOSITION"):
+                gmtoff = time.localtime().tm_gmtoff
+                forecaster = DemandForecaster(self.loop.time, time_offset=time.time() - self.loop.time() + gmtoff)
+                if os.environ.get("LIFT_HISTORY") and os.path.exists(os.environ["LIFT_HISTORY"]):
+                    reader = HistoryReader(os.environ["LIFT_HISTORY"])
+                    try:
+                        forecaster.learn(reader, since=time.time() - 28 * 86400, time_offset=gmtoff)
+                    finally:
+                        reader.close()
+                self.sinks.append(forecaster)
+                self.sinks.append(Prepositioner(forecaster))
+            # Состояние парка в разделяемой памяти для других процессов (LIFT_SHARED_STATE=имя блока)
+            if os.environ.get("LIFT_SHARED_STATE"):
+                self.sinks.append(FleetStateWriter(len(self.elevators), self.houses[0].floors_amount,
+                                                   os.environ["LIFT_SHARED_STATE"]))
+            # Поток состояния по WebSocket для панелей в браузере (LIFT_WS_PORT=порт)
+            self.stream_port = int(os.environ.get("LIFT_WS_PORT", 0))
+            if self.stream_port:
+                self.stream = StateStream(len(self.elevators))
+                self.sinks.append(self.stream)
+            # Команды оператора по HTTP (LIFT_API_PORT=порт), идут через окна лифтов, как нажатия кнопок
+            self.api_port = int(os.environ.get("LIFT_API_PORT", 0))
+            if self.api_port:
+                self.api = OperatorApi(self.controller, self.houses, self.elevator_views)
+            # Периодические снимки состояния парка (LIFT_CHECKPOINT=файл, LIFT_CHECKPOINT_INTERVAL=секунды)
+            if os.environ.get("LIFT_CHECKPOINT"):
+                self.sinks.append(checkpoint.Checkpointer(os.environ["LIFT_CHECKPOINT"], self.houses, self.loop.time,
+                                                          float(os.environ.get("LIFT_CHECKPOINT_INTERVAL", 60)),
+                                                          self.tracker, self.calls.rng))
+
+    def init_kpi_panel(self):
+        """
+        Создаёт панель KPI: строка по всему парку и таблица по домам.
+
+        :return: None
+        """
+        self.kpi_fleet_label = QLabel("Симуляция не запущена")
+        self.kpi_fleet_label.setWordWrap(True)
+        self.kpi_table = QTableWidget(0, 7)
+        self.kpi_table.setHorizontalHeaderLabels(["Улица", "Дом", "Вызовов/мин", "Ожидание ср., с", "p95, с",
+                                                  "В очереди", "Загрузка, %"])
+        self.kpi_table.verticalHeader().setVisible(False)
+        panel = QWidget()
+        layout = QVBoxLayout(panel)
+        layout.addWidget(self.kpi_fleet_label)
+        layout.addWidget(self.kpi_table)
+        dock = QDockWidget("Показатели", self)
+        dock.setWidget(panel)
+        self.addDockWidget(Qt.RightDockWidgetArea, dock)
+
+        self.kpi_timer = QTimer(self)
+        self.kpi_timer.timeout.connect(self.update_kpi_panel)
+        self.kpi_timer.start(1000)
+
+    def update_kpi_panel(self):
+        """
+        Обновляет панель KPI. Значения считаются на лету сборщиком, здесь они только снимаются и выводятся.
+
+        :return: None
+        """
+        if not self.is_running or not self.kpi.elevators:
+            return
+        self.kpi.sample()
+        snapshot = self.kpi.snapshot()
+        self.kpi_fleet_label.setText(f"Весь парк: {format_kpi(snapshot['fleet'])}")
+        houses = sorted(snapshot["houses"].items())
+        self.kpi_table.setRowCount(len(houses))
+        for row, ((street_id, house_id), values) in enumerate(houses):
+            cells = (street_id, house_id, values["calls_per_minute"], values["wait_mean"], values["wait_p95"],
+                     values["queue_depth"], values["utilisation"] * 100)
+            for column, value in enumerate(cells):
+                text = "-" if value is None else f"{value:.0f}" if isinstance(value, float) else str(value)
+                item = self.kpi_table.item(row, column)
+                if item is None:
+                    item = QTableWidgetItem()
+                    self.kpi_table.setItem(row, column, item)
+                item.setText(text)
+
+    def attach_state_reader(self, reader, interval=50):
+        """
+        Переключает окна лифтов на чтение состояния из разделяемой памяти (симуляция в другом процессе).
+        Открытые окна перерисовываются с частотой таймера, и только если состояние изменилось.
+
+        :param reader: shared_state.FleetStateReader
+        :param interval: int, период опроса в миллисекундах
+        :return: None
+        """
+        self.state_reader = reader
+        self.state_timer = QTimer(self)
+        self.state_timer.timeout.connect(self.update_from_state)
+        self.state_timer.start(interval)
+
+    def update_from_state(self):
+        version = self.state_reader.version
+        if version == self.state_version:
+            return
+        self.state_version = version
+        for view in self.elevator_views:
+            if view.isVisible():
+                state = self.state_reader.read(view.elevator_id)
+                if state is not None:
+                    view.apply_state(state)
+
+    def toggle_monitor(self, checked):
+        """
+        Включает/выключает мониторинг цикла событий. Сводка выводится в строку состояния раз в секунду.
+
+        :param checked: bool, включить
+        :return: None
+        """
+        if checked:
+            self.monitor.enable()
+        else:
+            self.monitor.disable()
+            self.ui.statusbar.clearMessage()
+
     @asyncSlot()
     async def elevators_simulation(self):
         """
@@ -57,12 +253,28 @@ class MainWindow(QMainWindow):
 
         :return: None
         """
-        lift_tasks = []
-        queue_tasks = []
+        trace_path = os.environ.get("LIFT_TRACE")
+        if trace_path and self.seed is not None:
+            self.recorder = TraceRecorder(trace_path, self.seed, len(self.elevators), self.houses[0].floors_amount,
+                                          self.loop.time)
+            self.recorder.attach(self.elevators, self.controller)
+        for sink in self.sinks:
+            sink.attach(self.elevators, self.controller)
+        self.attached = True
+        if self.metrics is not None:
+            await self.metrics.start_server(port=self.metrics_port)
+        if self.stream is not None:
+            await self.stream.start_server(port=self.stream_port)
+        if self.api is not None:
+            await self.api.start_server(port=self.api_port)
+
+        self.lift_tasks = lift_tasks = []
+        self.queue_tasks = queue_tasks = []
         for id in range(1, 64 + 1):
-            lift_tasks.append(asyncio.create_task(self.lift_simulation(elevator_id=id)))
+            lift_tasks.append(asyncio.create_task(self.lift_simulation(elevator_id=id), name=f"lift_simulation-{id}"))
             # обращаемся через контроллер
-            queue_tasks.append(asyncio.create_task(self.controller.elevators[id - 1].simulate_queue()))
+            queue_tasks.append(asyncio.create_task(self.controller.elevators[id - 1].simulate_queue(),
+                                                   name=f"simulate_queue-{id}"))
 
         self.is_running = True
         while self.is_running:
@@ -76,15 +288,33 @@ class MainWindow(QMainWindow):
                 self.houses[id - 1].right_calls = [False] * self.houses[id - 1].floors_amount
                 self.elevator_views[id - 1].update_checkboxes()
             for id in self.run_again[::-1]:  # перезапустить задачи
-                lift_tasks.insert(id - 1, asyncio.create_task(self.lift_simulation(elevator_id=id)))
-                queue_tasks.insert(id - 1, asyncio.create_task(self.controller.elevators[id - 1].simulate_queue()))
+                lift_tasks.insert(id - 1, asyncio.create_task(self.lift_simulation(elevator_id=id),
+                                                              name=f"lift_simulation-{id}"))
+                queue_tasks.insert(id - 1, asyncio.create_task(self.controller.elevators[id - 1].simulate_queue(),
+                                                               name=f"simulate_queue-{id}"))
                 del self.run_again[-1]
+            if self.monitor.enabled:
+                self.ui.statusbar.showMessage(self.monitor.summary_line())
             await asyncio.sleep(1.0, self.loop)
+        if self.closing is not None:  # окно закрывается: задачи и приёмники завершает shutdown()
+            return
 
         for task in lift_tasks:
             task.cancel()
         for task in queue_tasks:
             task.cancel()
+        for sink in self.sinks:
+            sink.detach(self.elevators, self.controller)
+        self.attached = False
+        if self.metrics is not None:
+            await self.metrics.stop_server()
+        if self.stream is not None:
+            await self.stream.stop_server()
+        if self.api is not None:
+            await self.api.stop_server()
+        if self.recorder is not None:
+            self.recorder.detach(self.elevators, self.controller)
+            self.recorder.close()
 
     async def lift_simulation(self, elevator_id):
         """
@@ -97,28 +327,25 @@ class MainWindow(QMainWindow):
         elevator = self.controller.elevators[elevator_id - 1]
         house = self.houses[elevator_id - 1]
         while True:
-            a = randint(1, 100)
-            if a <= 13:  # 13% на появление вызова
-                floor = randint(1, house.floors_amount) - 1
-                # для простоты сделаем так, чтобы человек вызывал лифт на этаже только с одной стороны
-                if not (house.left_calls[floor] or house.right_calls[floor]):
-                    if a % 2 == 1:
-                        house.left_calls[floor] = True
-                    else:
-                        house.right_calls[floor] = True
-                    self.elevator_views[elevator_id - 1].update_checkboxes()
-
-                    elevator.floors_queue.put(floor + 1)
+            call = self.calls.generate(house)
+            if call is not None:
+                self.elevator_views[elevator_id - 1].update_checkboxes()
+                elevator.put_call(*call)
             await asyncio.sleep(1.0)
 
     def simulation_status(self):
         if self.is_running:
             self.ui.simultation_btn.setText("Начать симуляцию")
             self.is_running = False
+            if self.remote is not None:
+                self.remote.set_running(False)
         else:
             self.ui.simultation_btn.setText("Остановить симуляцию")
             self.is_running = True
-            self.elevators_simulation()  # начинает симуляцию лифтов после нажатия кнопки
+            if self.remote is not None:
+                self.remote.set_running(True)  # симуляция идёт в процессе сервера
+            else:
+                self.elevators_simulation()  # начинает симуляцию лифтов после нажатия кнопки
 
     def initiate_ui_values(self):
         """
@@ -138,209 +365,57 @@ class MainWindow(QMainWindow):
             live = getattr(self.ui, f"live1_{i}")
             live.setText(f"Жильцов - {self.houses[i - 1].live}")
 
-    def closeEvent(self, event):
-        self.loop.exec()  # по сути raise error
-        event.accept()  # Принимаем событие закрытия
-
-    def open_lift_window(self, id):
-        self.elevator_views[id - 1].show()  # просто показывает окно с лифтом
-
-
-class House:
-    """
-    Класс дома. Хранит в себе вызовы лифта, к которым обращаются остальные классы.
-    """
-
-    def __init__(self, street_id, house_id, floors_amount, live):
-        # Расположение
-        self.street_id = street_id
-        self.house_id = house_id
-
-        # Технические хар-ки
-        self.live = live  # количество жителей
-
-        # Переменные логики
-        self.floors_amount = floors_amount
-        self.left_calls = [False] * floors_amount
-        self.right_calls = [False] * floors_amount
-
-
-class Elevator:
-    """
-    Класс модели лифта. Обрабатывает очередь вызовов и уведомляет о результате соответствующим наблюдателям.
-    """
-
-    def __init__(self, street_id, house_id, elevator_id, capacity, floors_amount):
-        # Расположение
-        self.street_id = street_id
-        self.house_id = house_id
-        self.elevator_id = elevator_id
-
-        # Количество этажей в доме с этим лифтом
-        self.floors_amount = floors_amount
-
-        # Технические хар-ки
-        self.capacity = capacity  # грузоподьёмность
-        self.passengers = 0  # количество пассажиров внутри
-        self.door_status = False  # двери открыты/закрыты
-        self.lift_status = True  # состояние лифта вкл/выкл
-
-        # Переменные логики
-        self.current_floor = 1
-        self.target_floor = None
-        self.floors_queue = Queue()
-
-        # Важная часть, для общения между моделью и контроллером:
-        self.scroll_callback = None
-        self.checkers_callback = None
-        self.door_status_callback = None
-
-        # Состояние лифта
-        self.is_running = True
-
-    async def simulate_queue(self):
-        """
-        Асинхронная симуляция обработки очереди. Пока очередь не пустая, то:
-        1. Достает первый вызов из очереди и едет на соответствующий этаж.
-        2. Забирает пассажиров.
-        3. Спускается обратно.
-
-        :return: None
-        """
-        step = 100 // (self.floors_amount - 1)
-        while self.is_running:
-            while not (self.floors_queue.empty()):
-                # Сначала добираемся до этажа, а потом вниз спускаемся
-                # Для простоты по пути не останавливаясь
-                self.target_floor = self.floors_queue.get()
-                status = self.notify_observer_sc(False)
-                if not (self.target_floor == self.current_floor):
-                    self.notify_observer_ck(self.current_floor)
-                    for i in range(abs(self.target_floor - self.current_floor)):
-                        if self.target_floor > self.current_floor:
-                            for j in range(10):
-                                status += step / 10
-                                self.notify_observer_sc(status)
-                                await asyncio.sleep(6.0 / 10)
-                            self.move_to_floor(self.current_floor + 1)  # вверх
-                        else:
-                            for j in range(10):
-                                status -= step / 10
-                                self.notify_observer_sc(status)
-                                await asyncio.sleep(6.0 / 10)
-                            self.move_to_floor(self.current_floor - 1)  # вниз
-                    self.notify_observer_ds(True)
-                    await asyncio.sleep(3.0)
-                    self.notify_observer_ds(False)
-                    self.notify_observer_sc(status)
-
-                    self.notify_observer_ck(self.current_floor)
-
-                    for i in range(abs(1 - self.current_floor)):
-                        for j in range(10):
-                            status -= step / 10
-                            self.notify_observer_sc(status)
-                            await asyncio.sleep(6.0 / 10)
-                        self.move_to_floor(self.current_floor - 1)  # вниз
-                else:
-                    self.notify_observer_ck(self.current_floor)
-
-                self.notify_observer_ds(True)  # Двери открыты
-                await asyncio.sleep(3.0)
-                self.notify_observer_ds(False)  # Двери закрыты
-                self.notify_observer_sc(status)  # Обновили положение лифта
-                self.notify_observer_ck(self.current_floor)  # Обновили вызовы
-            self.target_floor = None
-            await asyncio.sleep(1.0)
-
-    def move_to_floor(self, target_floor):
+    async def shutdown(self):
         """
-        Изменяет текущий этаж лифта.
+        Упорядоченное завершение перед закрытием окна (см. shutdown.py): последний снимок, если включены снимки,
+        отмена задач лифтов, остановка серверов, отключение и закрытие приёмников - не дольше
+        LIFT_SHUTDOWN_BUDGET секунд (по умолчанию 5). Затем окно закрывается.
 
-        :param target_floor: int, этаж
         :return: None
         """
-        self.current_floor = target_floor
-
-    def change_elevator_status(self):
-        """
-        Изменяет состояние лифта.
-
-        :return: None
-        """
-        if self.lift_status:
-            self.lift_status = False
-        else:
-            self.lift_status = True
-
-    def change_door_status(self):
-        """
-        Изменяет состояние дверей лифта/
-
-        :return: None
-        """
-        if self.door_status:
-            self.door_status = False
+        self.is_running = False
+        budget = float(os.environ.get("LIFT_SHUTDOWN_BUDGET", 5.0))
+        if self.remote is not None:
+            started = time.monotonic()
+            errors = []
+            try:
+                await asyncio.wait_for(self.remote.close(), budget)
+            except asyncio.TimeoutError:
+                errors.append((type(self.remote).__name__, "close timed out"))
+            report = ShutdownReport(time.monotonic() - started, None, 0, 0, [], errors, bool(errors))
         else:
-            self.door_status = True
-
-    # далее идут функции регистрации наблюдателей за конкретными действиями:
-    def register_sc_observer(self, callback):
-        self.scroll_callback = callback
-
-    def register_ck_observer(self, callback):
-        self.checkers_callback = callback
-
-    def register_ds_observer(self, callback):
-        self.door_status_callback = callback
-
-    # и функции уведомления о соответствующем результате:
-    def notify_observer_sc(self, status):
-        return self.scroll_callback(status)
-
-    def notify_observer_ck(self, floor):
-        self.checkers_callback(floor)
-
-    def notify_observer_ds(self, status):
-        self.door_status_callback(status)
-
-
-class ElevatorController:
-    """
-    Класс контроллера, отвечает за взаимодействие между моделью и представлением, а также передает сигналы о
-    случайных событиях asyncio в модель.
-    """
-
-    def __init__(self, elevators):
-        self.elevators = elevators
+            sinks = list(self.sinks)
+            if self.recorder is not None:
+                if self.attached:
+                    self.recorder.detach(self.elevators, self.controller)
+                self.recorder.close()
+            snapshot = None
+            checkpointers = [sink for sink in sinks if isinstance(sink, checkpoint.Checkpointer)]
+            if checkpointers and self.attached:
+                snapshot = checkpointers[0].save
+            servers = [server for server in (self.metrics, self.stream, self.api) if server is not None]
+            report = await shutdown(self.lift_tasks + self.queue_tasks, sinks, self.elevators,
+                                    self.controller if self.attached else None, budget, snapshot, servers)
+            self.attached = False
+        log_report(report)
+        for view in self.elevator_views:  # иначе открытые окна лифтов не дадут приложению завершиться
+            view.close()
+        self.shut_down = True
+        self.close()
 
-    def call_elevator(self, elevator_id, target_floor):
-        """
-        Вызов функции конкретного лифта выезда на этаж target_floor.
-
-        :param elevator_id: int, id лифта
-        :param target_floor: int, номер этажа
-        :return: None
-        """
-        self.elevators[elevator_id - 1].move_to_floor(target_floor)
-
-    def change_elevator_status(self, elevator_id):
-        """
-        Вызов функции изменения статуса конкретного лифта.
-
-        :param elevator_id: int, id лифта
-        :return: None
+    def closeEvent(self, event):
         """
-        self.elevators[elevator_id - 1].change_elevator_status()
-
-    def change_door_status(self, elevator_id):
+        Первое закрытие окна запускает shutdown() и откладывается, окно закрывается, когда оно закончится.
         """
-        Вызов функции изменения статуса дверей конкретного лифта.
+        if self.shut_down:
+            event.accept()
+            return
+        if self.closing is None:
+            self.closing = asyncio.ensure_future(self.shutdown())
+        event.ignore()
 
-        :param elevator_id: int, id лифта
-        :return: None
-        """
-        self.elevators[elevator_id - 1].change_door_status()
+    def open_lift_window(self, id):
+        self.elevator_views[id - 1].show()  # просто показывает окно с лифтом
 
 
 class ElevatorView(QWidget):
@@ -477,6 +552,24 @@ class ElevatorView(QWidget):
         else:
             self.ui.lift_door_status_label.setText("Двери закрыты")
 
+    def apply_state(self, state):
+        """
+        Отображает состояние лифта, прочитанное из разделяемой памяти (shared_state.CarState), вместо уведомлений
+        модели.
+
+        :param state: CarState
+        :return: None
+        """
+        if state.position >= 1:
+            self.status = int(state.position)
+            self.ui.lift_floor_slider_2.setValue(self.status)
+        self.update_door_status(state.door_open)
+        self.ui.lift_status_label.setText("Лифт в рабочем состоянии" if state.lift_on else "Лифт остановлен")
+        for floor, call in enumerate(state.left_calls):
+            getattr(self.ui, f"left_floor_checkbox{floor + 1}").setChecked(call)
+        for floor, call in enumerate(state.right_calls):
+            getattr(self.ui, f"right_floor_checkbox{floor + 1}").setChecked(call)
+
 
 def main():
     app = QApplication(sys.argv)
@@ -487,6 +580,23 @@ def main():
     stopped = []
     run_again = []
 
+    # Симуляция в отдельном процессе (LIFT_REMOTE=адрес:порт сервера, см. remote.py): окно - тонкий клиент
+    if os.environ.get("LIFT_REMOTE"):
+        host, _, port = os.environ["LIFT_REMOTE"].rpartition(":")
+        fleet = loop.run_until_complete(RemoteFleet().connect(host or "127.0.0.1", int(port)))
+        elevator_views = [ElevatorView(fleet.houses, fleet, elevator.elevator_id, floors=fleet.floors_amount,
+                                       stopped=stopped, run_again=run_again) for elevator in fleet.elevators]
+        window = MainWindow(loop, fleet.elevators, fleet, elevator_views, fleet.houses, stopped, run_again,
+                            remote=fleet)
+        window.show()
+        with loop:
+            loop.run_forever()
+        sys.exit(0)
+
+    # Зерно генератора случайных чисел, по нему прогон можно повторить (LIFT_SEED=... python main.py)
+    seed = int(os.environ.get("LIFT_SEED", randrange(2 ** 32)))
+    rng = Random(seed)
+
     # Создадим классы лифтов, контроллеров и интерфейсов, а также классы самих домов
     num_elevators = 4 * 4 * 4
     elevators = []
@@ -495,24 +605,45 @@ def main():
         street_id = (id + 4 - 1) // 2 + 1
         house_id = id % 4 + 1
         floors_amount = 3  # для удоства достаточно 3-этажных домов
-        live = randint(100, 999)
-        capacity = randint(6, 14) * 50
+        live = rng.randint(100, 999)
+        capacity = rng.randint(6, 14) * 50
 
         elevators.append(Elevator(street_id, house_id, id, capacity, floors_amount))
         houses.append(House(street_id, house_id, floors_amount, live))
 
+    # Продолжение с последнего снимка (LIFT_CHECKPOINT=файл): до создания окон, чтобы они показали его состояние.
+    # Остановленные лифты передаются циклу симуляции как остановленные оператором.
+    # Незавершённые вызовы снимка окно передаёт своему TripTracker.
+    checkpoint_path = os.environ.get("LIFT_CHECKPOINT")
+    snapshot = None
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        snapshot = checkpoint.read(checkpoint_path)
+        checkpoint.apply(snapshot, elevators, houses, rng=rng)
+        stopped.extend(elevator.elevator_id for elevator in elevators if not elevator.lift_status)
+
     controller = ElevatorController(elevators)
     elevator_views = [ElevatorView(houses, controller, elevator.elevator_id,
                                    floors=3, stopped=stopped, run_again=run_again) for elevator in elevators]
 
+    # Бинарный журнал событий (LIFT_EVENT_LOG=каталог)
+    sinks = []
+    if os.environ.get("LIFT_EVENT_LOG"):
+        sinks.append(EventLog(os.environ["LIFT_EVENT_LOG"]))
+    # Структурированный журнал в JSON (LIFT_LOG=файл, LIFT_LOG_LEVELS="model=DEBUG,traffic=INFO")
+    if os.environ.get("LIFT_LOG"):
+        service = LogService(os.environ["LIFT_LOG"], parse_levels(os.environ.get("LIFT_LOG_LEVELS", "")))
+        service.start()
+        sinks.append(LoggingSink(service))
+
     # Отобразим главное окно после создания лифтов
-    window = MainWindow(loop, elevators, controller, elevator_views, houses, stopped, run_again)
+    window = MainWindow(loop, elevators, controller, elevator_views, houses, stopped, run_again, rng=rng, seed=seed,
+                        sinks=sinks, snapshot=snapshot)
     window.show()
 
     with loop:
-        loop.run_forever()
+        loop.run_forever()  # до закрытия главного окна (MainWindow.shutdown)
 
-    sys.exit(app.exec())
+    sys.exit(0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+"""
+Метрики симулятора в текстовом формате Prometheus на локальном HTTP адресе.
+
+Метрики снимаются по запросу (pull): счётчики вызовов и рейсов уже есть в TripTracker, остановленные лифты,
+глубина очередей и задержка цикла читаются с модели в момент запроса. На событие приходится только учёт
+завершённой поездки в гистограммах, а в цикл движения лифта (simulate_queue) метрики ничего не добавляют.
+
+HTTP сервер работает в том же цикле asyncio, что и симуляция (окно программы или безголовый Simulation).
+"""
+import asyncio
+from array import array
+from bisect import bisect_left
+
+from stats import TripSink
+
+WAIT_BUCKETS = (5, 10, 20, 30, 45, 60, 90, 120, 180, 300, 600, 1200)
+JOURNEY_BUCKETS = (5, 10, 15, 20, 30, 45, 60, 90, 120, 180)
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными границами корзин (как histogram в Prometheus).
+    """
+
+    __slots__ = ("name", "help", "bounds", "counts", "sum", "count")
+
+    def __init__(self, name, help, bounds):
+        self.name = name
+        self.help = help
+        self.bounds = tuple(bounds)
+        self.counts = array("Q", bytes(8 * (len(self.bounds) + 1)))  # последняя корзина - +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, lines):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {self.sum}")
+        lines.append(f"{self.name}_count {self.count}")
+
+
+def _metric(lines, name, kind, help, value):
+    lines.append(f"# HELP {name} {help}")
+    lines.append(f"# TYPE {name} {kind}")
+    lines.append(f"{name} {value}")
+
+
+class MetricsSink(TripSink):
+    """
+    Приёмник поездок и HTTP сервер метрик.
+    """
+
+    def __init__(self, clock, tracker=None, monitor=None):
+        """
+        :param clock: функция без аргументов, время цикла событий
+        :param tracker: TripTracker, если он уже есть; иначе создаётся свой
+        :param monitor: LoopMonitor, источник задержки цикла (или None)
+        """
+        super().__init__(clock, tracker)
+        self.monitor = monitor
+        self.served = 0
+        self.empty_trips = 0
+        self.wait = Histogram("lift_wait_seconds", "Time from call to pickup.", WAIT_BUCKETS)
+        self.journey = Histogram("lift_journey_seconds", "Time from pickup to drop-off.", JOURNEY_BUCKETS)
+        self.server = None
+
+    def on_trip(self, trip):
+        if trip.call_time is None:
+            self.empty_trips += 1
+            return
+        self.served += 1
+        self.wait.observe(trip.pickup_time - trip.call_time)
+        self.journey.observe(trip.drop_time - trip.pickup_time)
+
+    def render(self):
+        """
+        Текст метрик в формате экспозиции Prometheus 0.0.4.
+
+        :return: str
+        """
+        lines = []
+        tracker = self.tracker
+        _metric(lines, "lift_calls_generated_total", "counter", "Calls generated.", tracker.calls if tracker else 0)
+        _metric(lines, "lift_calls_served_total", "counter", "Calls served (passengers picked up and dropped off).",
+                self.served)
+        _metric(lines, "lift_trips_total", "counter", "Trips taken from the call queues.",
+                tracker.trips if tracker else 0)
+        _metric(lines, "lift_empty_trips_total", "counter", "Trips without a call (e.g. SCAN to the shaft end).",
+                self.empty_trips)
+        self.wait.render(lines)
+        self.journey.render(lines)
+        _metric(lines, "lift_elevators", "gauge", "Elevators in the fleet.", len(self.elevators))
+        _metric(lines, "lift_stopped_elevators", "gauge", "Elevators stopped by the operator.",
+                sum(1 for elevator in self.elevators if not elevator.lift_status))
+        _metric(lines, "lift_queue_depth", "gauge", "Calls waiting in all elevator queues.",
+                sum(elevator.floors_queue.qsize() for elevator in self.elevators))
+        if self.monitor is not None and self.monitor.lag_samples:
+            _metric(lines, "lift_loop_lag_seconds", "gauge", "Last measured event loop lag.", self.monitor.lag_last)
+            _metric(lines, "lift_loop_lag_max_seconds", "gauge", "Maximum measured event loop lag.",
+                    self.monitor.lag_max)
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, reader, writer):
+        """
+        Обработка одного HTTP запроса: GET /metrics, остальное - 404.
+        """
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):  # пропускаем заголовки
+                pass
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", self.render().encode()
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                status, body, content_type = "404 Not Found", b"not found\n", "text/plain"
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def start_server(self, host="127.0.0.1", port=9108):
+        """
+        Запускает HTTP сервер в текущем цикле событий.
+
+        :param host: str, адрес (по умолчанию только локальный)
+        :param port: int, порт (0 - выбрать свободный)
+        :return: int, фактический порт
+        """
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop_server(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+
+
+async def scrape(host="127.0.0.1", port=9108, path="/metrics"):
+    """
+    Простейший клиент для проверки: запрашивает метрики и разбирает строки вида "имя значение".
+
+    :return: (int, dict) - код ответа и {имя с метками: значение}
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    samples = {}
+    if status != 200:
+        return status, samples
+    for line in body.decode().splitlines():
+        if line and not line.startswith("#"):
+            name, _, value = line.rpartition(" ")
+            samples[name] = float(value)
+    return status, samples
@@ -0,0 +1,627 @@
+import asyncio
+from array import array
+
+from dispatch import CallQueue, FloorsQueue, make_queue
+
+# События модели для наблюдателей register_event_observer: callback(elevator, kind, floor, value)
+EVENT_CALL = 1  # появился вызов, value - 1 если слева, 0 если справа
+EVENT_DISPATCH = 2  # лифт взял вызов из очереди
+EVENT_PICKUP = 3  # лифт открыл двери на этаже вызова
+EVENT_DROP = 4  # лифт открыл двери на первом этаже (в рейсе с пассажирами - на последнем этаже назначения)
+EVENT_SCROLL = 5  # notify_observer_sc, value - положение лифта от 1 до 100 (0 - сброс)
+EVENT_CHECK = 6  # notify_observer_ck, floor - этаж, на котором сняты вызовы
+EVENT_DOOR = 7  # notify_observer_ds, value - 1 если двери открыты
+EVENT_REFUSED = 8  # полный лифт не взял всех ожидающих, value - сколько осталось; этаж снова в очереди
+
+# Действия оператора для наблюдателей ElevatorController.register_action_observer: callback(elevator_id, action, value)
+ACTION_LIFT_STATUS = 1  # лифт остановлен/запущен, value - новое состояние
+ACTION_DOOR_STATUS = 2  # двери открыты/закрыты, value - новое состояние
+ACTION_FORCE_TARGET = 3  # лифт направлен на этаж вне очереди, value - этаж
+
+PARKING_POLICIES = ("lobby", "middle", "top", "stay")
+
+
+def parking_floor(policy, floors_amount):
+    """
+    Этаж стоянки свободного лифта по политике парковки.
+
+    :param policy: str, "lobby" - первый этаж, "middle" - середина дома, "top" - последний этаж, "stay" - лифт
+        остаётся, где высадил пассажиров
+    :param floors_amount: int, количество этажей
+    :return: int или None (лифт остаётся, где высадил пассажиров)
+    """
+    if policy == "lobby":
+        return 1
+    if policy == "stay":
+        return None
+    if policy == "middle":
+        return (floors_amount + 1) // 2
+    if policy == "top":
+        return floors_amount
+    raise ValueError(f"unknown parking policy: {policy}, available: {', '.join(PARKING_POLICIES)}")
+
+
+class House:
+    """
+    Класс дома. Хранит в себе вызовы лифта, к которым обращаются остальные классы.
+    """
+
+    def __init__(self, street_id, house_id, floors_amount, live):
+        # Расположение
+        self.street_id = street_id
+        self.house_id = house_id
+
+        # Технические хар-ки
+        self.live = live  # количество жителей
+
+        # Переменные логики
+        self.floors_amount = floors_amount
+        self.left_calls = [False] * floors_amount
+        self.right_calls = [False] * floors_amount
+
+
+class Elevator:
+    """
+    Класс модели лифта. Обрабатывает очередь вызовов и уведомляет о результате соответствующим наблюдателям.
+    """
+
+    def __init__(self, street_id, house_id, elevator_id, capacity, floors_amount, strategy="FCFS"):
+        # Расположение
+        self.street_id = street_id
+        self.house_id = house_id
+        self.elevator_id = elevator_id
+
+        # Количество этажей в доме с этим лифтом
+        self.floors_amount = floors_amount
+
+        # Технические хар-ки
+        self.capacity = capacity  # грузоподьёмность
+        self.passengers = 0  # количество пассажиров внутри
+        self.door_status = False  # двери открыты/закрыты
+        self.lift_status = True  # состояние лифта вкл/выкл
+
+        # Переменные логики
+        self.current_floor = 1
+        self.target_floor = None
+        self.floors_queue = CallQueue() if strategy == "FCFS" else make_queue(strategy, floors_amount)
+        self.floor_time = 6.0  # секунд на проезд одного этажа
+        self.door_dwell = 3.0  # секунд с открытыми дверями
+        self.parking_floor = None  # этаж стоянки свободного лифта (None - остаётся, где высадил пассажиров)
+        self.travel_table = None  # kinematics.TravelTable (None - floor_time секунд на каждый этаж)
+        self.door_time = 0.0  # секунд на открытие и закрытие дверей сверх door_dwell
+        self.boarding = None  # boarding.BoardingModel (None - двери открыты door_dwell секунд на каждой остановке)
+
+        # Важная часть, для общения между моделью и контроллером:
+        self.scroll_callback = None
+        self.checkers_callback = None
+        self.door_status_callback = None
+        self.event_callbacks = ()  # наблюдатели за событиями модели (статистика, бенчмарки), список - с первого
+
+        # Состояние лифта
+        self.is_running = True
+
+    async def simulate_queue(self):
+        """
+        Асинхронная симуляция обработки очереди. Пока очередь не пустая, то:
+        1. Достает первый вызов из очереди и едет на соответствующий этаж.
+        2. Забирает пассажиров.
+        3. Спускается обратно.
+        С моделью пассажиров (boarding.journeys) рейс идёт по этажам назначения пассажиров (serve_journey).
+        Когда очередь пуста, свободный лифт едет на этаж стоянки parking_floor (если он задан).
+
+        :return: None
+        """
+        step = 100 // (self.floors_amount - 1)
+        while self.is_running:
+            while not (self.floors_queue.empty()):
+                # Сначала добираемся до этажа, а потом вниз спускаемся
+                # Для простоты по пути не останавливаясь
+                self.target_floor = self.floors_queue.get()
+                self.notify_event(EVENT_DISPATCH, self.target_floor)
+                lobby_call = self.target_floor == self.current_floor == 1
+                # положение кабины: представление возвращает положение первого этажа, лифт может стоять выше
+                status = self.notify_observer_sc(False) + (self.current_floor - 1) * step
+                if self.boarding is not None and self.boarding.journeys:
+                    status = await self.serve_journey(status, step)
+                    continue
+                if not lobby_call:
+                    self.notify_observer_ck(self.current_floor)
+                    status = await self.travel(self.target_floor, status, step)
+                    self.notify_observer_ds(True)
+                    self.notify_event(EVENT_PICKUP, self.current_floor)
+                    await self.hold_doors(True, False)
+                    self.notify_observer_ds(False)
+                    self.notify_observer_sc(status)
+
+                    self.notify_observer_ck(self.current_floor)
+                    status = await self.travel(1, status, step)
+                else:
+                    self.notify_observer_ck(self.current_floor)
+                    self.notify_event(EVENT_PICKUP, self.current_floor)
+
+                self.notify_observer_ds(True)  # Двери открыты
+                self.notify_event(EVENT_DROP, self.current_floor)
+                await self.hold_doors(lobby_call, True)
+                self.notify_observer_ds(False)  # Двери закрыты
+                self.notify_observer_sc(status)  # Обновили положение лифта
+                self.notify_observer_ck(self.current_floor)  # Обновили вызовы
+            self.target_floor = None
+            if self.parking_floor is not None and self.current_floor != self.parking_floor:
+                status = self.notify_observer_sc(False) + (self.current_floor - 1) * step
+                status = await self.travel(self.parking_floor, status, step)
+                self.notify_observer_sc(status)
+            await asyncio.sleep(1.0)
+
+    async def travel(self, floor, status, step):
+        """
+        Перемещает лифт на этаж floor без остановок, уведомляя представление о положении кабины.
+
+        :param floor: int, этаж назначения
+        :param status: float, текущее положение кабины на полосе прокрутки
+        :param step: int, расстояние между этажами на полосе прокрутки
+        :return: float, новое положение кабины
+        """
+        if self.current_floor == floor:
+            return status
+        # с таблицей проезда время всего перегона делится поровну между этажами: разгон и торможение сказываются
+        # на времени прибытия, а не на скорости движения кабины на полосе прокрутки
+        tick = self.floor_time / 10 if self.travel_table is None else \
+            self.travel_table.time(self.current_floor, floor) / abs(floor - self.current_floor) / 10
+        while self.current_floor != floor:
+            direction = 1 if floor > self.current_floor else -1
+            for j in range(10):
+                status += direction * step / 10
+                self.notify_observer_sc(status)
+                await asyncio.sleep(tick)
+            self.move_to_floor(self.current_floor + direction)
+        return status
+
+    async def serve_journey(self, status, step):
+        """
+        Рейс с пассажирами, у которых есть этаж назначения (passengers.PassengerModel): лифт забирает ожидающих на
+        этаже вызова и развозит их по этажам назначения в порядке движения, а не на первый этаж.
+
+        :param status: float, текущее положение кабины на полосе прокрутки
+        :param step: int, расстояние между этажами на полосе прокрутки
+        :return: float, новое положение кабины
+        """
+        self.notify_observer_ck(self.current_floor)
+        status = await self.travel(self.target_floor, status, step)
+        self.notify_observer_ds(True)
+        self.notify_event(EVENT_PICKUP, self.current_floor)
+        await self.hold_doors(True, False)
+        self.notify_observer_ds(False)
+        self.notify_observer_sc(status)
+        self.notify_observer_ck(self.current_floor)
+        stops = self.boarding.destinations(self)
+        if not stops:  # никто не сел (ожидающих забрал предыдущий рейс)
+            self.notify_event(EVENT_DROP, self.current_floor)
+        for i, floor in enumerate(stops):
+            status = await self.travel(floor, status, step)
+            self.notify_observer_ds(True)
+            if i == len(stops) - 1:
+                self.notify_event(EVENT_DROP, self.current_floor)
+            await self.hold_doors(False, True)
+            self.notify_observer_ds(False)
+            self.notify_observer_sc(status)
+            self.notify_observer_ck(self.current_floor)
+        return status
+
+    async def hold_doors(self, board, alight):
+        """
+        Держит двери открытыми на остановке: door_dwell секунд или, с моделью посадки, по числу входящих и
+        выходящих пассажиров.
+
+        :param board: bool, на остановке садятся ожидающие
+        :param alight: bool, на остановке выходят пассажиры
+        :return: None
+        """
+        if self.boarding is None:
+            await asyncio.sleep(self.door_dwell + self.door_time)
+        else:
+            await self.boarding.hold(self, board, alight)
+
+    def eta(self, floor):
+        """
+        Время проезда от текущего этажа до floor без остановок.
+
+        :param floor: int, этаж назначения
+        :return: float, секунды
+        """
+        if self.travel_table is not None:
+            return self.travel_table.time(self.current_floor, floor)
+        return abs(floor - self.current_floor) * self.floor_time
+
+    def move_to_floor(self, target_floor):
+        """
+        Изменяет текущий этаж лифта.
+
+        :param target_floor: int, этаж
+        :return: None
+        """
+        self.current_floor = target_floor
+
+    def force_target(self, floor):
+        """
+        Ставит этаж в начало очереди: лифт поедет на него следующим, после текущей поездки.
+
+        :param floor: int, этаж
+        :return: None
+        """
+        self.floors_queue.put_first(floor)
+
+    def put_call(self, floor, left=True):
+        """
+        Добавляет вызов в очередь лифта.
+
+        :param floor: int, этаж
+        :param left: bool, вызов с левой стороны
+        :return: None
+        """
+        self.floors_queue.put(floor)
+        self.notify_event(EVENT_CALL, floor, int(left))
+
+    def change_elevator_status(self):
+        """
+        Изменяет состояние лифта.
+
+        :return: None
+        """
+        if self.lift_status:
+            self.lift_status = False
+        else:
+            self.lift_status = True
+
+    def change_door_status(self):
+        """
+        Изменяет состояние дверей лифта/
+
+        :return: None
+        """
+        if self.door_status:
+            self.door_status = False
+        else:
+            self.door_status = True
+
+    # далее идут функции регистрации наблюдателей за конкретными действиями:
+    def register_sc_observer(self, callback):
+        self.scroll_callback = callback
+
+    def register_ck_observer(self, callback):
+        self.checkers_callback = callback
+
+    def register_ds_observer(self, callback):
+        self.door_status_callback = callback
+
+    def register_event_observer(self, callback):
+        if self.event_callbacks:
+            self.event_callbacks.append(callback)
+        else:  # общий пустой кортеж до первого наблюдателя: лифт без наблюдателей не держит свой список
+            self.event_callbacks = [callback]
+
+    # и функции уведомления о соответствующем результате:
+    def notify_observer_sc(self, status):
+        if self.event_callbacks:
+            self.notify_event(EVENT_SCROLL, self.current_floor, int(status))
+        return self.scroll_callback(status)
+
+    def notify_observer_ck(self, floor):
+        if self.event_callbacks:
+            self.notify_event(EVENT_CHECK, floor)
+        self.checkers_callback(floor)
+
+    def notify_observer_ds(self, status):
+        if self.event_callbacks:
+            self.notify_event(EVENT_DOOR, self.current_floor, int(status))
+        self.door_status_callback(status)
+
+    def notify_event(self, kind, floor, value=0):
+        for callback in self.event_callbacks:
+            callback(self, kind, floor, value)
+
+
+class ElevatorController:
+    """
+    Класс контроллера, отвечает за взаимодействие между моделью и представлением, а также передает сигналы о
+    случайных событиях asyncio в модель.
+    """
+
+    def __init__(self, elevators):
+        self.elevators = elevators
+        self.action_callbacks = []  # наблюдатели за действиями оператора (запись трасс, журналы)
+        self.dispatcher = None  # групповое управление домов (destination.GroupDispatcher)
+
+    def register_action_observer(self, callback):
+        self.action_callbacks.append(callback)
+
+    def notify_action(self, elevator_id, action, value):
+        for callback in self.action_callbacks:
+            callback(elevator_id, action, value)
+
+    def call_elevator(self, elevator_id, target_floor):
+        """
+        Вызов функции конкретного лифта выезда на этаж target_floor.
+
+        :param elevator_id: int, id лифта
+        :param target_floor: int, номер этажа
+        :return: None
+        """
+        self.elevators[elevator_id - 1].move_to_floor(target_floor)
+
+    def change_elevator_status(self, elevator_id):
+        """
+        Вызов функции изменения статуса конкретного лифта.
+
+        :param elevator_id: int, id лифта
+        :return: None
+        """
+        elevator = self.elevators[elevator_id - 1]
+        elevator.change_elevator_status()
+        self.notify_action(elevator_id, ACTION_LIFT_STATUS, elevator.lift_status)
+
+    def change_door_status(self, elevator_id):
+        """
+        Вызов функции изменения статуса дверей конкретного лифта.
+
+        :param elevator_id: int, id лифта
+        :return: None
+        """
+        elevator = self.elevators[elevator_id - 1]
+        elevator.change_door_status()
+        self.notify_action(elevator_id, ACTION_DOOR_STATUS, elevator.door_status)
+
+    def register_passenger(self, street_id, house_id, origin, destination):
+        """
+        Пассажир набирает этаж назначения на панели этажа origin дома; лифт выбирает групповой диспетчер.
+
+        :param street_id: int, улица
+        :param house_id: int, дом
+        :param origin: int, этаж, на котором ждёт пассажир
+        :param destination: int, этаж назначения
+        :return: int или None, id назначенного лифта (None - обычное управление, лифт не называется)
+        """
+        if self.dispatcher is None:
+            raise ValueError("group dispatch is not enabled")
+        return self.dispatcher.assign(street_id, house_id, origin, destination)
+
+    def force_target(self, elevator_id, floor):
+        """
+        Направляет лифт на этаж floor вне очереди.
+
+        :param elevator_id: int, id лифта
+        :param floor: int, этаж
+        :return: None
+        """
+        elevator = self.elevators[elevator_id - 1]
+        if not 1 <= floor <= elevator.floors_amount:
+            raise ValueError(f"elevator {elevator_id}: no floor {floor}")
+        elevator.force_target(floor)
+        self.notify_action(elevator_id, ACTION_FORCE_TARGET, floor)
+
+
+# Компактные варианты моделей для больших симуляций (миллион лифтов в одном процессе).
+# queue.Queue потокобезопасна, но весь код работает в одном цикле asyncio, поэтому блокировка и три Condition
+# внутри неё (~4 КБ на лифт) здесь не нужны - используется FloorsQueue из dispatch.py.
+
+class SlottedHouse:
+    """
+    Вариант House со __slots__. Вызовы хранятся битовыми масками (бит floor - 1), а не двумя списками bool.
+    Свойства left_calls/right_calls оставлены для совместимости с представлением, но на горячем пути лучше
+    пользоваться set_call/clear_calls.
+    """
+
+    __slots__ = ("street_id", "house_id", "live", "floors_amount", "left_mask", "right_mask")
+
+    def __init__(self, street_id, house_id, floors_amount, live):
+        self.street_id = street_id
+        self.house_id = house_id
+        self.live = live
+        self.floors_amount = floors_amount
+        self.left_mask = 0
+        self.right_mask = 0
+
+    @property
+    def left_calls(self):
+        return [bool(self.left_mask >> floor & 1) for floor in range(self.floors_amount)]
+
+    @property
+    def right_calls(self):
+        return [bool(self.right_mask >> floor & 1) for floor in range(self.floors_amount)]
+
+    def has_call(self, floor):
+        """
+        :param floor: int, этаж (с 1)
+        :return: bool, есть ли вызов хотя бы с одной стороны
+        """
+        return bool((self.left_mask | self.right_mask) >> (floor - 1) & 1)
+
+    def set_call(self, floor, left):
+        """
+        Отмечает вызов на этаже.
+
+        :param floor: int, этаж (с 1)
+        :param left: bool, вызов с левой стороны
+        :return: None
+        """
+        if left:
+            self.left_mask |= 1 << (floor - 1)
+        else:
+            self.right_mask |= 1 << (floor - 1)
+
+    def clear_calls(self, floor=None):
+        """
+        Снимает вызовы на этаже, либо все вызовы дома.
+
+        :param floor: int, этаж (с 1) или None
+        :return: None
+        """
+        if floor is None:
+            self.left_mask = self.right_mask = 0
+        else:
+            bit = ~(1 << (floor - 1))
+            self.left_mask &= bit
+            self.right_mask &= bit
+
+
+class SlottedElevator:
+    """
+    Вариант Elevator со __slots__ и лёгкой очередью FloorsQueue. Поведение полностью совпадает с Elevator -
+    методы берутся из него же.
+    """
+
+    __slots__ = ("street_id", "house_id", "elevator_id", "floors_amount", "capacity", "passengers",
+                 "door_status", "lift_status", "current_floor", "target_floor", "floors_queue",
+                 "floor_time", "door_dwell", "parking_floor", "travel_table", "door_time", "boarding",
+                 "scroll_callback", "checkers_callback", "door_status_callback", "event_callbacks", "is_running")
+
+    def __init__(self, street_id, house_id, elevator_id, capacity, floors_amount, strategy="FCFS"):
+        self.street_id = street_id
+        self.house_id = house_id
+        self.elevator_id = elevator_id
+        self.floors_amount = floors_amount
+        self.capacity = capacity
+        self.passengers = 0
+        self.door_status = False
+        self.lift_status = True
+        self.current_floor = 1
+        self.target_floor = None
+        self.floors_queue = make_queue(strategy, floors_amount)
+        self.floor_time = 6.0
+        self.door_dwell = 3.0
+        self.parking_floor = None
+        self.travel_table = None
+        self.door_time = 0.0
+        self.boarding = None
+        self.scroll_callback = None
+        self.checkers_callback = None
+        self.door_status_callback = None
+        self.event_callbacks = ()
+        self.is_running = True
+
+    simulate_queue = Elevator.simulate_queue
+    travel = Elevator.travel
+    serve_journey = Elevator.serve_journey
+    hold_doors = Elevator.hold_doors
+    eta = Elevator.eta
+    move_to_floor = Elevator.move_to_floor
+    put_call = Elevator.put_call
+    force_target = Elevator.force_target
+    change_elevator_status = Elevator.change_elevator_status
+    change_door_status = Elevator.change_door_status
+    register_sc_observer = Elevator.register_sc_observer
+    register_ck_observer = Elevator.register_ck_observer
+    register_ds_observer = Elevator.register_ds_observer
+    register_event_observer = Elevator.register_event_observer
+    notify_observer_sc = Elevator.notify_observer_sc
+    notify_observer_ck = Elevator.notify_observer_ck
+    notify_observer_ds = Elevator.notify_observer_ds
+    notify_event = Elevator.notify_event
+
+
+class ElevatorFleet:
+    """
+    Хранилище парка лифтов "по столбцам": каждое поле лифта (и его дома) лежит в отдельном array, а лифт - это
+    просто индекс. Очереди вызовов создаются только для лифтов, у которых есть вызовы. Подходит для расчётов
+    вместимости на миллионах лифтов, где объект на каждый лифт слишком дорог.
+    """
+
+    # биты поля flags
+    DOOR_OPEN = 1
+    LIFT_ON = 2
+    RUNNING = 4
+
+    def __init__(self):
+        self.street_id = array("I")
+        self.house_id = array("H")
+        self.live = array("H")
+        self.floors_amount = array("B")
+        self.capacity = array("H")
+        self.passengers = array("H")
+        self.current_floor = array("B")
+        self.target_floor = array("B")  # 0 - нет цели
+        self.flags = array("B")
+        self.left_calls = array("I")  # битовые маски вызовов дома, бит floor - 1
+        self.right_calls = array("I")
+        self.queues = {}  # индекс лифта -> FloorsQueue, только для лифтов с вызовами
+
+    def __len__(self):
+        return len(self.flags)
+
+    def append(self, street_id, house_id, capacity, floors_amount, live=0):
+        """
+        Добавляет лифт (вместе с его домом) в парк.
+
+        :return: int, индекс лифта
+        """
+        if floors_amount > 32:
+            raise ValueError("ElevatorFleet supports at most 32 floors per house")
+        self.street_id.append(street_id)
+        self.house_id.append(house_id)
+        self.live.append(live)
+        self.floors_amount.append(floors_amount)
+        self.capacity.append(capacity)
+        self.passengers.append(0)
+        self.current_floor.append(1)
+        self.target_floor.append(0)
+        self.flags.append(self.LIFT_ON | self.RUNNING)
+        self.left_calls.append(0)
+        self.right_calls.append(0)
+        return len(self.flags) - 1
+
+    def put(self, index, floor):
+        queue = self.queues.get(index)
+        if queue is None:
+            queue = self.queues[index] = FloorsQueue()
+        queue.put(floor)
+
+    def get(self, index):
+        queue = self.queues[index]
+        floor = queue.get()
+        if queue.empty():
+            del self.queues[index]
+        return floor
+
+    def empty(self, index):
+        return index not in self.queues
+
+    def set_call(self, index, floor, left):
+        if left:
+            self.left_calls[index] |= 1 << (floor - 1)
+        else:
+            self.right_calls[index] |= 1 << (floor - 1)
+
+    def has_call(self, index, floor):
+        return bool((self.left_calls[index] | self.right_calls[index]) >> (floor - 1) & 1)
+
+    def clear_calls(self, index, floor=None):
+        if floor is None:
+            self.left_calls[index] = self.right_calls[index] = 0
+        else:
+            bit = ~(1 << (floor - 1)) & 0xFFFFFFFF
+            self.left_calls[index] &= bit
+            self.right_calls[index] &= bit
+
+    def move_to_floor(self, index, target_floor):
+        self.current_floor[index] = target_floor
+
+    def change_elevator_status(self, index):
+        self.flags[index] ^= self.LIFT_ON
+
+    def change_door_status(self, index):
+        self.flags[index] ^= self.DOOR_OPEN
+
+    def lift_status(self, index):
+        return bool(self.flags[index] & self.LIFT_ON)
+
+    def door_status(self, index):
+        return bool(self.flags[index] & self.DOOR_OPEN)
+
+    def nbytes(self):
+        """
+        Объём памяти под столбцы (без очередей и накладных расходов самих array).
+
+        :return: int, байт
+        """
+        columns = (self.street_id, self.house_id, self.live, self.floors_amount, self.capacity, self.passengers,
+                   self.current_floor, self.target_floor, self.flags, self.left_calls, self.right_calls)
+        return sum(column.itemsize * len(column) for column in columns)
@@ -0,0 +1,367 @@
+"""
+Программный интерфейс оператора: команды лифтам по HTTP на локальном адресе.
+
+То же, что кнопки окна лифта, но для автоматизации и сразу для многих лифтов: остановить/запустить лифт, открыть/
+закрыть двери, подать вызов на этаж и направить лифт на этаж вне очереди. Запрос - пачка команд в JSON:
+
+    POST /commands
+    Idempotency-Key: 7f3c...
+    {"commands": [{"op": "stop", "elevators": [1, 2, 3]},
+                  {"op": "call", "street": 2, "floor": 3, "side": "left"},
+                  {"op": "target", "all": true, "floor": 1}]}
+
+Лифты команды выбираются списком id (elevators), улицей и домом (street, house) или все сразу (all). Команды
+stop/start/open/close задают состояние, а не переключают его, поэтому повтор ничего не меняет.
+
+Подтверждение асинхронное: сервер проверяет запрос, ставит пачку в очередь и сразу отвечает 202 с квитанцией
+{"id", "status": "accepted"}; пачка выполняется в цикле событий целиком, между шагами симуляции. Итог по каждой
+команде (сколько лифтов изменено, сколько уже были в нужном состоянии, ошибки по лифтам) - в GET /commands/<id>,
+или сразу в ответе, если добавить ?wait=1. Повтор запроса с тем же Idempotency-Key не выполняет команды заново, а
+возвращает ту же квитанцию (409, если тело запроса другое).
+"""
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from collections import OrderedDict
+
+OPERATIONS = ("stop", "start", "open", "close", "call", "target")
+_FLOOR_OPERATIONS = ("call", "target")
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 409: "Conflict",
+            413: "Payload Too Large"}
+
+
+class CommandError(ValueError):
+    """
+    Неверный запрос: сервер отвечает 400 и ничего не выполняет.
+    """
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)  # True и False - тоже int
+
+
+class _Receipt:
+    """
+    Квитанция пачки команд.
+    """
+
+    def __init__(self, receipt_id, digest, commands):
+        self.id = receipt_id
+        self.digest = digest
+        self.commands = commands
+        self.status = "accepted"
+        self.accepted_at = time.time()
+        self.done_at = None
+        self.results = None
+        self.done = asyncio.Event()
+
+    def as_dict(self):
+        receipt = {"id": self.id, "status": self.status, "accepted_at": self.accepted_at}
+        if self.results is not None:
+            receipt["done_at"] = self.done_at
+            receipt["results"] = self.results
+        return receipt
+
+
+class OperatorApi:
+    """
+    HTTP сервер команд оператора поверх ElevatorController.
+    """
+
+    def __init__(self, controller, houses, views=None, keep=10000, max_body=1 << 20):
+        """
+        :param controller: ElevatorController
+        :param houses: list of House, дома лифтов в том же порядке
+        :param views: list of ElevatorView или None; в окне программы остановка, запуск и двери идут через окна
+        лифтов, как нажатия кнопок, чтобы окно перезапустило задачи и обновило надписи
+        :param keep: int, сколько последних квитанций помнить для повторов и GET
+        :param max_body: int, наибольший размер тела запроса, байт
+        """
+        self.controller = controller
+        self.houses = houses
+        self.views = views
+        self.keep = keep
+        self.max_body = max_body
+        self.receipts = OrderedDict()  # id -> _Receipt; id - ключ идемпотентности, если он передан
+        self.queue = asyncio.Queue()
+        self.server = None
+        self.worker = None
+
+    def select(self, command):
+        """
+        id лифтов команды.
+
+        :param command: dict
+        :return: list of int, не пустой
+        """
+        elevators = self.controller.elevators
+        if command.get("all"):
+            return [elevator.elevator_id for elevator in elevators]
+        if "elevators" in command:
+            ids = command["elevators"]
+            if not isinstance(ids, list) or not ids or \
+                    not all(_is_int(i) and 1 <= i <= len(elevators) for i in ids):
+                raise CommandError(f"elevators must be a non-empty list of ids from 1 to {len(elevators)}")
+            return ids
+        if "street" in command:
+            street, house = command["street"], command.get("house")
+            if not _is_int(street) or house is not None and not _is_int(house):
+                raise CommandError("street and house must be integers")
+            ids = [elevator.elevator_id for elevator in elevators
+                   if elevator.street_id == street and (house is None or elevator.house_id == house)]
+            if not ids:
+                where = f"street {street}" if house is None else f"street {street}, house {house}"
+                raise CommandError(f"no elevators on {where}")
+            return ids
+        raise CommandError("command needs elevators, street or all")
+
+    def parse(self, body):
+        """
+        Проверяет тело запроса целиком до постановки в очередь.
+
+        :param body: bytes
+        :return: list of (op, ids, command)
+        """
+        try:
+            request = json.loads(body)
+        except ValueError as error:
+            raise CommandError(f"invalid JSON: {error}")
+        commands = request.get("commands") if isinstance(request, dict) else None
+        if not isinstance(commands, list) or not commands:
+            raise CommandError("commands must be a non-empty list")
+        parsed = []
+        for command in commands:
+            if not isinstance(command, dict) or command.get("op") not in OPERATIONS:
+                raise CommandError(f"op must be one of: {', '.join(OPERATIONS)}")
+            if command["op"] in _FLOOR_OPERATIONS and not _is_int(command.get("floor")):
+                raise CommandError(f"{command['op']} needs an integer floor")
+            if command.get("side", "left") not in ("left", "right"):
+                raise CommandError("side must be left or right")
+            parsed.append((command["op"], self.select(command), command))
+        return parsed
+
+    def apply(self, op, elevator_id, command):
+        """
+        Выполняет команду для одного лифта.
+
+        :return: bool, изменилось ли что-нибудь
+        """
+        elevator = self.controller.elevators[elevator_id - 1]
+        view = self.views[elevator_id - 1] if self.views is not None else None
+        if op in ("stop", "start"):
+            if elevator.lift_status == (op == "start"):
+                return False
+            if view is not None:
+                view.change_elevator_status()
+            else:
+                self.controller.change_elevator_status(elevator_id)
+            return True
+        if op in ("open", "close"):
+            if elevator.door_status == (op == "open"):
+                return False
+            if view is not None:
+                view.change_door_status()
+            else:
+                self.controller.change_door_status(elevator_id)
+            return True
+        if not elevator.lift_status:
+            raise ValueError("elevator is stopped")
+        floor = command["floor"]
+        if not 1 <= floor <= elevator.floors_amount:
+            raise ValueError(f"no floor {floor}")
+        if op == "target":
+            self.controller.force_target(elevator_id, floor)
+            return True
+        # вызов, как у генератора: на этаже не больше одного вызова
+        house = self.houses[elevator_id - 1]
+        if house.left_calls[floor - 1] or house.right_calls[floor - 1]:
+            return False
+        left = command.get("side", "left") == "left"
+        if left:
+            house.left_calls[floor - 1] = True
+        else:
+            house.right_calls[floor - 1] = True
+        elevator.put_call(floor, left)
+        if view is not None:
+            view.update_checkboxes()
+        return True
+
+    def execute(self, receipt):
+        """
+        Выполняет пачку целиком, без переключений цикла событий между командами.
+
+        :param receipt: _Receipt
+        :return: None
+        """
+        results = []
+        for op, ids, command in receipt.commands:
+            applied = unchanged = 0
+            errors = {}
+            for elevator_id in ids:
+                try:
+                    if self.apply(op, elevator_id, command):
+                        applied += 1
+                    else:
+                        unchanged += 1
+                except ValueError as error:
+                    errors[str(elevator_id)] = str(error)
+            results.append({"op": op, "elevators": len(ids), "applied": applied, "unchanged": unchanged,
+                            "errors": errors})
+        receipt.results = results
+        receipt.status = "failed" if any(result["errors"] for result in results) else "done"
+        receipt.done_at = time.time()
+        receipt.commands = None
+        receipt.done.set()
+
+    async def run(self):
+        """
+        Выполняет пачки в порядке поступления.
+        """
+        while True:
+            self.execute(await self.queue.get())
+
+    def submit(self, body, key=None):
+        """
+        Принимает пачку команд.
+
+        :param body: bytes, тело запроса
+        :param key: str, ключ идемпотентности или None
+        :return: (_Receipt, bool) - квитанция и то, что она новая
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        if key is not None and key in self.receipts:
+            receipt = self.receipts[key]
+            if receipt.digest != digest:
+                raise KeyError(key)
+            return receipt, False
+        receipt = _Receipt(key or uuid.uuid4().hex, digest, self.parse(body))
+        self.receipts[receipt.id] = receipt
+        while len(self.receipts) > self.keep:
+            self.receipts.popitem(last=False)
+        self.queue.put_nowait(receipt)
+        return receipt, True
+
+    async def respond(self, method, path, headers, body):
+        """
+        :return: (int, dict) - код ответа и тело
+        """
+        path, _, query = path.partition("?")
+        wait = "wait=1" in query.split("&")
+        if method == "POST" and path == "/commands":
+            try:
+                receipt, _ = self.submit(body, headers.get("idempotency-key"))
+            except CommandError as error:
+                return 400, {"error": str(error)}
+            except KeyError:
+                return 409, {"error": "idempotency key reused with a different request"}
+        elif method == "GET" and path.startswith("/commands/"):
+            receipt = self.receipts.get(path[len("/commands/"):])
+            if receipt is None:
+                return 404, {"error": "unknown command id"}
+        else:
+            return 404, {"error": "not found"}
+        if wait:
+            await receipt.done.wait()
+        return (200 if receipt.results is not None else 202), receipt.as_dict()
+
+    async def handle(self, reader, writer):
+        """
+        Обработка одного HTTP запроса.
+        """
+        try:
+            request = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            parts = request.decode("latin-1").split()
+            length = headers.get("content-length", "0")
+            length = int(length) if length.isascii() and length.isdigit() else None  # без знака: не бывает < 0
+            if len(parts) < 2:
+                status, response = 400, {"error": "bad request line"}
+            elif length is None:
+                status, response = 400, {"error": "Content-Length must be a non-negative integer"}
+            elif length > self.max_body:
+                status, response = 413, {"error": f"body is larger than {self.max_body} bytes"}
+            else:
+                body = await reader.readexactly(length)
+                status, response = await self.respond(parts[0], parts[1], headers, body)
+            payload = json.dumps(response).encode()
+            writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start_server(self, host="127.0.0.1", port=9120):
+        """
+        Запускает HTTP сервер и исполнителя пачек в текущем цикле событий.
+
+        :param host: str, адрес (по умолчанию только локальный)
+        :param port: int, порт (0 - выбрать свободный)
+        :return: int, фактический порт
+        """
+        self.worker = asyncio.create_task(self.run(), name="operator_api.run")
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop_server(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+
+
+async def send(commands, host="127.0.0.1", port=9120, key=None, wait=False):
+    """
+    Простейший клиент: отправляет пачку команд.
+
+    :param commands: list of dict
+    :param key: str, ключ идемпотентности или None
+    :param wait: bool, дождаться выполнения
+    :return: (int, dict) - код ответа и квитанция
+    """
+    body = json.dumps({"commands": commands}).encode()
+    extra = f"Idempotency-Key: {key}\r\n" if key is not None else ""
+    return await _request(host, port, f"POST /commands{'?wait=1' if wait else ''} HTTP/1.1\r\nHost: {host}\r\n"
+                                      f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n{extra}\r\n",
+                          body)
+
+
+async def receipt(receipt_id, host="127.0.0.1", port=9120, wait=False):
+    """
+    Квитанция пачки по id.
+
+    :return: (int, dict) - код ответа и квитанция
+    """
+    return await _request(host, port, f"GET /commands/{receipt_id}{'?wait=1' if wait else ''} HTTP/1.1\r\n"
+                                      f"Host: {host}\r\n\r\n")
+
+
+async def _request(host, port, head, body=b""):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(head.encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
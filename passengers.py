@@ -0,0 +1,271 @@
+"""
+Симуляция на уровне пассажиров: у каждого человека свой этаж отправления и назначения, время появления и вес.
+
+Пассажир - не объект, а номер в пуле PassengerPool: поля хранятся по колонкам в array, а номера освободившихся
+пассажиров переиспользуются. Так миллионы пассажиров за прогон не создают миллионы объектов для сборщика мусора, а
+память пула ограничена числом одновременно находящихся в системе людей.
+
+PassengerModel - модель посадки (boarding.BoardingModel), в которой вызов порождает группу пассажиров: с первого
+этажа они едут наверх, с остальных - чаще всего на первый этаж (lobby_share), иначе на другой этаж. Лифт забирает
+ожидающих на этаже вызова в порядке очереди, пока позволяет грузоподъёмность, и развозит их по этажам назначения
+(Elevator.serve_journey). Ожидание (от появления до посадки) и поездка (от посадки до высадки) считаются по
+каждому человеку.
+"""
+import random
+from array import array
+from collections import deque
+
+from boarding import BoardingModel
+from model import EVENT_CALL, EVENT_PICKUP, EVENT_REFUSED
+from stats import percentile
+
+
+class PassengerPool:
+    """
+    Пул пассажиров по колонкам со списком свободных номеров.
+    """
+
+    __slots__ = ("origin", "destination", "weight", "arrival", "boarded", "free")
+
+    def __init__(self):
+        self.origin = array("H")
+        self.destination = array("H")
+        self.weight = array("H")  # кг
+        self.arrival = array("d")
+        self.boarded = array("d")
+        self.free = array("I")
+
+    def allocate(self, origin, destination, weight, arrival):
+        """
+        :param origin: int, этаж появления
+        :param destination: int, этаж назначения
+        :param weight: int, вес, кг
+        :param arrival: float, время появления
+        :return: int, номер пассажира
+        """
+        if self.free:
+            handle = self.free.pop()
+            self.origin[handle] = origin
+            self.destination[handle] = destination
+            self.weight[handle] = weight
+            self.arrival[handle] = arrival
+            self.boarded[handle] = 0.0
+            return handle
+        self.origin.append(origin)
+        self.destination.append(destination)
+        self.weight.append(weight)
+        self.arrival.append(arrival)
+        self.boarded.append(0.0)
+        return len(self.origin) - 1
+
+    def release(self, handle):
+        """
+        Возвращает номер пассажира в пул.
+
+        :param handle: int
+        :return: None
+        """
+        self.free.append(handle)
+
+    def __len__(self):
+        return len(self.origin) - len(self.free)
+
+
+class PassengerModel(BoardingModel):
+    """
+    Пассажиры с этажами назначения и временами по каждому человеку.
+    """
+
+    journeys = True
+
+    def __init__(self, clock, rng=None, lobby_share=0.7, weight_mean=75.0, weight_sigma=12.0, spawn=True, **kwargs):
+        """
+        :param clock: функция без аргументов, время цикла событий
+        :param rng: random.Random, свой источник случайных чисел
+        :param lobby_share: float, доля пассажиров с верхних этажей, едущих на первый этаж
+        :param weight_mean: float, средний вес пассажира, кг
+        :param weight_sigma: float, разброс веса, кг
+        :param spawn: bool, вызов порождает группу пассажиров; False - пассажиры приходят только через arrive()
+            (панели этажей назначения, destination.GroupDispatcher)
+        Остальные параметры - как у BoardingModel.
+        """
+        super().__init__(rng, **kwargs)
+        self.clock = clock
+        self.lobby_share = lobby_share
+        self.weight_mean = weight_mean
+        self.weight_sigma = weight_sigma
+        self.spawn = spawn
+        self.pool = PassengerPool()
+        self.queues = []  # по лифтам: None или список очередей ожидающих по этажам
+        self.riders = []  # по лифтам: номера пассажиров в кабине
+        self.load = array("I")  # по лифтам: вес пассажиров в кабине, кг
+        self.created = 0
+        self.waits = array("d")  # ожидание каждого севшего
+        self.journey_times = array("d")  # поездка каждого высаженного
+        self.total_times = array("d")  # от появления до высадки
+        self.departures = 0  # рейсов с пассажирами
+        self.drop_stops = 0  # остановок для высадки в этих рейсах
+
+    def attach(self, elevators, controller):
+        super().attach(elevators, controller)
+        self.queues = [None] * len(elevators)
+        self.riders = [[] for _ in elevators]
+        self.load = array("I", bytes(4 * len(elevators)))
+
+    def passenger(self, elevator, floor, now, destination=None):
+        """
+        Новый пассажир на этаже floor.
+
+        :param destination: int, этаж назначения или None - случайный
+        :return: int, номер пассажира
+        """
+        if destination is None:
+            destination = self.destination(floor, elevator.floors_amount)
+        weight = max(20, round(self.rng.gauss(self.weight_mean, self.weight_sigma)))
+        self.created += 1
+        return self.pool.allocate(floor, destination, weight, now)
+
+    def destination(self, floor, floors_amount):
+        """
+        Случайный этаж назначения: с первого этажа - наверх, с остальных - на первый (lobby_share) или другой этаж.
+
+        :return: int
+        """
+        if floor == 1:
+            return self.rng.randint(2, floors_amount)
+        if floors_amount == 2 or self.rng.random() < self.lobby_share:
+            return 1
+        destination = self.rng.randint(2, floors_amount - 1)
+        return destination + 1 if destination >= floor else destination
+
+    def on_event(self, elevator, kind, floor, value):
+        if kind == EVENT_CALL and self.spawn:
+            line = self.line(elevator, floor)
+            now = self.clock()
+            for _ in range(self.rng.choices(self.group_sizes, self.group_weights)[0]):
+                line.append(self.passenger(elevator, floor, now))
+            self.waiting[elevator.elevator_id - 1][floor - 1] = len(line)
+        elif kind == EVENT_PICKUP:
+            self.board(elevator, floor)
+
+    def line(self, elevator, floor):
+        """
+        Очередь ожидающих лифт elevator на этаже floor (номера пассажиров в порядке появления).
+
+        :return: deque of int
+        """
+        index = elevator.elevator_id - 1
+        if self.queues[index] is None:
+            self.queues[index] = [deque() for _ in range(elevator.floors_amount)]
+        return self.queues[index][floor - 1]
+
+    def arrive(self, elevator, floor, destination):
+        """
+        Пассажир с известным этажом назначения встаёт в очередь лифта elevator на этаже floor (вызов не подаётся).
+
+        :return: int, номер пассажира
+        """
+        line = self.line(elevator, floor)
+        handle = self.passenger(elevator, floor, self.clock(), destination)
+        line.append(handle)
+        self.waiting[elevator.elevator_id - 1][floor - 1] = len(line)
+        return handle
+
+    def room(self, elevator):
+        return max(0, elevator.capacity - self.load[elevator.elevator_id - 1]) // self.person_weight
+
+    def board(self, elevator, floor):
+        """
+        Посадка ожидающих в порядке очереди, пока их вес помещается в грузоподъёмность.
+        """
+        index = elevator.elevator_id - 1
+        lines = self.queues[index]
+        line = lines[floor - 1] if lines is not None else ()
+        pool, now = self.pool, self.clock()
+        boarding = 0
+        while line and self.load[index] + pool.weight[line[0]] <= elevator.capacity:
+            handle = line.popleft()
+            pool.boarded[handle] = now
+            self.waits.append(now - pool.arrival[handle])
+            self.riders[index].append(handle)
+            self.load[index] += pool.weight[handle]
+            boarding += 1
+        elevator.passengers += boarding
+        self.entering[index] = boarding
+        if boarding:
+            self.departures += 1
+        if line:
+            self.waiting[index][floor - 1] = len(line)
+            self.refused += len(line)
+            elevator.floors_queue.put(floor)
+            elevator.notify_event(EVENT_REFUSED, floor, len(line))
+        else:
+            self.waiting[index][floor - 1] = 0
+
+    def late_arrival(self, elevator):
+        index = elevator.elevator_id - 1
+        now = self.clock()
+        handle = self.passenger(elevator, elevator.current_floor, now)
+        self.pool.boarded[handle] = now
+        self.waits.append(0.0)
+        self.riders[index].append(handle)
+        self.load[index] += self.pool.weight[handle]
+        elevator.passengers += 1
+
+    def alight(self, elevator, boarding):
+        """
+        Выходят пассажиры, едущие на текущий этаж.
+        """
+        index = elevator.elevator_id - 1
+        floor, pool, now = elevator.current_floor, self.pool, self.clock()
+        staying = []
+        for handle in self.riders[index]:
+            if pool.destination[handle] == floor:
+                self.journey_times.append(now - pool.boarded[handle])
+                self.total_times.append(now - pool.arrival[handle])
+                self.load[index] -= pool.weight[handle]
+                pool.release(handle)
+            else:
+                staying.append(handle)
+        alighting = len(self.riders[index]) - len(staying)
+        if alighting:
+            self.drop_stops += 1
+        self.riders[index] = staying
+        elevator.passengers -= alighting
+        return alighting
+
+    def destinations(self, elevator):
+        """
+        Этажи назначения пассажиров кабины: сначала в сторону большинства, затем в обратную.
+        """
+        floor = elevator.current_floor
+        destinations = {self.pool.destination[handle] for handle in self.riders[elevator.elevator_id - 1]}
+        above = sorted(d for d in destinations if d > floor)
+        below = sorted((d for d in destinations if d < floor), reverse=True)
+        return above + below if len(above) >= len(below) else below + above
+
+    def summary(self):
+        """
+        :return: dict, итоги посадки и времена по пассажирам
+        """
+        result = super().summary()
+        waits, journeys, totals = sorted(self.waits), sorted(self.journey_times), sorted(self.total_times)
+        result.update({
+            "passengers": self.created,
+            "picked_up": len(waits),
+            "delivered": len(journeys),
+            "in_system": len(self.pool),
+            "waiting": sum(len(line) for lines in {id(lines): lines for lines in self.queues if lines}.values()
+                           for line in lines),  # очереди лифтов одного дома могут быть общими
+            "pool_size": len(self.pool.origin),
+            "wait_mean": sum(waits) / len(waits) if waits else None,
+            "wait_p95": percentile(waits, 95),
+            "wait_max": waits[-1] if waits else None,
+            "journey_mean": sum(journeys) / len(journeys) if journeys else None,
+            "journey_p95": percentile(journeys, 95),
+            "journey_max": journeys[-1] if journeys else None,
+            "total_mean": sum(totals) / len(totals) if totals else None,
+            "total_p95": percentile(totals, 95),
+            "stops_per_departure": self.drop_stops / self.departures if self.departures else None,
+        })
+        return result
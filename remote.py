@@ -0,0 +1,369 @@
+"""
+Симуляция в отдельном процессе и окно программы как тонкий клиент.
+
+Сервер (python remote.py) ведёт модели и генерацию вызовов в своём цикле asyncio и не зависит от отрисовки. Окно
+подключается по локальному TCP сокету и обменивается с сервером кадрами компактного бинарного протокола:
+
+* клиент -> сервер: команды оператора (остановить/запустить лифт, открыть/закрыть двери, запуск/пауза симуляции),
+  без ответа;
+* сервер -> клиент: приветствие с описанием парка, затем пачки изменений (MSG_DELTA) - записи только тех лифтов,
+  которые изменились с прошлой пачки.
+
+Каждая сторона держит свой бюджет задержки: сервер отправляет пачку не чаще раза в interval секунд и пропускает
+отправку, пока клиент не разобрал предыдущие (изменения при этом копятся и сливаются), а клиент применяет пачки у
+себя и перерисовывает окна по своему таймеру (MainWindow.attach_state_reader).
+
+Кадр: заголовок FRAME (тип, длина), затем данные.
+"""
+import argparse
+import asyncio
+import struct
+import sys
+from collections import namedtuple
+
+from engine import Simulation
+from model import House
+from operator_api import OperatorApi
+from shared_state import FleetState, car_state
+from shutdown import install_signal_handlers, log_report
+from sim_logging import LogService
+from ws_stream import StateStream
+
+FRAME = struct.Struct("<BI")  # тип сообщения, длина данных
+
+# сервер -> клиент
+MSG_HELLO = 1  # PARK, затем CAR на каждый лифт
+MSG_DELTA = 2  # количество (H), затем DELTA на каждый изменившийся лифт
+MSG_RUNNING = 3  # B - идёт ли симуляция
+
+# клиент -> сервер
+CMD_LIFT_STATUS = 16  # H - id лифта
+CMD_DOOR_STATUS = 17  # H - id лифта
+CMD_RUN = 18  # B - запустить (1) или поставить на паузу (0)
+
+PARK = struct.Struct("<IH")  # лифтов, этажей
+CAR = struct.Struct("<HHHHHBB")  # id, улица, дом, грузоподъёмность, жильцов, лифт включён, двери открыты
+DELTA = struct.Struct("<HHHfHBxII")  # id, этаж, цель, положение, очередь, флаги, вызовы слева, справа
+COUNT = struct.Struct("<H")
+ELEVATOR_ID = struct.Struct("<H")
+FLAG = struct.Struct("<B")
+
+CarInfo = namedtuple("CarInfo", ["elevator_id", "street_id", "house_id", "capacity", "live", "lift_status",
+                                 "door_status"])
+
+
+def frame(kind, payload=b""):
+    return FRAME.pack(kind, len(payload)) + payload
+
+
+async def read_frame(reader):
+    """
+    :param reader: asyncio.StreamReader
+    :return: (int, bytes) - тип и данные кадра
+    """
+    kind, length = FRAME.unpack(await reader.readexactly(FRAME.size))
+    return kind, await reader.readexactly(length) if length else b""
+
+
+class _Client:
+    """
+    Подключение окна к серверу: свой набор изменившихся лифтов и своя задача отправки.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.dirty = set()
+        self.task = None
+
+
+class SimulationServer(FleetState):
+    """
+    Сервер симуляции: безголовый Simulation в реальном времени и TCP сервер для тонких клиентов.
+    """
+
+    def __init__(self, simulation, interval=0.05, high_water=256 * 1024):
+        """
+        :param simulation: engine.Simulation, созданный с realtime=True
+        :param interval: float, наименьший период отправки пачек изменений клиенту, секунды
+        :param high_water: int, размер неотправленных данных клиента, при котором пачки откладываются
+        """
+        super().__init__(len(simulation.elevators))
+        self.simulation = simulation
+        self.interval = interval
+        self.high_water = high_water
+        self.clients = []
+        self.server = None
+        self.running = False
+        # подключается к модели сразу, а не на время прогона: состояние видно клиентам и на паузе
+        self.attach(simulation.elevators, simulation.controller)
+
+    def changed(self, elevator):
+        for client in self.clients:
+            client.dirty.add(elevator.elevator_id)
+
+    def hello(self):
+        simulation = self.simulation
+        payload = [PARK.pack(len(simulation.elevators), simulation.houses[0].floors_amount)]
+        for elevator, house in zip(simulation.elevators, simulation.houses):
+            payload.append(CAR.pack(elevator.elevator_id, elevator.street_id, elevator.house_id, elevator.capacity,
+                                    house.live, elevator.lift_status, elevator.door_status))
+        return frame(MSG_HELLO, b"".join(payload))
+
+    def delta(self, elevator_ids):
+        elevators = self.simulation.elevators
+        payload = [COUNT.pack(len(elevator_ids))]
+        for elevator_id in elevator_ids:
+            payload.append(DELTA.pack(elevator_id, *self.values(elevators[elevator_id - 1])))
+        return frame(MSG_DELTA, b"".join(payload))
+
+    async def send_deltas(self, client):
+        """
+        Отправка пачек изменений одному клиенту. Медленный клиент получает пачки реже, но каждая пачка содержит
+        последнее состояние всех изменившихся лифтов, так что ничего не теряется.
+        """
+        transport = client.writer.transport
+        while True:
+            await asyncio.sleep(self.interval)
+            if not client.dirty or transport.get_write_buffer_size() > self.high_water:
+                continue
+            elevator_ids = sorted(client.dirty)
+            client.dirty.clear()
+            for start in range(0, len(elevator_ids), 0xFFFF):
+                client.writer.write(self.delta(elevator_ids[start:start + 0xFFFF]))
+
+    async def handle(self, reader, writer):
+        client = _Client(writer)
+        client.dirty.update(range(1, len(self.simulation.elevators) + 1))  # первая пачка - полное состояние
+        writer.write(self.hello() + frame(MSG_RUNNING, FLAG.pack(self.running)))
+        self.clients.append(client)
+        client.task = asyncio.create_task(self.send_deltas(client), name="remote.send_deltas")
+        try:
+            while True:
+                kind, payload = await read_frame(reader)
+                await self.command(kind, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients.remove(client)
+            client.task.cancel()
+            writer.close()
+
+    async def command(self, kind, payload):
+        """
+        Выполняет команду клиента.
+
+        :param kind: int, тип команды CMD_*
+        :param payload: bytes
+        :return: None
+        """
+        controller = self.simulation.controller
+        if kind == CMD_LIFT_STATUS:
+            controller.change_elevator_status(*ELEVATOR_ID.unpack(payload))
+        elif kind == CMD_DOOR_STATUS:
+            controller.change_door_status(*ELEVATOR_ID.unpack(payload))
+        elif kind == CMD_RUN:
+            await self.set_running(bool(FLAG.unpack(payload)[0]))
+
+    async def set_running(self, running):
+        if running == self.running:
+            return
+        self.running = running
+        if running:
+            await self.simulation.start()
+        else:
+            await self.simulation.stop()
+            for elevator in self.simulation.elevators:  # остановка снимает все вызовы домов
+                self.left_mask[elevator.elevator_id - 1] = self.right_mask[elevator.elevator_id - 1] = 0
+                self.changed(elevator)
+        for client in self.clients:
+            client.writer.write(frame(MSG_RUNNING, FLAG.pack(running)))
+
+    async def serve(self, host="127.0.0.1", port=9200, autostart=False, budget=5.0, snapshot=None):
+        """
+        Запускает сервер и работает до отмены, затем упорядоченно завершает симуляцию (Simulation.shutdown).
+
+        :param budget: float, бюджет времени на завершение в секундах
+        :param snapshot: str или Path, файл последнего снимка, или None
+        :return: shutdown.ShutdownReport или None, если симуляция не шла
+        """
+        self.server = await asyncio.start_server(self.handle, host, port)
+        if autostart:
+            await self.set_running(True)
+        try:
+            await self.server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        self.server.close()
+        for client in self.clients:
+            client.writer.close()
+        if not self.running:
+            return None
+        self.running = False
+        return await self.simulation.shutdown(budget, snapshot)
+
+
+class RemoteElevator:
+    """
+    Лифт на стороне клиента: то, что окну лифта нужно от модели (характеристики, состояние, регистрация
+    наблюдателей). Состояние берётся из пачек изменений сервера.
+    """
+
+    def __init__(self, info, floors_amount):
+        self.street_id = info.street_id
+        self.house_id = info.house_id
+        self.elevator_id = info.elevator_id
+        self.capacity = info.capacity
+        self.floors_amount = floors_amount
+        self.lift_status = bool(info.lift_status)
+        self.door_status = bool(info.door_status)
+
+    # окно лифта регистрирует наблюдателей модели; у тонкого клиента их заменяют пачки изменений
+    def register_sc_observer(self, callback):
+        pass
+
+    register_ck_observer = register_ds_observer = register_sc_observer
+
+
+class RemoteFleet:
+    """
+    Клиент сервера симуляции. Для окна программы выглядит как контроллер (elevators, change_elevator_status,
+    change_door_status) и как читатель состояния (version, read) для MainWindow.attach_state_reader.
+    """
+
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.elevators = []
+        self.houses = []
+        self.floors_amount = 0
+        self.states = {}  # id лифта -> CarState
+        self.version = 0
+        self.running = False
+        self.task = None
+
+    async def connect(self, host="127.0.0.1", port=9200):
+        """
+        Подключается к серверу и получает описание парка.
+
+        :return: self
+        """
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        kind, payload = await read_frame(self.reader)
+        if kind != MSG_HELLO:
+            raise ConnectionError(f"unexpected message {kind} instead of hello")
+        count, self.floors_amount = PARK.unpack_from(payload)
+        for index in range(count):
+            info = CarInfo(*CAR.unpack_from(payload, PARK.size + index * CAR.size))
+            self.elevators.append(RemoteElevator(info, self.floors_amount))
+            self.houses.append(House(info.street_id, info.house_id, self.floors_amount, info.live))
+        self.task = asyncio.create_task(self.receive(), name="remote.receive")
+        return self
+
+    async def receive(self):
+        """
+        Применяет сообщения сервера к локальному состоянию.
+        """
+        try:
+            while True:
+                kind, payload = await read_frame(self.reader)
+                if kind == MSG_DELTA:
+                    self.apply_delta(payload)
+                elif kind == MSG_RUNNING:
+                    self.running = bool(FLAG.unpack(payload)[0])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def apply_delta(self, payload):
+        count, = COUNT.unpack_from(payload)
+        for index in range(count):
+            elevator_id, *values = DELTA.unpack_from(payload, COUNT.size + index * DELTA.size)
+            state = car_state(values, self.floors_amount)
+            self.states[elevator_id] = state
+            elevator = self.elevators[elevator_id - 1]
+            elevator.lift_status = state.lift_on
+            elevator.door_status = state.door_open
+            house = self.houses[elevator_id - 1]
+            house.left_calls = state.left_calls
+            house.right_calls = state.right_calls
+        self.version += 1
+
+    def read(self, elevator_id):
+        """
+        :param elevator_id: int, id лифта
+        :return: CarState или None, если состояние лифта ещё не пришло
+        """
+        return self.states.get(elevator_id)
+
+    def change_elevator_status(self, elevator_id):
+        """
+        Команда остановить/запустить лифт. Состояние меняется сразу (окно показывает его без ожидания сервера),
+        подтверждением служит следующая пачка изменений.
+        """
+        elevator = self.elevators[elevator_id - 1]
+        elevator.lift_status = not elevator.lift_status
+        self.writer.write(frame(CMD_LIFT_STATUS, ELEVATOR_ID.pack(elevator_id)))
+
+    def change_door_status(self, elevator_id):
+        elevator = self.elevators[elevator_id - 1]
+        elevator.door_status = not elevator.door_status
+        self.writer.write(frame(CMD_DOOR_STATUS, ELEVATOR_ID.pack(elevator_id)))
+
+    def set_running(self, running):
+        self.writer.write(frame(CMD_RUN, FLAG.pack(running)))
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сервер симуляции для окна программы (LIFT_REMOTE=адрес:порт)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--elevators", type=int, default=64)
+    parser.add_argument("--floors", type=int, default=3)
+    parser.add_argument("--strategy", default="FCFS")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--interval", type=float, default=0.05, help="период пачек изменений, секунды")
+    parser.add_argument("--autostart", action="store_true", help="запустить симуляцию сразу")
+    parser.add_argument("--ws-port", type=int, help="порт потока состояния по WebSocket для панелей в браузере")
+    parser.add_argument("--api-port", type=int, help="порт HTTP API команд оператора")
+    parser.add_argument("--shutdown-budget", type=float, default=5.0, help="секунд на завершение по SIGINT/SIGTERM")
+    parser.add_argument("--snapshot", help="файл последнего снимка состояния при завершении")
+    args = parser.parse_args(argv)
+
+    logs = LogService(json_output=False, stream=sys.stderr)  # итог завершения - в журнал "lift" в stderr
+    logs.start()
+    simulation = Simulation(num_elevators=args.elevators, floors_amount=args.floors, strategy=args.strategy,
+                            seed=args.seed, realtime=True)
+    server = SimulationServer(simulation, args.interval)
+    loop = simulation.loop
+    servers = []
+    if args.ws_port is not None:
+        stream = StateStream(len(simulation.elevators))
+        stream.attach(simulation.elevators, simulation.controller)
+        loop.run_until_complete(stream.start_server(args.host, args.ws_port))
+        servers.append(stream)
+    if args.api_port is not None:
+        api = OperatorApi(simulation.controller, simulation.houses)
+        loop.run_until_complete(api.start_server(args.host, args.api_port))
+        servers.append(api)
+    serving = loop.create_task(server.serve(args.host, args.port, args.autostart, args.shutdown_budget,
+                                            args.snapshot))
+    install_signal_handlers(loop, serving.cancel)
+    try:
+        report = loop.run_until_complete(serving)
+        for other in servers:
+            loop.run_until_complete(other.stop_server())
+        if report is not None:
+            log_report(report)
+    finally:
+        simulation.close()
+        logs.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Симуляция большого города в нескольких процессах: улицы делятся между процессами-шардами.
+
+Каждый шард - отдельный процесс со своим безголовым Simulation и своим циклом событий в виртуальном времени; он
+строит только лифты и дома своих улиц. Улицы друг с другом не взаимодействуют, поэтому шардам не нужно обмениваться
+состоянием - только держать общие часы. Координатор ведёт время эпохами: рассылает шардам "досчитать до T",
+ждёт ответы всех (барьер) и переходит к следующей эпохе. С ответом шард присылает счётчики вызовов и рейсов и
+поездки, завершённые за эпоху, уже с глобальными номерами лифтов и улиц. Координатор сливает поездки шардов в один
+поток по времени высадки и собирает из него общую статистику.
+
+Зерно шарда выводится из базового зерна и номера его первой улицы, поэтому прогон повторяется при том же
+количестве шардов.
+
+Запуск из корня проекта:
+
+    python sharding.py --streets 64 --workers 8 --duration 1h
+"""
+import argparse
+import asyncio
+import heapq
+import multiprocessing
+import os
+import random
+import time
+from types import SimpleNamespace
+
+from batch import parse_duration
+from dispatch import STRATEGIES
+from engine import Simulation
+from kinematics import CAR_TYPES
+from stats import TripSink, TripStats
+
+
+class _TripBuffer(TripSink):
+    """
+    Копит поездки шарда между эпохами и переводит номера лифтов в глобальные.
+    """
+
+    def __init__(self, clock, tracker, elevator_offset):
+        super().__init__(clock, tracker)
+        self.elevator_offset = elevator_offset
+        self.trips = []
+
+    def on_trip(self, trip):
+        self.trips.append(trip._replace(elevator_id=trip.elevator_id + self.elevator_offset))
+
+    def take(self):
+        trips, self.trips = self.trips, []
+        return trips
+
+
+def _shard_main(connection, config):
+    """
+    Тело процесса шарда: строит свою часть города и досчитывает эпохи по командам координатора.
+
+    :param connection: multiprocessing.Connection, канал к координатору
+    :param config: dict, параметры шарда
+    """
+    streets, houses, per_house = config["shape"]
+    simulation = Simulation(num_elevators=streets * houses * per_house, floors_amount=config["floors_amount"],
+                            strategy=config["strategy"], seed=config["seed"],
+                            call_probability=config["call_probability"], shape=config["shape"],
+                            demand=config["demand"], door_dwell=config["door_dwell"], parking=config["parking"],
+                            car_type=config["car_type"])
+    for elevator, house in zip(simulation.elevators, simulation.houses):  # глобальные номера улиц
+        elevator.street_id += config["street_offset"]
+        house.street_id += config["street_offset"]
+    buffer = simulation.add_sink(_TripBuffer(simulation.loop.time, simulation.tracker, config["elevator_offset"]))
+    loop = simulation.loop
+    try:
+        loop.run_until_complete(simulation.start())
+        started = loop.time()
+        busy = 0.0
+        while True:
+            command, until = connection.recv()
+            if command == "stop":
+                break
+            wall = time.perf_counter()
+            loop.run_until_complete(asyncio.sleep(max(0.0, started + until - loop.time())))
+            busy += time.perf_counter() - wall
+            connection.send((until, simulation.tracker.calls, simulation.tracker.trips, buffer.take(), busy))
+        loop.run_until_complete(simulation.stop())
+    finally:
+        simulation.close()
+        connection.close()
+
+
+def split_streets(streets, workers):
+    """
+    Делит улицы на непрерывные диапазоны почти равного размера.
+
+    :param streets: int, количество улиц
+    :param workers: int, количество шардов
+    :return: list of (первая улица, количество улиц), улицы с 1
+    """
+    workers = max(1, min(workers, streets))
+    base, extra = divmod(streets, workers)
+    ranges = []
+    first = 1
+    for index in range(workers):
+        count = base + (index < extra)
+        ranges.append((first, count))
+        first += count
+    return ranges
+
+
+class ShardedSimulation:
+    """
+    Координатор шардов.
+    """
+
+    def __init__(self, streets=16, houses=4, per_house=4, floors_amount=3, strategy="FCFS", seed=0,
+                 call_probability=13, workers=None, sync_interval=60.0, demand=None, door_dwell=3.0,
+                 parking="lobby", car_type=None):
+        """
+        :param streets: int, улиц в городе
+        :param houses: int, домов на улице
+        :param per_house: int, лифтов в доме
+        :param workers: int, процессов-шардов (None - по числу ядер, но не больше числа улиц)
+        :param sync_interval: float, длина эпохи в секундах симуляции (насколько шарды могут разойтись по времени)
+        Остальные параметры - как у Simulation.
+        """
+        self.shape = (streets, houses, per_house)
+        self.sync_interval = sync_interval
+        self.ranges = split_streets(streets, workers or os.cpu_count())
+        self.configs = []
+        for first, count in self.ranges:
+            self.configs.append({
+                "shape": (count, houses, per_house),
+                "street_offset": first - 1,
+                "elevator_offset": (first - 1) * houses * per_house,
+                "seed": random.Random(f"{seed}:{first}").getrandbits(32),
+                "floors_amount": floors_amount,
+                "strategy": strategy,
+                "call_probability": call_probability,
+                "demand": demand,
+                "door_dwell": door_dwell,
+                "parking": parking,
+                "car_type": car_type,
+            })
+        self.stats = TripStats()
+        self.calls = 0
+        self.trips = 0
+        self.shard_busy = [0.0] * len(self.configs)
+
+    def run(self, duration, on_trip=None):
+        """
+        Прогоняет город duration секунд симуляции.
+
+        :param duration: float, секунды симуляции
+        :param on_trip: функция, получающая слитый по времени высадки поток поездок (Trip) всех шардов
+        :return: dict, см. TripStats.summary, плюс сведения о шардах
+        """
+        context = multiprocessing.get_context()
+        connections = []
+        processes = []
+        for config in self.configs:
+            parent, child = context.Pipe()
+            process = context.Process(target=_shard_main, args=(child, config), daemon=True,
+                                      name=f"shard-{config['street_offset'] + 1}")
+            process.start()
+            child.close()
+            connections.append(parent)
+            processes.append(process)
+        started = time.perf_counter()
+        try:
+            now = 0.0
+            while now < duration:
+                now = min(duration, now + self.sync_interval)
+                for connection in connections:
+                    connection.send(("run", now))
+                replies = [connection.recv() for connection in connections]  # барьер эпохи
+                self.calls = sum(reply[1] for reply in replies)
+                self.trips = sum(reply[2] for reply in replies)
+                for index, reply in enumerate(replies):
+                    self.shard_busy[index] = reply[4]
+                for trip in heapq.merge(*(reply[3] for reply in replies), key=lambda trip: trip.drop_time):
+                    self.stats(trip)
+                    if on_trip is not None:
+                        on_trip(trip)
+        finally:
+            for connection in connections:
+                try:
+                    connection.send(("stop", None))
+                except (BrokenPipeError, OSError):
+                    pass
+            for process in processes:
+                process.join()
+            for connection in connections:
+                connection.close()
+        wall_time = time.perf_counter() - started
+        summary = self.stats.summary(SimpleNamespace(calls=self.calls, trips=self.trips), duration)
+        summary["shards"] = len(self.configs)
+        summary["wall_time"] = wall_time
+        summary["shard_busy"] = list(self.shard_busy)
+        return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streets", type=int, default=16)
+    parser.add_argument("--houses", type=int, default=4)
+    parser.add_argument("--per-house", type=int, default=4)
+    parser.add_argument("--floors", type=int, default=3)
+    parser.add_argument("--strategy", default="FCFS", choices=list(STRATEGIES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="процессов (по умолчанию по числу ядер)")
+    parser.add_argument("--sync-interval", type=float, default=60.0, help="длина эпохи в секундах симуляции")
+    parser.add_argument("--duration", type=parse_duration, default=3600.0)
+    parser.add_argument("--car-type", choices=list(CAR_TYPES), help="кинематическая модель лифта")
+    args = parser.parse_args(argv)
+
+    simulation = ShardedSimulation(args.streets, args.houses, args.per_house, args.floors, args.strategy, args.seed,
+                                   workers=args.workers, sync_interval=args.sync_interval, car_type=args.car_type)
+    summary = simulation.run(args.duration)
+    elevators = args.streets * args.houses * args.per_house
+    print(f"{elevators} лифтов на {summary['shards']} шардах: {args.duration:.0f} с симуляции за "
+          f"{summary['wall_time']:.1f} с ({args.duration * elevators / summary['wall_time']:.0f} лифто-секунд/с)")
+    print(f"Вызовов {summary['calls_generated']}, обслужено {summary['calls_served']}, "
+          f"ожидание ср. {summary['wait_mean'] or 0:.1f} с, p95 {summary['wait_p95'] or 0:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
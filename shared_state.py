@@ -0,0 +1,269 @@
+"""
+Состояние парка лифтов в разделяемой памяти (multiprocessing.shared_memory) для интерфейса в другом процессе.
+
+Блок имеет фиксированную раскладку: заголовок и по записи RECORD на лифт - этаж, цель, положение кабины на полосе
+прокрутки, глубина очереди, флаги (двери, лифт включён, лифт занят) и биты вызовов дома слева и справа. Симуляция
+пишет запись лифта на каждое событие модели одним struct.pack_into, читатели разбирают её struct.unpack_from прямо
+из разделяемого буфера - без сериализации и копирования всего состояния.
+
+Согласованность - seqlock на каждую запись: писатель делает счётчик записи нечётным, пишет поля и делает его
+чётным; читатель повторяет чтение, если счётчик нечётный или изменился за время чтения. Общий счётчик версий в
+заголовке растёт при каждом изменении, по нему читатель понимает, что перерисовывать нечего.
+"""
+import struct
+from array import array
+from collections import namedtuple
+from multiprocessing import resource_tracker, shared_memory
+
+from model import (ACTION_DOOR_STATUS, ACTION_LIFT_STATUS, EVENT_CALL, EVENT_CHECK, EVENT_DISPATCH, EVENT_DOOR,
+                   EVENT_SCROLL)
+
+try:
+    import numpy
+except ImportError:  # numpy нужен только для numpy_view()
+    numpy = None
+
+MAGIC = b"LIFTSHM1"
+HEADER = struct.Struct("<8sIII4xQ")  # сигнатура, лифтов, этажей, размер записи, версия
+VERSION_OFFSET = 24
+RECORD = struct.Struct("<IHHfHBxII")  # seqlock, этаж, цель, положение, очередь, флаги, вызовы слева, справа
+MAX_FLOORS = 32  # биты вызовов - в 32-битных масках
+
+# биты поля flags
+DOOR_OPEN = 1
+LIFT_ON = 2
+BUSY = 4
+
+# Состояние лифта; target_floor равен 0, если лифт свободен
+CarState = namedtuple("CarState", ["floor", "target_floor", "position", "queue_depth", "door_open", "lift_on",
+                                   "busy", "left_calls", "right_calls"])
+
+if numpy is not None:
+    RECORD_DTYPE = numpy.dtype([("seq", "<u4"), ("floor", "<u2"), ("target_floor", "<u2"), ("position", "<f4"),
+                                ("queue_depth", "<u2"), ("flags", "u1"), ("pad", "V1"), ("left_mask", "<u4"),
+                                ("right_mask", "<u4")])
+
+
+def block_size(num_elevators):
+    return HEADER.size + num_elevators * RECORD.size
+
+
+def car_state(values, floors_amount):
+    """
+    Собирает CarState из значений записи.
+
+    :param values: (этаж, цель, положение, очередь, флаги, маска слева, маска справа)
+    :param floors_amount: int, количество этажей
+    :return: CarState
+    """
+    floor, target, position, depth, flags, left, right = values
+    floors = range(floors_amount)
+    return CarState(floor, target, position, depth, bool(flags & DOOR_OPEN), bool(flags & LIFT_ON), bool(flags & BUSY),
+                    [bool(left >> bit & 1) for bit in floors], [bool(right >> bit & 1) for bit in floors])
+
+
+class FleetState:
+    """
+    Отображаемое состояние парка, которое ведётся по событиям модели: приёмник (attach/detach/close), вызывающий
+    changed(elevator) при каждом изменении лифта. Положение кабины и вызовы дома модель не хранит (их держат
+    представления), поэтому они собираются здесь из событий.
+    """
+
+    def __init__(self, num_elevators):
+        """
+        :param num_elevators: int, количество лифтов
+        """
+        self.num_elevators = num_elevators
+        self.position = array("f", [1.0] * num_elevators)
+        self.left_mask = array("I", bytes(4 * num_elevators))
+        self.right_mask = array("I", bytes(4 * num_elevators))
+        self.elevators = []
+
+    def attach(self, elevators, controller):
+        self.elevators = elevators
+        for elevator in elevators:
+            elevator.register_event_observer(self.on_event)
+            self.changed(elevator)
+        controller.register_action_observer(self.on_action)
+
+    def detach(self, elevators, controller):
+        for elevator in elevators:
+            elevator.event_callbacks.remove(self.on_event)
+        controller.action_callbacks.remove(self.on_action)
+
+    def on_event(self, elevator, kind, floor, value):
+        index = elevator.elevator_id - 1
+        if kind == EVENT_SCROLL:
+            if not value:  # сброс положения при взятии вызова - положение не меняется
+                return
+            self.position[index] = value
+        elif kind == EVENT_CALL:
+            if value:
+                self.left_mask[index] |= 1 << (floor - 1)
+            else:
+                self.right_mask[index] |= 1 << (floor - 1)
+        elif kind == EVENT_CHECK:
+            bit = ~(1 << (floor - 1)) & 0xFFFFFFFF
+            self.left_mask[index] &= bit
+            self.right_mask[index] &= bit
+        elif kind not in (EVENT_DOOR, EVENT_DISPATCH):
+            return  # подбор и высадка не меняют отображаемого состояния
+        self.changed(elevator)
+
+    def on_action(self, elevator_id, action, value):
+        if action == ACTION_LIFT_STATUS and not value:  # остановленный лифт теряет вызовы дома
+            self.left_mask[elevator_id - 1] = self.right_mask[elevator_id - 1] = 0
+        if action in (ACTION_LIFT_STATUS, ACTION_DOOR_STATUS):
+            self.changed(self.elevators[elevator_id - 1])
+
+    def values(self, elevator):
+        """
+        Значения записи лифта: (этаж, цель, положение, очередь, флаги, маска слева, маска справа).
+
+        :param elevator: Elevator
+        :return: tuple
+        """
+        index = elevator.elevator_id - 1
+        flags = (DOOR_OPEN if elevator.door_status else 0) | (LIFT_ON if elevator.lift_status else 0) | \
+                (BUSY if elevator.target_floor is not None else 0)
+        return (elevator.current_floor, elevator.target_floor or 0, self.position[index],
+                min(elevator.floors_queue.qsize(), 0xFFFF), flags, self.left_mask[index], self.right_mask[index])
+
+    def changed(self, elevator):
+        pass
+
+    def close(self):
+        pass
+
+
+class FleetStateWriter(FleetState):
+    """
+    Писатель блока состояния в разделяемой памяти.
+    """
+
+    def __init__(self, num_elevators, floors_amount, name=None):
+        """
+        :param num_elevators: int, количество лифтов
+        :param floors_amount: int, наибольшее количество этажей (не больше MAX_FLOORS)
+        :param name: str, имя блока разделяемой памяти (None - выбрать случайное)
+        """
+        if floors_amount > MAX_FLOORS:
+            raise ValueError(f"shared state supports up to {MAX_FLOORS} floors")
+        super().__init__(num_elevators)
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=block_size(num_elevators))
+        self.name = self.shm.name
+        self.buf = self.shm.buf
+        HEADER.pack_into(self.buf, 0, MAGIC, num_elevators, floors_amount, RECORD.size, 0)
+        self.version = 0
+        self.seq = array("I", bytes(4 * num_elevators))
+
+    def changed(self, elevator):
+        self.write(elevator)
+
+    def write(self, elevator):
+        """
+        Записывает состояние лифта под seqlock.
+
+        :param elevator: Elevator
+        :return: None
+        """
+        index = elevator.elevator_id - 1
+        offset = HEADER.size + index * RECORD.size
+        seq = self.seq[index] + 1
+        struct.pack_into("<I", self.buf, offset, seq)  # нечётный - запись идёт
+        RECORD.pack_into(self.buf, offset, seq, *self.values(elevator))
+        self.seq[index] = seq + 1
+        struct.pack_into("<I", self.buf, offset, seq + 1)
+        self.version += 1
+        struct.pack_into("<Q", self.buf, VERSION_OFFSET, self.version)
+
+    def close(self):
+        """
+        Освобождает и удаляет блок. Читатели, которые его ещё держат, дочитывают уже открытое отображение.
+
+        :return: None
+        """
+        if self.shm is None:
+            return
+        self.buf = None
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+
+def _attach(name):
+    """
+    Открывает существующий блок, не передавая его трекеру ресурсов: удаляет блок только писатель.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13: параметра track нет, на время открытия отключаем регистрацию
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None if rtype == "shared_memory" else register(name, rtype)
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class FleetStateReader:
+    """
+    Читатель блока состояния в другом процессе (окно программы, экспорт).
+    """
+
+    def __init__(self, name, retries=100):
+        """
+        :param name: str, имя блока (FleetStateWriter.name)
+        :param retries: int, сколько раз повторять чтение записи, которую в этот момент пишут
+        """
+        self.shm = _attach(name)
+        self.buf = self.shm.buf
+        magic, self.num_elevators, self.floors_amount, record_size, _ = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or record_size != RECORD.size:
+            self.close()
+            raise ValueError(f"{name}: not a fleet state block")
+        self.retries = retries
+
+    @property
+    def version(self):
+        return struct.unpack_from("<Q", self.buf, VERSION_OFFSET)[0]
+
+    def read_raw(self, elevator_id):
+        """
+        Согласованная запись лифта как есть: (этаж, цель, положение, очередь, флаги, маска слева, маска справа).
+
+        :param elevator_id: int, id лифта
+        :return: tuple
+        """
+        offset = HEADER.size + (elevator_id - 1) * RECORD.size
+        buf = self.buf
+        for _ in range(self.retries):
+            values = RECORD.unpack_from(buf, offset)
+            if not values[0] & 1 and struct.unpack_from("<I", buf, offset)[0] == values[0]:
+                return values[1:]
+        raise RuntimeError(f"elevator {elevator_id}: state is being rewritten too often to read")
+
+    def read(self, elevator_id):
+        """
+        :param elevator_id: int, id лифта
+        :return: CarState
+        """
+        return car_state(self.read_raw(elevator_id), self.floors_amount)
+
+    def numpy_view(self):
+        """
+        Все записи как структурированный массив numpy поверх разделяемой памяти (без копирования). Записи в
+        массиве не защищены seqlock: для согласованного значения отдельного лифта используйте read().
+
+        :return: numpy.ndarray
+        """
+        if numpy is None:
+            raise RuntimeError("numpy is required for numpy_view(), install it with `pip install numpy`")
+        return numpy.ndarray((self.num_elevators,), dtype=RECORD_DTYPE, buffer=self.buf, offset=HEADER.size)
+
+    def close(self):
+        if self.shm is None:
+            return
+        self.buf = None
+        self.shm.close()
+        self.shm = None
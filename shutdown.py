@@ -0,0 +1,201 @@
+"""
+Упорядоченное завершение симуляции за ограниченное время - общее для окна программы и безголового Simulation.
+
+Порядок шагов:
+
+1. последний снимок состояния (если нужен) - до отмены задач, пока очереди и вызовы домов целы;
+2. отмена всех задач лифтов (lift_simulation и simulate_queue) разом и ожидание их завершения;
+3. остановка серверов (метрики, WebSocket, API оператора) в цикле событий;
+4. отключение приёмников (detach) и закрытие (close): журналы, метрики, экспорт и история дописываются на диск.
+
+Каждый шаг получает остаток общего бюджета budget. Что не уложилось, бросается и не задерживает выход: недождавшиеся
+задачи и незакрытые приёмники попадают в отчёт. Приёмники закрываются в отдельном фоновом потоке, чтобы
+зависшая запись на диск не держала выход дольше бюджета, а цикл событий (и окно программы) тем временем работает.
+
+Бюджет отсчитывается по одним часам - time.monotonic(), а не по времени цикла: в цикле с виртуальным временем
+(engine.VirtualTimeLoop) таймауты asyncio срабатывают сразу, поэтому срок бюджета - таймер в потоке (Deadline).
+"""
+import asyncio
+import inspect
+import logging
+import signal
+import threading
+import time
+from collections import namedtuple
+
+# Итог завершения: время, размер последнего снимка (None - не снимался), сколько задач завершилось и сколько
+# брошено, закрытые приёмники и ошибки по шагам
+ShutdownReport = namedtuple("ShutdownReport", ["elapsed", "snapshot_size", "cancelled", "abandoned", "closed",
+                                               "errors", "timed_out"])
+
+_logger = logging.getLogger("lift.shutdown")
+
+
+class Deadline:
+    """
+    Срок бюджета по time.monotonic(): future expired завершается из потока-таймера, поэтому ожидание до срока идёт в
+    настоящих секундах и в цикле с виртуальным временем.
+    """
+
+    def __init__(self, loop, budget):
+        """
+        :param loop: asyncio.AbstractEventLoop
+        :param budget: float, секунды
+        """
+        self.started = time.monotonic()
+        self.deadline = self.started + budget
+        self.loop = loop
+        self.expired = loop.create_future()
+        self.timer = threading.Timer(budget, self._fire)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _fire(self):
+        _call_soon(self.loop, _set_done, self.expired)
+
+    def remaining(self):
+        """
+        :return: float, остаток бюджета в секундах
+        """
+        return max(0.0, self.deadline - time.monotonic())
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    async def wait(self, futures):
+        """
+        Ждёт futures, но не дольше срока.
+
+        :param futures: список задач и future этого цикла
+        :return: set, незавершённые к сроку
+        """
+        pending = set(futures)
+        while pending and not self.expired.done():
+            _, pending = await asyncio.wait(pending | {self.expired}, return_when=asyncio.FIRST_COMPLETED)
+            pending.discard(self.expired)
+        return pending
+
+    def cancel(self):
+        self.timer.cancel()
+
+
+def _call_soon(loop, callback, *args):
+    try:
+        loop.call_soon_threadsafe(callback, *args)
+    except RuntimeError:  # цикл уже закрыт - ждать некому
+        pass
+
+
+def close_sink(sink, timeout):
+    """
+    Закрывает приёмник, передавая ему остаток бюджета, если close() принимает timeout.
+
+    :return: None
+    """
+    if "timeout" in inspect.signature(sink.close).parameters:
+        sink.close(timeout=timeout)
+    else:
+        sink.close()
+
+
+async def shutdown(tasks, sinks=(), elevators=(), controller=None, budget=5.0, snapshot=None, servers=()):
+    """
+    Завершает симуляцию не дольше budget секунд.
+
+    :param tasks: список задач лифтов для отмены
+    :param sinks: приёмники для отключения и закрытия
+    :param elevators: лифты, к которым подключены приёмники
+    :param controller: ElevatorController или None, если приёмники не подключены (симуляция не запускалась)
+    :param budget: float, бюджет времени в секундах
+    :param snapshot: функция без аргументов, записывающая последний снимок и возвращающая его размер, или None
+    :param servers: объекты с async stop_server()
+    :return: ShutdownReport
+    """
+    loop = asyncio.get_running_loop()
+    deadline = Deadline(loop, budget)
+    try:
+        return await _shutdown(deadline, loop, tasks, sinks, elevators, controller, snapshot, servers)
+    finally:
+        deadline.cancel()
+
+
+async def _shutdown(deadline, loop, tasks, sinks, elevators, controller, snapshot, servers):
+    errors = []
+    snapshot_size = None
+    if snapshot is not None:
+        try:
+            snapshot_size = snapshot()
+        except OSError as error:
+            errors.append(("snapshot", repr(error)))
+
+    tasks = [task for task in tasks if task is not None]
+    for task in tasks:
+        task.cancel()
+    pending = await deadline.wait(tasks)
+
+    for server in servers:
+        stopping = asyncio.ensure_future(server.stop_server())
+        if await deadline.wait([stopping]):
+            stopping.cancel()
+            errors.append((type(server).__name__, "stop_server timed out"))
+        elif stopping.exception() is not None:
+            errors.append((type(server).__name__, repr(stopping.exception())))
+
+    if controller is not None:
+        for sink in sinks:
+            sink.detach(elevators, controller)
+
+    closed = []
+    sink_errors = []
+    done = loop.create_future()
+
+    def close_all():
+        for sink in sinks:
+            try:
+                close_sink(sink, deadline.remaining())
+                closed.append(type(sink).__name__)
+            except Exception as error:  # один сломанный приёмник не мешает закрыть остальные
+                sink_errors.append((type(sink).__name__, repr(error)))
+        _call_soon(loop, _set_done, done)
+
+    # Поток-демон, а не пул потоков цикла: зависший close() не должен держать и выход из интерпретатора
+    threading.Thread(target=close_all, name="shutdown-close", daemon=True).start()
+    closing = await deadline.wait([done])
+    # отчёт - из копий: не уложившийся в бюджет поток может ещё дописывать списки
+    return ShutdownReport(deadline.elapsed(), snapshot_size, len(tasks) - len(pending), len(pending), list(closed),
+                          errors + sink_errors, bool(pending) or bool(closing))
+
+
+def _set_done(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def log_report(report):
+    """
+    Записывает итог завершения в журнал "lift.shutdown": предупреждением, если что-то не уложилось в бюджет или
+    завершилось с ошибкой, иначе - информационной записью.
+
+    :param report: ShutdownReport
+    :return: None
+    """
+    level = logging.WARNING if report.timed_out or report.errors else logging.INFO
+    _logger.log(level, "Завершение за %.2f с: задач %d, брошено %d, снимок %d байт, ошибки %s", report.elapsed,
+                report.cancelled, report.abandoned, report.snapshot_size or 0, report.errors)
+
+
+def install_signal_handlers(loop, callback):
+    """
+    Вызывает callback по SIGINT и SIGTERM в цикле событий (без KeyboardInterrupt посреди шага симуляции). Там,
+    где цикл не поддерживает обработчики сигналов (Windows), ничего не делает.
+
+    :param loop: asyncio.AbstractEventLoop
+    :param callback: функция без аргументов
+    :return: bool, установлены ли обработчики
+    """
+    try:
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, callback)
+    except (NotImplementedError, RuntimeError):
+        return False
+    return True
@@ -0,0 +1,247 @@
+"""
+Неблокирующее структурированное логгирование симуляции.
+
+Записи создаются в цикле событий (модель, наблюдатели, оператор) и без форматирования кладутся в очередь в памяти.
+Форматирует и пишет их в файл фоновый поток (logging.handlers.QueueListener), поэтому файловый ввод-вывод не
+задерживает цикл asyncio. До очереди записи проходят фильтры: уровень для каждой подсистемы и ограничение частоты
+для каждого лифта.
+
+Подсистемы - это дочерние логгеры "lift": lift.model, lift.traffic, lift.operator, lift.loop.
+"""
+import asyncio
+import json
+import logging
+import logging.handlers
+import queue
+import time
+
+from model import (ACTION_DOOR_STATUS, ACTION_FORCE_TARGET, ACTION_LIFT_STATUS, EVENT_CALL, EVENT_CHECK, EVENT_DISPATCH,
+                   EVENT_DOOR, EVENT_DROP, EVENT_PICKUP, EVENT_REFUSED, EVENT_SCROLL)
+
+ROOT_LOGGER = "lift"
+
+_EVENT_NAMES = {
+    EVENT_CALL: "call",
+    EVENT_DISPATCH: "dispatch",
+    EVENT_PICKUP: "pickup",
+    EVENT_DROP: "drop",
+    EVENT_SCROLL: "scroll",
+    EVENT_CHECK: "check",
+    EVENT_DOOR: "door",
+    EVENT_REFUSED: "refused",
+}
+_ACTION_NAMES = {ACTION_LIFT_STATUS: "lift_status", ACTION_DOOR_STATUS: "door_status",
+                 ACTION_FORCE_TARGET: "force_target"}
+_DEBUG_EVENTS = {EVENT_SCROLL, EVENT_CHECK, EVENT_DOOR}  # частые уведомления наблюдателей
+
+# Поля LogRecord, которые не выводятся как пользовательские поля JSON
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматирует запись в одну строку JSON: время, уровень, подсистема, сообщение и поля из extra.
+    """
+
+    def format(self, record):
+        data = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class ElevatorRateLimiter(logging.Filter):
+    """
+    Ограничение частоты записей для каждого лифта (token bucket по полю elevator_id). Записи без elevator_id
+    пропускаются. Отброшенные записи только считаются.
+    """
+
+    def __init__(self, rate=10.0, burst=50):
+        """
+        :param rate: float, записей в секунду на лифт
+        :param burst: int, допустимый всплеск
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}  # лифт -> [токены, время последнего пополнения]
+        self.dropped = 0
+
+    def filter(self, record):
+        elevator_id = getattr(record, "elevator_id", None)
+        if elevator_id is None:
+            return True
+        now = record.created
+        bucket = self.buckets.get(elevator_id)
+        if bucket is None:
+            bucket = self.buckets[elevator_id] = [self.burst, now]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True
+        self.dropped += 1
+        return False
+
+
+class _UnformattedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, который не форматирует запись в вызывающем потоке: записи не покидают процесс, поэтому их можно
+    передать фоновому потоку как есть.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class LogService:
+    """
+    Очередь записей и фоновый поток записи. Подключает обработчик к логгеру "lift".
+    """
+
+    def __init__(self, path=None, levels=None, json_output=True, rate=10.0, burst=50, stream=None):
+        """
+        :param path: str или Path, файл журнала (None - поток stream или stderr)
+        :param levels: dict, подсистема -> уровень, например {"model": "DEBUG", "traffic": "INFO"}
+        :param json_output: bool, писать JSON, иначе обычный текст
+        :param rate: float, ограничение записей в секунду на лифт (None - без ограничения)
+        :param burst: int, допустимый всплеск записей на лифт
+        :param stream: поток вывода, если path не задан
+        """
+        self.queue = queue.SimpleQueue()
+        if path is not None:
+            handler = logging.FileHandler(path, encoding="utf-8")
+        else:
+            handler = logging.StreamHandler(stream)
+        if json_output:
+            handler.setFormatter(JsonFormatter())
+        else:
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        self.handler = handler
+        self.queue_handler = _UnformattedQueueHandler(self.queue)
+        self.rate_limiter = None
+        if rate is not None:
+            self.rate_limiter = ElevatorRateLimiter(rate, burst)
+            self.queue_handler.addFilter(self.rate_limiter)
+        self.listener = logging.handlers.QueueListener(self.queue, handler, respect_handler_level=True)
+        self.running = False
+
+        self.logger = logging.getLogger(ROOT_LOGGER)
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.set_levels(levels or {})
+
+    @staticmethod
+    def set_levels(levels):
+        """
+        Задаёт уровни подсистем. Можно вызывать на ходу.
+
+        :param levels: dict, подсистема -> уровень (имя или число)
+        :return: None
+        """
+        for subsystem, level in levels.items():
+            if isinstance(level, str):
+                level = logging.getLevelName(level.upper())
+            logging.getLogger(f"{ROOT_LOGGER}.{subsystem}").setLevel(level)
+
+    def start(self):
+        if self.running:
+            return
+        self.logger.addHandler(self.queue_handler)
+        self.listener.start()
+        self.running = True
+
+    def stop(self):
+        """
+        Отключает обработчик и дожидается записи всех записей из очереди.
+
+        :return: None
+        """
+        if not self.running:
+            return
+        self.logger.removeHandler(self.queue_handler)
+        self.listener.stop()
+        self.handler.close()
+        self.running = False
+
+
+def parse_levels(text):
+    """
+    Разбирает строку вида "model=DEBUG,traffic=INFO".
+
+    :param text: str
+    :return: dict
+    """
+    levels = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        subsystem, _, level = item.partition("=")
+        levels[subsystem.strip()] = level.strip()
+    return levels
+
+
+class LoggingSink:
+    """
+    Приёмник событий модели и действий оператора (attach/detach/close, как у EventLog), пишущий их в логгеры
+    lift.model, lift.traffic и lift.operator.
+    """
+
+    def __init__(self, service=None):
+        """
+        :param service: LogService, который нужно остановить при close() (или None)
+        """
+        self.service = service
+        self.model = logging.getLogger(f"{ROOT_LOGGER}.model")
+        self.traffic = logging.getLogger(f"{ROOT_LOGGER}.traffic")
+        self.operator = logging.getLogger(f"{ROOT_LOGGER}.operator")
+
+    def attach(self, elevators, controller):
+        for elevator in elevators:
+            elevator.register_event_observer(self.on_event)
+        controller.register_action_observer(self.on_action)
+
+    def detach(self, elevators, controller):
+        for elevator in elevators:
+            elevator.event_callbacks.remove(self.on_event)
+        controller.action_callbacks.remove(self.on_action)
+
+    def on_event(self, elevator, kind, floor, value):
+        if kind == EVENT_CALL:
+            logger, level = self.traffic, logging.INFO
+        else:
+            logger = self.model
+            level = logging.DEBUG if kind in _DEBUG_EVENTS else logging.INFO
+        if not logger.isEnabledFor(level):  # дешёвая проверка до создания записи
+            return
+        logger.log(level, "%s elevator=%s floor=%s", _EVENT_NAMES.get(kind, kind), elevator.elevator_id, floor,
+                   extra={"event": _EVENT_NAMES.get(kind, kind), "elevator_id": elevator.elevator_id,
+                          "street_id": elevator.street_id, "house_id": elevator.house_id, "floor": floor,
+                          "value": value, "loop_time": _loop_time()})
+
+    def on_action(self, elevator_id, action, value):
+        if self.operator.isEnabledFor(logging.INFO):
+            self.operator.info("%s elevator=%s value=%s", _ACTION_NAMES.get(action, action), elevator_id, value,
+                               extra={"action": _ACTION_NAMES.get(action, action), "elevator_id": elevator_id,
+                                      "value": value})
+
+    def close(self):
+        if self.service is not None:
+            self.service.stop()
+
+
+def _loop_time():
+    """
+    Время цикла событий (в безголовой симуляции - виртуальное), если он запущен.
+    """
+    try:
+        return asyncio.get_running_loop().time()
+    except RuntimeError:
+        return time.monotonic()
@@ -0,0 +1,166 @@
+from collections import namedtuple
+
+from model import EVENT_CALL, EVENT_DISPATCH, EVENT_DROP, EVENT_PICKUP, EVENT_REFUSED
+
+# Завершённая поездка: floor - этаж вызова, drop_floor - этаж высадки. call_time равен None для пустых рейсов
+# (например, SCAN до конца шахты).
+Trip = namedtuple("Trip", ["elevator_id", "house_id", "street_id", "floor", "call_time", "pickup_time", "drop_time",
+                           "drop_floor"])
+
+
+class TripTracker:
+    """
+    Наблюдатель за событиями модели (Elevator.register_event_observer). Сопоставляет вызов, подбор пассажиров и
+    высадку на первом этаже и отдаёт готовые поездки Trip подписчикам.
+    """
+
+    def __init__(self, clock, num_elevators):
+        """
+        :param clock: функция без аргументов, текущее время цикла (обычно loop.time)
+        :param num_elevators: int, количество лифтов
+        """
+        self.clock = clock
+        self.call_times = [{} for _ in range(num_elevators)]  # этаж -> времена вызовов в порядке поступления
+        self.current = [None] * num_elevators  # [этаж, время вызова, время подбора] текущей поездки
+        self.trip_callbacks = []
+        self.calls = 0
+        self.trips = 0
+
+    def register_trip_observer(self, callback):
+        self.trip_callbacks.append(callback)
+
+    def reset(self, elevator_id):
+        """
+        Забывает незавершённые вызовы и поездку лифта (например, когда оператор его остановил).
+
+        :param elevator_id: int, id лифта
+        :return: None
+        """
+        self.call_times[elevator_id - 1].clear()
+        self.current[elevator_id - 1] = None
+
+    def __call__(self, elevator, kind, floor, value):
+        index = elevator.elevator_id - 1
+        if kind == EVENT_CALL:
+            self.calls += 1
+            self.call_times[index].setdefault(floor, []).append(self.clock())
+        elif kind == EVENT_DISPATCH:
+            self.trips += 1
+            # на одном этаже может быть несколько вызовов в очереди - сопоставляем по порядку поступления
+            times = self.call_times[index].get(floor)
+            call_time = None
+            if times:
+                call_time = times.pop(0)
+                if not times:
+                    del self.call_times[index][floor]
+            self.current[index] = [floor, call_time, None]
+        elif kind == EVENT_PICKUP:
+            trip = self.current[index]
+            if trip is not None:
+                trip[2] = self.clock()
+        elif kind == EVENT_REFUSED:
+            # оставшиеся ждут с того же вызова: следующий рейс на этаж получит его время
+            trip = self.current[index]
+            if trip is not None and trip[1] is not None:
+                self.call_times[index].setdefault(floor, []).insert(0, trip[1])
+        elif kind == EVENT_DROP:
+            trip = self.current[index]
+            if trip is not None and trip[2] is not None:
+                self.current[index] = None
+                record = Trip(elevator.elevator_id, elevator.house_id, elevator.street_id, trip[0], trip[1],
+                              trip[2], self.clock(), floor)
+                for callback in self.trip_callbacks:
+                    callback(record)
+
+
+class TripSink:
+    """
+    Базовый приёмник поездок с интерфейсом приёмников симуляции (attach/detach/close). Использует общий
+    TripTracker, если он передан, иначе создаёт и подключает свой.
+    """
+
+    def __init__(self, clock, tracker=None):
+        """
+        :param clock: функция без аргументов, время цикла событий
+        :param tracker: TripTracker или None
+        """
+        self.clock = clock
+        self.tracker = tracker
+        self.own_tracker = tracker is None
+        self.elevators = []
+
+    def attach(self, elevators, controller):
+        self.elevators = elevators
+        if self.tracker is None:
+            self.tracker = TripTracker(self.clock, len(elevators))
+        if self.own_tracker:
+            for elevator in elevators:
+                elevator.register_event_observer(self.tracker)
+        self.tracker.register_trip_observer(self.on_trip)
+
+    def detach(self, elevators, controller):
+        if self.own_tracker:
+            for elevator in elevators:
+                elevator.event_callbacks.remove(self.tracker)
+        self.tracker.trip_callbacks.remove(self.on_trip)
+
+    def on_trip(self, trip):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def percentile(values, q):
+    """
+    Перцентиль по методу ближайшего ранга.
+
+    :param values: отсортированный список
+    :param q: float, от 0 до 100
+    :return: float или None для пустого списка
+    """
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * q // 100))
+    return values[int(rank) - 1]
+
+
+class TripStats:
+    """
+    Подписчик TripTracker, собирающий времена ожидания и поездки для итоговых отчётов.
+    """
+
+    def __init__(self):
+        self.waits = []
+        self.journeys = []
+        self.empty_trips = 0
+
+    def __call__(self, trip):
+        if trip.call_time is None:
+            self.empty_trips += 1
+            return
+        self.waits.append(trip.pickup_time - trip.call_time)
+        self.journeys.append(trip.drop_time - trip.pickup_time)
+
+    def summary(self, tracker, duration):
+        """
+        Итоговая статистика прогона.
+
+        :param tracker: TripTracker, источник счётчиков вызовов и рейсов
+        :param duration: float, длительность прогона в секундах симуляции
+        :return: dict
+        """
+        served = len(self.waits)
+        result = {
+            "calls_generated": tracker.calls,
+            "calls_served": served,
+            "served_per_hour": served * 3600.0 / duration if duration else 0.0,
+            "trips": tracker.trips,
+            "empty_trips": self.empty_trips,
+            "trips_per_call": tracker.trips / served if served else None,
+        }
+        for name, values in (("wait", sorted(self.waits)), ("journey", sorted(self.journeys))):
+            result[f"{name}_mean"] = sum(values) / len(values) if values else None
+            result[f"{name}_p95"] = percentile(values, 95)
+            result[f"{name}_max"] = values[-1] if values else None
+        return result
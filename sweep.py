@@ -0,0 +1,214 @@
+"""
+Параметрические прогоны безголовой симуляции на всех ядрах процессора.
+
+Пространство параметров задаётся списками значений (probability=8,13,18) или диапазонами (door_dwell=1.5:5).
+Прогоны перебираются по сетке (декартово произведение списков) или выбираются случайно (--random N). Каждая точка
+прогоняется --replicas раз; зерно прогона зависит только от базового зерна и номера повтора, поэтому результаты
+не зависят от количества процессов и порядка завершения, а разные точки сравниваются на одинаковых случайных
+числах. Прогоны выполняются в пуле процессов, строки результатов печатаются по мере готовности и собираются в одну
+таблицу (CSV или JSON).
+
+Запуск из корня проекта:
+
+    python sweep.py --grid probability=8,13,18 door_dwell=2,3,5 parking=lobby,middle strategy=FCFS,LOOK \\
+        --duration 2h --replicas 3 --csv sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from batch import parse_duration
+from boarding import BoardingModel
+from dispatch import STRATEGIES
+from engine import Simulation
+from kinematics import CAR_TYPES
+from model import PARKING_POLICIES
+
+# Параметры точки и их типы; остальное (форма парка, длительность) общее для всех прогонов
+PARAMETERS = {
+    "probability": int,
+    "door_dwell": float,
+    "parking": str,
+    "strategy": str,
+    "floors": int,
+    "elevators": int,
+    "car_type": str,
+    "dwell": str,
+}
+DEFAULTS = {"probability": 13, "door_dwell": 3.0, "parking": "lobby", "strategy": "FCFS", "floors": 3, "elevators": 64,
+            "car_type": "constant", "dwell": "fixed"}
+# dwell: fixed - двери открыты door_dwell секунд, adaptive - время стоянки по посадке (boarding.BoardingModel)
+# car_type: constant - прежняя модель (floor_time секунд на этаж), остальные - типы лифтов kinematics.CAR_TYPES
+CHOICES = {"parking": PARKING_POLICIES, "strategy": tuple(STRATEGIES), "car_type": ("constant", *CAR_TYPES),
+           "dwell": ("fixed", "adaptive")}
+
+
+def parse_space(items):
+    """
+    Разбирает описание пространства параметров: "имя=a,b,c" - список значений, "имя=low:high" - диапазон.
+
+    :param items: list of str
+    :return: dict, имя -> list значений или (low, high)
+    """
+    space = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        if name not in PARAMETERS:
+            raise ValueError(f"unknown parameter: {name}, available: {', '.join(PARAMETERS)}")
+        cast = PARAMETERS[name]
+        if ":" in values and cast is not str:
+            low, high = values.split(":")
+            space[name] = (cast(low), cast(high))
+            continue
+        space[name] = [cast(value) for value in values.split(",")]
+        for value in space[name]:
+            if name in CHOICES and value not in CHOICES[name]:
+                raise ValueError(f"unknown {name}: {value}, available: {', '.join(CHOICES[name])}")
+    return space
+
+
+def grid(space):
+    """
+    Все сочетания значений (диапазоны в сетке не допускаются).
+
+    :param space: dict из parse_space
+    :return: list of dict
+    """
+    for name, values in space.items():
+        if isinstance(values, tuple):
+            raise ValueError(f"range for {name} can only be used with random search")
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_points(space, count, rng):
+    """
+    Случайные точки: значения из списков выбираются равновероятно, из диапазонов - равномерно.
+
+    :param space: dict из parse_space
+    :param count: int
+    :param rng: random.Random
+    :return: list of dict
+    """
+    points = []
+    for _ in range(count):
+        point = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                point[name] = rng.randint(low, high) if PARAMETERS[name] is int else rng.uniform(low, high)
+            else:
+                point[name] = rng.choice(values)
+        points.append(point)
+    return points
+
+
+def replica_seeds(seed, replicas):
+    """
+    Зёрна повторов: одинаковы для всех точек (общие случайные числа) и не зависят от пула процессов.
+
+    :return: list of int
+    """
+    rng = random.Random(seed)
+    return [rng.getrandbits(32) for _ in range(replicas)]
+
+
+def run_point(task):
+    """
+    Один прогон. Выполняется в процессе пула, поэтому принимает и возвращает только простые данные.
+
+    :param task: dict с ключами run, point, seed, duration
+    :return: dict, строка таблицы результатов
+    """
+    point = {**DEFAULTS, **task["point"]}
+    started = time.perf_counter()
+    simulation = Simulation(num_elevators=point["elevators"], floors_amount=point["floors"],
+                            strategy=point["strategy"], seed=task["seed"], call_probability=point["probability"],
+                            door_dwell=point["door_dwell"], parking=point["parking"],
+                            car_type=None if point["car_type"] == "constant" else point["car_type"])
+    if point["dwell"] == "adaptive":
+        simulation.add_sink(BoardingModel(random.Random(f"{task['seed']}:boarding")))
+    try:
+        summary = simulation.run(task["duration"])
+    finally:
+        simulation.close()
+    return {"run": task["run"], **point, "seed": task["seed"], "wall_time": time.perf_counter() - started,
+            **summary}
+
+
+def sweep(points, duration, seed=0, replicas=1, workers=None, on_result=None):
+    """
+    Прогоняет все точки в пуле процессов.
+
+    :param points: list of dict, точки пространства параметров
+    :param duration: float, секунд симуляции на прогон
+    :param seed: int, базовое зерно
+    :param replicas: int, повторов каждой точки
+    :param workers: int, процессов (None - по числу ядер)
+    :param on_result: функция, вызываемая с каждой строкой по мере готовности
+    :return: list of dict, строки в порядке номеров прогонов
+    """
+    tasks = [{"run": run, "point": point, "seed": replica_seed, "duration": duration}
+             for run, (point, replica_seed) in enumerate(itertools.product(points, replica_seeds(seed, replicas)))]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for future in as_completed([pool.submit(run_point, task) for task in tasks]):
+            row = future.result()
+            results.append(row)
+            if on_result is not None:
+                on_result(row)
+    return sorted(results, key=lambda row: row["run"])
+
+
+def format_row(row):
+    wait = "-" if row["wait_mean"] is None else f"{row['wait_mean']:.1f}"
+    p95 = "-" if row["wait_p95"] is None else f"{row['wait_p95']:.1f}"
+    dwell = "adapt." if row.get("dwell") == "adaptive" else f"{row['door_dwell']:.2f}"
+    return (f"{row['run']:>5} {row['strategy']:<7} {row['probability']:>5} {dwell:>6} "
+            f"{row['parking']:<7} {row['floors']:>6} {row['served_per_hour']:>8.0f} {wait:>9} {p95:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    space = parser.add_mutually_exclusive_group(required=True)
+    space.add_argument("--grid", nargs="+", metavar="ИМЯ=ЗНАЧЕНИЯ", help="перебор по сетке")
+    space.add_argument("--random", nargs="+", metavar="ИМЯ=ЗНАЧЕНИЯ", help="случайный поиск")
+    parser.add_argument("--samples", type=int, default=20, help="точек случайного поиска")
+    parser.add_argument("--duration", type=parse_duration, default=3600.0, help="время симуляции на прогон")
+    parser.add_argument("--replicas", type=int, default=1, help="повторов каждой точки с разными зёрнами")
+    parser.add_argument("--seed", type=int, default=0, help="базовое зерно")
+    parser.add_argument("--workers", type=int, help="процессов (по умолчанию по числу ядер)")
+    parser.add_argument("--csv", help="сохранить таблицу результатов в CSV")
+    parser.add_argument("--json", help="сохранить таблицу результатов в JSON")
+    args = parser.parse_args(argv)
+
+    if args.grid:
+        points = grid(parse_space(args.grid))
+    else:
+        points = random_points(parse_space(args.random), args.samples, random.Random(args.seed))
+    print(f"{len(points)} точек x {args.replicas} повторов", file=sys.stderr)
+    print(f"{'run':>5} {'strat.':<7} {'вер.%':>5} {'двери':>6} {'стоянка':<7} {'этажей':>6} {'обсл./ч':>8} "
+          f"{'ожид. ср':>9} {'p95':>8}")
+    started = time.perf_counter()
+    results = sweep(points, args.duration, args.seed, args.replicas, args.workers,
+                    on_result=lambda row: print(format_row(row), flush=True))
+    print(f"{len(results)} прогонов за {time.perf_counter() - started:.1f} с", file=sys.stderr)
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import pytest
+
+import checkpoint
+from engine import Simulation
+
+
+def run_and_take(strategy="LOOK"):
+    simulation = Simulation(num_elevators=8, floors_amount=6, strategy=strategy, seed=1, call_probability=40)
+    try:
+        simulation.run(600)
+        return checkpoint.take(simulation.elevators, simulation.houses, simulation.now(), simulation.tracker,
+                               simulation.rng)
+    finally:
+        simulation.close()
+
+
+def test_round_trip_continues_run():
+    snapshot = run_and_take()
+    data = checkpoint.encode(snapshot)
+    decoded = checkpoint.decode(data)
+    assert checkpoint.encode(decoded) == data
+    assert (decoded.strategy, decoded.car_type) == ("LOOK", None)
+    assert len(decoded.pending_floors) > 0
+
+    simulation = Simulation(num_elevators=8, floors_amount=6, strategy="LOOK", seed=2, call_probability=40)
+    try:
+        checkpoint.apply(decoded, simulation.elevators, simulation.houses, simulation.tracker, simulation.rng)
+        assert simulation.rng.getstate() == snapshot.rng_state
+        restored = sum(len(times) for calls in simulation.tracker.call_times for times in calls.values())
+        assert restored == len(decoded.pending_floors)
+        summary = simulation.run(600)
+    finally:
+        simulation.close()
+    assert summary["calls_served"] > 0
+    assert summary["empty_trips"] == 0
+    assert summary["wait_max"] >= max(decoded.pending_ages)  # ожидание идёт от настоящего момента вызова
+
+
+def test_restore_takes_strategy_from_snapshot_and_rejects_mismatch(tmp_path):
+    path = tmp_path / "city.ck"
+    checkpoint.write(path, run_and_take())
+
+    simulation = Simulation(restore=path)
+    try:
+        assert simulation.strategy == "LOOK"
+    finally:
+        simulation.close()
+    with pytest.raises(ValueError, match="strategy"):
+        Simulation(restore=path, strategy="SCAN")
+    with pytest.raises(ValueError, match="car type"):
+        Simulation(restore=path, car_type="midrise")
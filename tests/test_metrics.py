@@ -0,0 +1,34 @@
+import asyncio
+import random
+
+from engine import create_city
+from metrics import MetricsSink, scrape
+from model import ElevatorController
+from stats import TripTracker
+
+
+def test_scrape_returns_metrics_and_404():
+    async def run():
+        elevators, _ = create_city(4, 3, random.Random(0))
+        controller = ElevatorController(elevators)
+        loop = asyncio.get_running_loop()
+        sink = MetricsSink(loop.time, TripTracker(loop.time, len(elevators)))
+        sink.attach(elevators, controller)
+        elevators[0].lift_status = False
+        port = await sink.start_server(port=0)
+        try:
+            metrics = await scrape(port=port)
+            missing = await scrape(port=port, path="/other")
+        finally:
+            await sink.stop_server()
+        return metrics, missing
+
+    (status, samples), (missing_status, missing_samples) = asyncio.run(run())
+    assert status == 200
+    for name in ("lift_calls_generated_total", "lift_calls_served_total", "lift_trips_total",
+                 "lift_wait_seconds_count", 'lift_wait_seconds_bucket{le="+Inf"}', "lift_queue_depth"):
+        assert name in samples
+    assert samples["lift_elevators"] == 4
+    assert samples["lift_stopped_elevators"] == 1
+    assert missing_status == 404
+    assert missing_samples == {}
@@ -0,0 +1,98 @@
+import asyncio
+import random
+
+from engine import create_city
+from model import ACTION_FORCE_TARGET, ElevatorController
+from operator_api import OperatorApi, receipt, send
+
+
+def serve(scenario):
+    async def run():
+        elevators, houses = create_city(4, 3, random.Random(0))
+        controller = ElevatorController(elevators)
+        api = OperatorApi(controller, houses)
+        port = await api.start_server(port=0)
+        try:
+            return await scenario(port, controller)
+        finally:
+            await api.stop_server()
+
+    return asyncio.run(run())
+
+
+def test_same_key_and_body_returns_same_receipt_without_executing_again():
+    async def scenario(port, controller):
+        targets = []
+        controller.register_action_observer(
+            lambda elevator_id, action, value: targets.append(elevator_id) if action == ACTION_FORCE_TARGET else None)
+        commands = [{"op": "target", "elevators": [1, 2], "floor": 3}]
+        first = await send(commands, port=port, key="night-1", wait=True)
+        again = await send(commands, port=port, key="night-1", wait=True)
+        stored = await receipt("night-1", port=port)
+        return first, again, stored, targets
+
+    first, again, stored, targets = serve(scenario)
+    assert first[0] == again[0] == stored[0] == 200
+    assert first[1] == again[1] == stored[1]
+    assert first[1]["id"] == "night-1"
+    assert targets == [1, 2]
+
+
+def test_same_key_with_different_body_is_a_conflict():
+    async def scenario(port, controller):
+        await send([{"op": "stop", "elevators": [1]}], port=port, key="k")
+        return await send([{"op": "stop", "elevators": [2]}], port=port, key="k")
+
+    status, response = serve(scenario)
+    assert status == 409
+    assert "error" in response
+
+
+def test_wait_returns_results():
+    async def scenario(port, controller):
+        return await send([{"op": "stop", "street": controller.elevators[0].street_id}, {"op": "open", "all": True}],
+                          port=port, wait=True)
+
+    status, response = serve(scenario)
+    assert status == 200
+    assert response["status"] == "done"
+    stop, doors = response["results"]
+    assert stop["applied"] == stop["elevators"] > 0
+    assert doors == {"op": "open", "elevators": 4, "applied": 4, "unchanged": 0, "errors": {}}
+
+
+def test_bulk_target_reports_errors_per_car():
+    async def scenario(port, controller):
+        await send([{"op": "stop", "elevators": [2]}], port=port, wait=True)
+        return await send([{"op": "target", "all": True, "floor": 2}], port=port, wait=True)
+
+    status, response = serve(scenario)
+    assert status == 200
+    assert response["status"] == "failed"
+    result = response["results"][0]
+    assert (result["applied"], result["errors"]) == (3, {"2": "elevator is stopped"})
+
+
+def test_invalid_selection_and_content_length_are_rejected():
+    async def raw(port, length):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"POST /commands HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return int(response.split()[1])
+
+    async def scenario(port, controller):
+        selections = [await send([command], port=port) for command in (
+            {"op": "stop", "elevators": [True]},
+            {"op": "stop", "elevators": []},
+            {"op": "stop", "street": 999},
+            {"op": "stop", "street": "1"},
+            {"op": "target", "all": True, "floor": True},
+        )]
+        lengths = [await raw(port, length) for length in ("-1", "abc")]
+        return selections, lengths
+
+    selections, lengths = serve(scenario)
+    assert [status for status, _ in selections] == [400] * 5
+    assert lengths == [400, 400]
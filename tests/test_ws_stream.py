@@ -0,0 +1,35 @@
+import asyncio
+import random
+
+from engine import create_city
+from model import EVENT_DOOR, ElevatorController
+from ws_stream import StateStream, StreamClient
+
+
+def test_client_receives_snapshot_then_delta():
+    async def run():
+        elevators, _ = create_city(4, 3, random.Random(0))
+        controller = ElevatorController(elevators)
+        stream = StateStream(len(elevators), rate=50.0)
+        stream.attach(elevators, controller)
+        port = await stream.start_server(port=0)
+        client = await StreamClient().connect(port=port)
+        try:
+            snapshot = await asyncio.wait_for(client.receive(), 5)
+            door_before = snapshot["cars"][2]["door"]  # клиент обновляет словари лифтов снимка на месте
+            elevator = elevators[2]
+            elevator.door_status = True
+            elevator.notify_event(EVENT_DOOR, elevator.current_floor, 1)
+            delta = await asyncio.wait_for(client.receive(), 5)
+        finally:
+            await client.close()
+            await stream.stop_server()
+        return snapshot, door_before, delta, client.cars
+
+    snapshot, door_before, delta, cars = asyncio.run(run())
+    assert snapshot["type"] == "snapshot"
+    assert [car["id"] for car in snapshot["cars"]] == [1, 2, 3, 4]
+    assert door_before is False
+    assert delta["type"] == "delta"
+    assert delta["cars"] == {"3": {"door": True}}
+    assert cars[3]["door"] is True
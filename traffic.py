@@ -0,0 +1,166 @@
+import asyncio
+import random
+
+# Суточные профили спроса: множитель вероятности вызова по часам (0-23 ч)
+PROFILES = {
+    "flat": [1.0] * 24,
+    # жилой дом: утренний выход и вечернее возвращение, ночью почти пусто
+    "residential": [0.2, 0.1, 0.1, 0.1, 0.1, 0.3, 0.8, 1.8, 2.0, 1.2, 0.8, 0.8,
+                    0.9, 0.9, 0.8, 0.9, 1.1, 1.6, 2.0, 1.8, 1.4, 1.0, 0.6, 0.3],
+    # офис: пики на приходе, обеде и уходе
+    "office": [0.05, 0.05, 0.05, 0.05, 0.05, 0.1, 0.3, 1.5, 2.5, 2.0, 1.0, 1.0,
+               2.0, 2.0, 1.0, 1.0, 1.2, 2.5, 2.0, 0.8, 0.3, 0.1, 0.05, 0.05],
+}
+
+
+class DemandProfile:
+    """
+    Суточный профиль спроса: вероятность вызова меняется по часам симуляции.
+    """
+
+    def __init__(self, hourly, start_hour=0):
+        """
+        :param hourly: str (имя из PROFILES) или список из 24 множителей
+        :param start_hour: float, час суток, с которого начинается симуляция
+        """
+        if isinstance(hourly, str):
+            if hourly not in PROFILES:
+                raise ValueError(f"unknown demand profile: {hourly}, available: {', '.join(PROFILES)}")
+            hourly = PROFILES[hourly]
+        if len(hourly) != 24:
+            raise ValueError("demand profile must have 24 hourly multipliers")
+        self.hourly = list(hourly)
+        self.start_hour = start_hour
+
+    def multiplier(self, now):
+        """
+        :param now: float, секунды от начала симуляции
+        :return: float
+        """
+        return self.hourly[int(self.start_hour + now / 3600) % 24]
+
+
+class CallGenerator:
+    """
+    Генератор случайных вызовов лифта. Общий для окна программы и безголовой симуляции, чтобы бенчмарки
+    измеряли тот же поток вызовов, что видит оператор.
+    """
+
+    def __init__(self, rng=None, probability=13, profile=None):
+        """
+        :param rng: random.Random или модуль random, источник случайных чисел
+        :param probability: int, шанс появления вызова за тик в процентах
+        :param profile: DemandProfile или None - постоянная вероятность
+        """
+        self.rng = rng or random
+        self.probability = probability
+        self.profile = profile
+
+    def generate(self, house, now=0.0):
+        """
+        Один тик генерации вызова в доме. Если вызов появился, отмечает его в доме.
+
+        :param house: House, дом с лифтом
+        :param now: float, секунды от начала симуляции (нужны только профилю спроса)
+        :return: (int, bool) - этаж и сторона вызова (True - слева), либо None
+        """
+        probability = self.probability
+        if self.profile is not None:
+            probability = min(100, round(probability * self.profile.multiplier(now)))
+        a = self.rng.randint(1, 100)
+        if a <= probability:  # 13% на появление вызова
+            floor = self.rng.randint(1, house.floors_amount) - 1
+            # для простоты сделаем так, чтобы человек вызывал лифт на этаже только с одной стороны
+            if not (house.left_calls[floor] or house.right_calls[floor]):
+                left = a % 2 == 1
+                if left:
+                    house.left_calls[floor] = True
+                else:
+                    house.right_calls[floor] = True
+                return floor + 1, left
+        return None
+
+
+class UpPeakArrivals:
+    """
+    Утренний пик: пассажиры приходят на первый этаж домов пуассоновским потоком и набирают случайный этаж
+    назначения (ElevatorController.register_passenger). Подключается как приёмник симуляции после группового
+    диспетчера (destination.GroupDispatcher).
+    """
+
+    def __init__(self, rng=None, rate=300.0, profile=None, clock=None):
+        """
+        :param rng: random.Random, источник случайных чисел
+        :param rate: float, пассажиров в час на дом
+        :param profile: DemandProfile или None - постоянный поток; с профилем rate умножается на множитель часа
+        :param clock: функция без аргументов, секунды от начала симуляции (нужна только профилю)
+        """
+        self.rng = rng or random
+        self.rate = rate
+        self.profile = profile
+        self.clock = clock
+        self.houses = []
+        self.arrivals = 0
+        self.task = None
+
+    def attach(self, elevators, controller):
+        self.houses = sorted({(elevator.street_id, elevator.house_id, elevator.floors_amount)
+                              for elevator in elevators})
+        self.task = asyncio.ensure_future(self._arrivals(controller))
+
+    def detach(self, elevators, controller):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def close(self):
+        pass
+
+    async def _arrivals(self, controller):
+        peak = max(self.profile.hourly) if self.profile is not None else 1.0
+        rate = self.rate * peak * len(self.houses) / 3600  # общий поток всех домов, дом выбирается случайно
+        while True:
+            await asyncio.sleep(self.rng.expovariate(rate))
+            if self.profile is not None and self.rng.random() * peak >= self.profile.multiplier(self.clock()):
+                continue  # прореживание: поток с меняющейся по часам интенсивностью
+            street_id, house_id, floors_amount = self.rng.choice(self.houses)
+            try:
+                controller.register_passenger(street_id, house_id, *self.journey(floors_amount))
+            except ValueError:  # все лифты дома остановлены - пассажир уходит
+                continue
+            self.arrivals += 1
+
+    def journey(self, floors_amount):
+        """
+        :param floors_amount: int, этажность дома
+        :return: (int, int) - этаж появления и этаж назначения пассажира
+        """
+        return 1, self.rng.randint(2, floors_amount)
+
+
+class InterfloorArrivals(UpPeakArrivals):
+    """
+    Пассажиры появляются на этажах выше первого (вес этажа - floor_weights) и едут на первый этаж (lobby_share) или
+    на другой этаж: уход из офиса, обед, поездки между этажами.
+    """
+
+    def __init__(self, rng=None, rate=300.0, profile=None, clock=None, floor_weights=None, lobby_share=0.5):
+        """
+        :param floor_weights: dict этаж -> вес или None - все этажи выше первого поровну
+        :param lobby_share: float, доля пассажиров, едущих на первый этаж
+        Остальные параметры - как у UpPeakArrivals.
+        """
+        super().__init__(rng, rate, profile, clock)
+        self.floor_weights = floor_weights
+        self.lobby_share = lobby_share
+
+    def journey(self, floors_amount):
+        if self.floor_weights is None:
+            origin = self.rng.randint(2, floors_amount)
+        else:
+            floors = [floor for floor in self.floor_weights if 2 <= floor <= floors_amount]
+            origin = self.rng.choices(floors, [self.floor_weights[floor] for floor in floors])[0]
+        if self.rng.random() < self.lobby_share:
+            return origin, 1
+        destination = self.rng.randint(1, floors_amount - 1)
+        return origin, destination + 1 if destination >= origin else destination
@@ -0,0 +1,211 @@
+"""
+Колоночный экспорт завершённых поездок для анализа вне программы (numpy, pandas, Arrow).
+
+Поездки складываются в столбцы array (по одному на поле), а не в список кортежей: на поездку тратится несколько
+append в готовые буферы. Когда в буфере набирается chunk_size поездок, он сбрасывается на диск пачкой
+chunk-NNNNNN: каталог с файлом .npy на каждый столбец. Формат .npy пишется без numpy (заголовок и сырые байты
+array), а читается numpy.load(mmap_mode="r") без копирования. Если установлен pyarrow, пачку можно дополнительно
+записать в Parquet или Arrow IPC (formats=("npy", "parquet")).
+"""
+import ast
+import math
+import sys
+from array import array
+from pathlib import Path
+
+from stats import TripSink
+
+try:
+    import numpy
+except ImportError:  # numpy нужен только для чтения
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.parquet
+except ImportError:  # pyarrow нужен только для Parquet и Arrow
+    pyarrow = None
+
+# Столбцы: имя -> (код типа array, тип numpy)
+COLUMNS = {
+    "call_time": ("d", "<f8"),  # NaN для пустых рейсов
+    "pickup_time": ("d", "<f8"),
+    "drop_time": ("d", "<f8"),
+    "floor": ("H", "<u2"),
+    "drop_floor": ("H", "<u2"),
+    "elevator_id": ("I", "<u4"),
+    "house_id": ("H", "<u2"),
+    "street_id": ("H", "<u2"),
+}
+FORMATS = ("npy", "parquet", "arrow")
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def write_npy(path, values, descr):
+    """
+    Записывает одномерный array в файл .npy (версия формата 1.0).
+
+    :param path: Path, файл
+    :param values: array.array
+    :param descr: str, тип numpy в нотации "<f8"
+    :return: None
+    """
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({len(values)},), }}"
+    # заголовок вместе с сигнатурой и длиной выравнивается на 64 байта и заканчивается переводом строки
+    padding = -(len(NPY_MAGIC) + 2 + len(header) + 1) % 64
+    header = (header + " " * padding + "\n").encode("latin-1")
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    with open(path, "wb") as file:
+        file.write(NPY_MAGIC + len(header).to_bytes(2, "little") + header)
+        values.tofile(file)
+
+
+def read_npy(path):
+    """
+    Читает файл .npy, записанный write_npy, без numpy.
+
+    :param path: str или Path
+    :return: array.array
+    """
+    data = Path(path).read_bytes()
+    if not data.startswith(NPY_MAGIC):
+        raise ValueError(f"{path}: not a .npy v1.0 file")
+    length = int.from_bytes(data[8:10], "little")
+    header = ast.literal_eval(data[10:10 + length].decode("latin-1"))
+    typecode = {descr: code for code, descr in COLUMNS.values()}.get(header["descr"])
+    if typecode is None:
+        raise ValueError(f"{path}: unsupported dtype {header['descr']}")
+    values = array(typecode)
+    values.frombytes(data[10 + length:])
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+class TripExporter(TripSink):
+    """
+    Приёмник поездок, пишущий их пачками в каталог directory.
+    """
+
+    def __init__(self, directory, clock, tracker=None, chunk_size=65536, formats=("npy",), time_offset=0.0):
+        """
+        :param directory: str или Path, каталог экспорта (создаётся при необходимости)
+        :param clock: функция без аргументов, время цикла событий
+        :param tracker: TripTracker, если он уже есть; иначе создаётся свой
+        :param chunk_size: int, поездок в одной пачке
+        :param formats: форматы пачки из FORMATS
+        :param time_offset: float, прибавляется ко времени цикла (например, time.time() - loop.time() для
+            абсолютного времени)
+        """
+        super().__init__(clock, tracker)
+        unknown = set(formats) - set(FORMATS)
+        if unknown:
+            raise ValueError(f"unknown export format: {', '.join(sorted(unknown))}")
+        if pyarrow is None and set(formats) & {"parquet", "arrow"}:
+            raise RuntimeError("pyarrow is required for Parquet and Arrow export, install it with "
+                               "`pip install pyarrow`")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.formats = tuple(formats)
+        self.time_offset = time_offset
+        self.columns = {name: array(code) for name, (code, _) in COLUMNS.items()}
+        existing = chunk_paths(self.directory)
+        self.chunk_number = int(existing[-1].name.split("-")[1]) if existing else 0
+        self.exported = 0
+
+    def __len__(self):
+        return len(self.columns["drop_time"])
+
+    def on_trip(self, trip):
+        columns = self.columns
+        offset = self.time_offset
+        columns["call_time"].append(math.nan if trip.call_time is None else trip.call_time + offset)
+        columns["pickup_time"].append(trip.pickup_time + offset)
+        columns["drop_time"].append(trip.drop_time + offset)
+        columns["floor"].append(trip.floor)
+        columns["drop_floor"].append(trip.drop_floor)
+        columns["elevator_id"].append(trip.elevator_id)
+        columns["house_id"].append(trip.house_id)
+        columns["street_id"].append(trip.street_id)
+        if len(self) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Сбрасывает накопленные поездки пачкой и очищает буферы.
+
+        :return: Path пачки или None, если сбрасывать нечего
+        """
+        if not len(self):
+            return None
+        self.chunk_number += 1
+        path = self.directory / f"chunk-{self.chunk_number:06d}"
+        path.mkdir()
+        if "npy" in self.formats:
+            for name, values in self.columns.items():
+                write_npy(path / f"{name}.npy", values, COLUMNS[name][1])
+        if pyarrow is not None and set(self.formats) & {"parquet", "arrow"}:
+            types = {"d": pyarrow.float64(), "H": pyarrow.uint16(), "I": pyarrow.uint32()}
+            table = pyarrow.table({name: pyarrow.array(values, type=types[values.typecode])
+                                   for name, values in self.columns.items()})
+            if "parquet" in self.formats:
+                pyarrow.parquet.write_table(table, path / "trips.parquet")
+            if "arrow" in self.formats:
+                pyarrow.feather.write_feather(table, path / "trips.arrow", compression="uncompressed")
+        self.exported += len(self)
+        for name, (code, _) in COLUMNS.items():
+            self.columns[name] = array(code)
+        return path
+
+    def close(self):
+        self.flush()
+
+
+def chunk_paths(directory):
+    """
+    :param directory: str или Path, каталог экспорта
+    :return: list of Path, пачки в порядке записи
+    """
+    return sorted(path for path in Path(directory).glob("chunk-*") if path.is_dir())
+
+
+def load_columns(directory, mmap=True):
+    """
+    Загружает экспорт в столбцы numpy. Пачки склеиваются; если пачка одна и mmap=True, столбцы остаются
+    отображёнными в память.
+
+    :param directory: str или Path, каталог экспорта
+    :param mmap: bool, отображать файлы в память, а не читать
+    :return: dict, имя столбца -> numpy.ndarray
+    """
+    if numpy is None:
+        raise RuntimeError("numpy is required for load_columns(), install it with `pip install numpy`")
+    parts = {name: [] for name in COLUMNS}
+    for path in chunk_paths(directory):
+        for name in COLUMNS:
+            parts[name].append(numpy.load(path / f"{name}.npy", mmap_mode="r" if mmap else None))
+    result = {}
+    for name, (_, descr) in COLUMNS.items():
+        if not parts[name]:
+            result[name] = numpy.empty(0, dtype=descr)
+        elif len(parts[name]) == 1:
+            result[name] = parts[name][0]
+        else:
+            result[name] = numpy.concatenate(parts[name])
+    return result
+
+
+def load_dataframe(directory):
+    """
+    Загружает экспорт в pandas.DataFrame.
+
+    :param directory: str или Path, каталог экспорта
+    :return: pandas.DataFrame
+    """
+    import pandas
+    return pandas.DataFrame(load_columns(directory, mmap=False))
@@ -0,0 +1,314 @@
+"""
+Поток состояния парка по WebSocket для панелей в браузере.
+
+Сразу после подключения клиент получает полный снимок (сообщение "snapshot"): характеристики и состояние всех
+лифтов. Дальше с частотой rate сообщений в секунду приходят только изменения ("delta"): для каждого изменившегося
+лифта - только изменившиеся поля относительно того, что этот клиент уже получил. Сообщения - текстовые кадры JSON,
+вызовы этажей передаются битовыми масками (бит 0 - первый этаж).
+
+У каждого клиента свой учёт отправленного, поэтому медленный клиент не задерживает остальных и симуляцию: пока
+его неотправленные данные больше high_water, такты пропускаются (изменения сливаются и уходят следующей дельтой,
+то есть клиент получает состояние реже), а если клиент не разгребает очередь дольше drop_after секунд, он
+отключается.
+
+Сервер WebSocket (RFC 6455) написан на asyncio streams без сторонних библиотек, так же как HTTP сервер метрик;
+для проверки есть клиент StreamClient.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import time
+
+from shared_state import BUSY, DOOR_OPEN, LIFT_ON, FleetState
+
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+FIELDS = ("floor", "target", "position", "queue", "door", "on", "busy", "left", "right")
+
+
+def accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + _GUID).encode()).digest()).decode()
+
+
+def encode_frame(opcode, payload, mask=False):
+    """
+    Кадр WebSocket с флагом FIN. Кадры клиента маскируются (mask=True), кадры сервера - нет.
+
+    :return: bytes
+    """
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack("!H", length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack("!Q", length)
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = bytes(byte ^ key[index % 4] for index, byte in enumerate(payload))
+    return bytes(header) + payload
+
+
+async def read_frame(reader):
+    """
+    :param reader: asyncio.StreamReader
+    :return: (int, bytes) - код операции и данные
+    """
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack("!Q", await reader.readexactly(8))
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if key is not None:
+        payload = bytes(byte ^ key[index % 4] for index, byte in enumerate(payload))
+    return opcode, payload
+
+
+def car_fields(values):
+    """
+    Поля лифта для сообщения из значений FleetState.values.
+
+    :return: dict
+    """
+    floor, target, position, depth, flags, left, right = values
+    return {"floor": floor, "target": target, "position": round(position, 1), "queue": depth,
+            "door": bool(flags & DOOR_OPEN), "on": bool(flags & LIFT_ON), "busy": bool(flags & BUSY),
+            "left": left, "right": right}
+
+
+class _Viewer:
+    """
+    Подключённый клиент: что ему уже отправлено и какие лифты изменились с тех пор.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.sent = {}  # id лифта -> поля, которые клиент уже получил
+        self.dirty = set()
+        self.congested_since = None
+        self.skipped = 0
+        self.messages = 0
+
+
+class StateStream(FleetState):
+    """
+    Приёмник событий (attach/detach/close) и сервер WebSocket потока состояния.
+    """
+
+    def __init__(self, num_elevators, clock=time.time, rate=10.0, high_water=64 * 1024, drop_after=5.0):
+        """
+        :param num_elevators: int, количество лифтов
+        :param clock: функция без аргументов, время для сообщений
+        :param rate: float, наибольшая частота дельт для клиента, сообщений в секунду
+        :param high_water: int, объём неотправленных данных клиента, при котором такты пропускаются
+        :param drop_after: float, через сколько секунд непрерывной перегрузки клиент отключается
+        """
+        super().__init__(num_elevators)
+        self.clock = clock
+        self.interval = 1.0 / rate
+        self.high_water = high_water
+        self.drop_after = drop_after
+        self.viewers = []
+        self.dropped = 0
+        self.server = None
+        self.sequence = 0
+
+    def changed(self, elevator):
+        for viewer in self.viewers:
+            viewer.dirty.add(elevator.elevator_id)
+
+    def snapshot(self):
+        cars = []
+        for elevator in self.elevators:
+            cars.append({"id": elevator.elevator_id, "street": elevator.street_id, "house": elevator.house_id,
+                         "capacity": elevator.capacity, "floors": elevator.floors_amount,
+                         **car_fields(self.values(elevator))})
+        return {"type": "snapshot", "time": self.clock(), "cars": cars}
+
+    def delta(self, viewer):
+        """
+        Изменения для клиента с прошлого сообщения; обновляет учёт отправленного.
+
+        :return: dict или None, если менять нечего
+        """
+        cars = {}
+        for elevator_id in sorted(viewer.dirty):
+            fields = car_fields(self.values(self.elevators[elevator_id - 1]))
+            sent = viewer.sent.get(elevator_id, {})
+            changes = {name: value for name, value in fields.items() if sent.get(name) != value}
+            if changes:
+                cars[str(elevator_id)] = changes
+                viewer.sent[elevator_id] = fields
+        viewer.dirty.clear()
+        if not cars:
+            return None
+        self.sequence += 1
+        return {"type": "delta", "seq": self.sequence, "time": self.clock(), "cars": cars}
+
+    @staticmethod
+    def send(viewer, message):
+        viewer.writer.write(encode_frame(OP_TEXT, json.dumps(message, separators=(",", ":")).encode()))
+        viewer.messages += 1
+
+    async def stream(self, viewer):
+        """
+        Такты отправки дельт одному клиенту с учётом его перегрузки.
+        """
+        transport = viewer.writer.transport
+        while not transport.is_closing():
+            await asyncio.sleep(self.interval)
+            if transport.get_write_buffer_size() > self.high_water:
+                now = time.monotonic()
+                if viewer.congested_since is None:
+                    viewer.congested_since = now
+                elif now - viewer.congested_since > self.drop_after:
+                    self.dropped += 1
+                    transport.abort()  # закрыть без ожидания отправки очереди
+                    return
+                viewer.skipped += 1
+                continue
+            viewer.congested_since = None
+            message = self.delta(viewer)
+            if message is not None:
+                self.send(viewer, message)
+
+    async def handle(self, reader, writer):
+        """
+        Рукопожатие WebSocket, снимок и дальше - поток дельт до отключения клиента.
+        """
+        try:
+            request = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            key = headers.get("sec-websocket-key")
+            if not request.startswith(b"GET ") or headers.get("upgrade", "").lower() != "websocket" or not key:
+                writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                writer.close()
+                return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n").encode())
+        viewer = _Viewer(writer)
+        snapshot = self.snapshot()
+        for car in snapshot["cars"]:
+            viewer.sent[car["id"]] = {name: car[name] for name in FIELDS}
+        self.send(viewer, snapshot)
+        self.viewers.append(viewer)
+        task = asyncio.create_task(self.stream(viewer), name="ws_stream.stream")
+        try:
+            while True:  # от клиента ждём только служебные кадры
+                opcode, payload = await read_frame(reader)
+                if opcode == OP_CLOSE:
+                    writer.write(encode_frame(OP_CLOSE, payload[:2]))
+                    break
+                if opcode == OP_PING:
+                    writer.write(encode_frame(OP_PONG, payload))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.viewers.remove(viewer)
+            task.cancel()
+            writer.close()
+
+    async def start_server(self, host="127.0.0.1", port=9110):
+        """
+        Запускает сервер WebSocket в текущем цикле событий.
+
+        :param host: str, адрес (по умолчанию только локальный)
+        :param port: int, порт (0 - выбрать свободный)
+        :return: int, фактический порт
+        """
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop_server(self):
+        if self.server is not None:
+            self.server.close()
+            for viewer in self.viewers:
+                viewer.writer.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+
+
+class StreamClient:
+    """
+    Простейший клиент WebSocket для проверки потока: собирает состояние из снимка и дельт.
+    """
+
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.cars = {}  # id лифта -> поля
+        self.messages = 0
+
+    async def connect(self, host="127.0.0.1", port=9110, path="/"):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                           f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n")
+                          .encode())
+        status = await self.reader.readline()
+        while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        if b" 101 " not in status:
+            raise ConnectionError(f"handshake failed: {status.decode().strip()}")
+        return self
+
+    async def receive(self):
+        """
+        Следующее сообщение сервера; применяет его к self.cars.
+
+        :return: dict
+        """
+        while True:
+            opcode, payload = await read_frame(self.reader)
+            if opcode == OP_CLOSE:
+                raise ConnectionError("closed by server")
+            if opcode != OP_TEXT:
+                continue
+            message = json.loads(payload)
+            self.messages += 1
+            if message["type"] == "snapshot":
+                self.cars = {car["id"]: car for car in message["cars"]}
+            elif message["type"] == "delta":
+                for elevator_id, changes in message["cars"].items():
+                    self.cars[int(elevator_id)].update(changes)
+            return message
+
+    async def close(self):
+        self.writer.write(encode_frame(OP_CLOSE, struct.pack("!H", 1000), mask=True))
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass